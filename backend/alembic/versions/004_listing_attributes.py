@@ -0,0 +1,46 @@
+"""listing attributes jsonb
+
+Stores the full detail-page attribute group (condition, title status,
+transmission, drive, fuel, cylinders, ...) in one JSONB column with a GIN
+index (jsonb_path_ops) so /deals attribute filters are index scans.
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "004"
+down_revision: Union[str, None] = "003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "listings",
+        sa.Column(
+            "attributes",
+            postgresql.JSONB(),
+            nullable=False,
+            server_default=sa.text("'{}'::jsonb"),
+        ),
+    )
+    op.create_index(
+        "ix_listings_attributes",
+        "listings",
+        ["attributes"],
+        postgresql_using="gin",
+        postgresql_ops={"attributes": "jsonb_path_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_listings_attributes", "listings")
+    op.drop_column("listings", "attributes")
@@ -0,0 +1,53 @@
+"""listing external id
+
+Dedupe on the Craigslist post id instead of the full URL: adds
+listings.external_id (BIGINT), backfills it from the URL, drops rows that
+turn out to be URL variants of an already-stored post (the oldest is kept)
+and replaces the unique URL index with UNIQUE (source, external_id).
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "005"
+down_revision: Union[str, None] = "004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("listings", sa.Column("external_id", sa.BigInteger(), nullable=True))
+    op.execute(
+        r"""
+        UPDATE listings
+        SET external_id = substring(
+            split_part(split_part(url, '#', 1), '?', 1) FROM '/([0-9]+)\.html?$'
+        )::bigint
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM listings AS dup
+        USING listings AS kept
+        WHERE dup.source = kept.source
+          AND dup.external_id = kept.external_id
+          AND (dup.created_at, dup.id) > (kept.created_at, kept.id)
+        """
+    )
+    op.create_unique_constraint(
+        "uq_listings_source_external_id", "listings", ["source", "external_id"]
+    )
+    op.drop_constraint("uq_listings_url", "listings")
+
+
+def downgrade() -> None:
+    op.create_unique_constraint("uq_listings_url", "listings", ["url"])
+    op.drop_constraint("uq_listings_source_external_id", "listings")
+    op.drop_column("listings", "external_id")
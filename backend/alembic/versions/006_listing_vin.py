@@ -0,0 +1,32 @@
+"""listing vin
+
+Adds listings.vin (check-digit-validated VIN parsed from the detail page)
+with a btree index, so ingest can collapse re-posts of the same car with one
+index lookup per listing. Existing rows stay NULL until re-scraped or
+refreshed with ``python -m app.reparse``.
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "006"
+down_revision: Union[str, None] = "005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("listings", sa.Column("vin", sa.String(length=17), nullable=True))
+    op.create_index("ix_listings_vin", "listings", ["vin"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_listings_vin", "listings")
+    op.drop_column("listings", "vin")
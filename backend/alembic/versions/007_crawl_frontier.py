@@ -0,0 +1,53 @@
+"""crawl frontier
+
+Durable queue of detail URLs waiting to be fetched, leased to workers with
+FOR UPDATE SKIP LOCKED (app.crawl_frontier).
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "007"
+down_revision: Union[str, None] = "006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "crawl_frontier",
+        sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column("url", sa.String(), nullable=False),
+        sa.Column("job_id", sa.String(), nullable=True),
+        sa.Column("row", postgresql.JSONB(), nullable=False),
+        sa.Column("priority", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("leased_until", sa.DateTime(timezone=True), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+        sa.UniqueConstraint("url", name="uq_crawl_frontier_url"),
+    )
+    op.create_index("ix_crawl_frontier_job_id", "crawl_frontier", ["job_id"])
+    op.create_index(
+        "ix_crawl_frontier_claim_order",
+        "crawl_frontier",
+        [sa.text("priority DESC"), "id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_crawl_frontier_claim_order", "crawl_frontier")
+    op.drop_index("ix_crawl_frontier_job_id", "crawl_frontier")
+    op.drop_table("crawl_frontier")
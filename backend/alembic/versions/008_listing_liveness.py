@@ -0,0 +1,44 @@
+"""listing liveness
+
+Adds listings.is_active / expired_at / checked_at for the liveness checker
+(app.listing_liveness), and a partial index on undervalue_percent over
+active listings that serves both /deals and the checker's queue. Existing
+rows start active and unchecked.
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "008"
+down_revision: Union[str, None] = "007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "listings",
+        sa.Column("is_active", sa.Boolean(), nullable=False, server_default=sa.text("true")),
+    )
+    op.add_column("listings", sa.Column("expired_at", sa.DateTime(timezone=True), nullable=True))
+    op.add_column("listings", sa.Column("checked_at", sa.DateTime(timezone=True), nullable=True))
+    op.create_index(
+        "ix_listings_active_undervalue",
+        "listings",
+        [sa.text("undervalue_percent DESC")],
+        postgresql_where=sa.text("is_active"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_listings_active_undervalue", "listings")
+    op.drop_column("listings", "checked_at")
+    op.drop_column("listings", "expired_at")
+    op.drop_column("listings", "is_active")
@@ -0,0 +1,47 @@
+"""listing url without post id
+
+Migration 005 dropped the unique URL index, leaving listings without a post
+id (external_id IS NULL) with no index on url at all: the writer's URL
+lookup scanned the table and two concurrent writers could both insert the
+same id-less URL. Drops such duplicates (the oldest is kept) and adds a
+partial unique index on url for them.
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "009"
+down_revision: Union[str, None] = "008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        DELETE FROM listings AS dup
+        USING listings AS kept
+        WHERE dup.external_id IS NULL
+          AND kept.external_id IS NULL
+          AND dup.url = kept.url
+          AND (dup.created_at, dup.id) > (kept.created_at, kept.id)
+        """
+    )
+    op.create_index(
+        "ux_listings_url_without_post_id",
+        "listings",
+        ["url"],
+        unique=True,
+        postgresql_where=sa.text("external_id IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ux_listings_url_without_post_id", "listings")
@@ -1,4 +1,5 @@
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
 
 from .settings import settings
 
@@ -7,7 +8,7 @@ celery_app = Celery(
     "car_deal_finder",
     broker=f"{settings.redis_url}/0",
     backend=f"{settings.redis_url}/1",
-    include=["app.tasks"],
+    include=["app.tasks", "app.scrape_pipeline"],
 )
 
 celery_app.conf.update(
@@ -21,4 +22,49 @@ celery_app.conf.update(
     task_soft_time_limit=90,
     result_expires=3600,
     worker_prefetch_multiplier=1,
+    # One queue per scrape stage (app.scrape_pipeline), each with its own
+    # worker pool: run `celery worker -Q scrape.fetch` etc.
+    task_routes={
+        "scrape.craigslist": {"queue": "scrape.search"},
+        "scrape.schedule": {"queue": "scrape.search"},
+        "scrape.fetch": {"queue": "scrape.fetch"},
+        "scrape.score": {"queue": "scrape.score"},
+        "scrape.persist": {"queue": "scrape.persist"},
+        "scrape.finish": {"queue": "scrape.persist"},
+        "scrape.frontier": {"queue": "scrape.search"},
+        "scrape.liveness": {"queue": "scrape.fetch"},
+    },
 )
+
+# Yield-driven scheduled crawls (app.crawl_scheduler); run `celery beat`.
+celery_app.conf.beat_schedule = {
+    "schedule-crawls": {
+        "task": "scrape.schedule",
+        "schedule": settings.scraper_schedule_interval_s,
+    },
+    # Re-fetch crawl-frontier rows whose worker died (app.crawl_frontier).
+    "drain-frontier": {
+        "task": "scrape.frontier",
+        "schedule": settings.scraper_frontier_lease_s,
+    },
+    # Deactivate listings whose post was deleted (app.listing_liveness).
+    "check-liveness": {
+        "task": "scrape.liveness",
+        "schedule": settings.scraper_liveness_interval_s,
+    },
+}
+
+
+# One pooled scraper HTTP client per worker process (see app.http_client).
+@worker_process_init.connect
+def _open_http_client(**_kwargs) -> None:
+    from .http_client import init_http_client
+
+    init_http_client()
+
+
+@worker_process_shutdown.connect
+def _close_http_client(**_kwargs) -> None:
+    from .http_client import close_http_client
+
+    close_http_client()
@@ -0,0 +1,198 @@
+"""Block detection and a Redis-shared circuit breaker for the scrapers.
+
+When Craigslist starts blocking (403s, captcha interstitials, throttling
+that survives a retry, or results pages that are suddenly empty) every
+request and every Celery retry just burns worker slots. ``classify_block``
+recognises those responses, and ``CircuitBreaker`` trips once
+``settings.scraper_breaker_threshold`` of them land within
+``scraper_breaker_window_s``:
+
+* **closed** — requests flow; block signals are counted per window.
+* **open** — every worker fails fast with ``ScraperBlocked`` (no network)
+  until the cool-down ends.
+* **half-open** — exactly one worker (``SET NX`` probe lock) is let through.
+  Success closes the breaker; another block reopens it with twice the
+  cool-down, capped at ``scraper_breaker_max_cooldown_s``.
+
+State is keyed per *site* (``craigslist.org``), not per city subdomain:
+bans are per client IP across all of them. Redis errors fail open — the
+breaker never blocks scraping on its own.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import re
+import time
+from typing import Callable, Optional
+from urllib.parse import urlsplit
+
+import redis
+
+from .redis_client import get_redis
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+_KEY = "scraper:breaker:{site}:{part}"
+
+# Statuses that mean "you are blocked" outright. 429/503 only count once the
+# Pacer's single retry has also been throttled (see scraper._paced_get).
+BLOCK_STATUSES = frozenset({403})
+
+_CAPTCHA_RE = re.compile(
+    r"g-recaptcha|h-captcha|hcaptcha\.com|/cdn-cgi/challenge-platform|cf-chl-"
+    r"|this ip has been automatically blocked|your ip (?:address )?has been blocked",
+    re.IGNORECASE,
+)
+
+
+class ScraperBlocked(RuntimeError):
+    """The site is blocking us (or the breaker is open): do not retry now."""
+
+    def __init__(self, site: str, reason: str, retry_in: Optional[float] = None) -> None:
+        self.site = site
+        self.reason = reason
+        self.retry_in = retry_in
+        suffix = f"; retry in {retry_in:.0f}s" if retry_in else ""
+        super().__init__(f"{site} is blocking scrapes ({reason}){suffix}")
+
+
+def site_of(url: str) -> str:
+    """Registrable-ish domain: ``austin.craigslist.org`` -> ``craigslist.org``."""
+    host = urlsplit(url).hostname or ""
+    return ".".join(host.split(".")[-2:])
+
+
+def classify_block(status_code: int, text: str) -> Optional[str]:
+    """Why a response looks like a block, or None when it looks normal."""
+    if status_code in BLOCK_STATUSES:
+        return f"HTTP {status_code}"
+    if _CAPTCHA_RE.search(text):
+        return "captcha page"
+    return None
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        client: redis.Redis,
+        *,
+        threshold: int,
+        window: float,
+        cooldown: float,
+        max_cooldown: float,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._redis = client
+        self.threshold = threshold
+        self._window = window
+        self._cooldown = cooldown
+        self._max_cooldown = max_cooldown
+        self._clock = clock
+
+    @classmethod
+    def from_settings(cls) -> "CircuitBreaker":
+        return cls(
+            get_redis(),
+            threshold=settings.scraper_breaker_threshold,
+            window=settings.scraper_breaker_window_s,
+            cooldown=settings.scraper_breaker_cooldown_s,
+            max_cooldown=settings.scraper_breaker_max_cooldown_s,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def _key(self, site: str, part: str) -> str:
+        return _KEY.format(site=site, part=part)
+
+    def _load_open(self, site: str) -> Optional[dict]:
+        raw = self._redis.get(self._key(site, "open"))
+        return json.loads(raw) if raw else None
+
+    def open_for(self, url: str) -> Optional[float]:
+        """Seconds until the breaker for ``url``'s site half-opens (None if not open)."""
+        if not self.enabled:
+            return None
+        try:
+            state = self._load_open(site_of(url))
+        except redis.RedisError:
+            return None
+        if state is None:
+            return None
+        remaining = state["until"] - self._clock()
+        return remaining if remaining > 0 else None
+
+    def before_request(self, url: str) -> None:
+        """Raise ``ScraperBlocked`` unless a request to ``url`` may go out."""
+        if not self.enabled:
+            return
+        site = site_of(url)
+        try:
+            state = self._load_open(site)
+            if state is None:
+                return
+            remaining = state["until"] - self._clock()
+            if remaining > 0:
+                raise ScraperBlocked(site, state["reason"], remaining)
+            # Half-open: one probe at a time, across all workers.
+            probe_ttl = max(30, int(settings.scraper_request_timeout * 2))
+            if self._redis.set(self._key(site, "probe"), "1", nx=True, ex=probe_ttl):
+                logger.info("Circuit for %s half-open: sending a probe", site)
+                return
+        except redis.RedisError as exc:
+            logger.warning("Circuit breaker unavailable, allowing request: %s", exc)
+            return
+        raise ScraperBlocked(site, "probe in flight", probe_ttl)
+
+    def record_success(self, url: str) -> None:
+        if not self.enabled:
+            return
+        site = site_of(url)
+        try:
+            state = self._load_open(site)
+            # Only a half-open probe closes it; stragglers from before the
+            # trip must not.
+            if state is not None and state["until"] <= self._clock():
+                self._redis.delete(
+                    self._key(site, "open"),
+                    self._key(site, "probe"),
+                    self._key(site, "failures"),
+                )
+                logger.info("Circuit for %s closed: probe succeeded", site)
+        except redis.RedisError as exc:
+            logger.warning("Could not update circuit breaker: %s", exc)
+
+    def record_block(self, url: str, reason: str) -> None:
+        """Count one block signal; trip (or re-trip) the breaker if due."""
+        if not self.enabled:
+            return
+        site = site_of(url)
+        try:
+            state = self._load_open(site)
+            if state is not None:
+                if state["until"] <= self._clock():
+                    # The half-open probe was blocked too: back off harder.
+                    self._trip(
+                        site, reason, min(state["cooldown"] * 2, self._max_cooldown)
+                    )
+                return
+            key = self._key(site, "failures")
+            failures = self._redis.incr(key)
+            if failures == 1:
+                self._redis.expire(key, int(self._window))
+            if failures >= self.threshold:
+                self._trip(site, reason, self._cooldown)
+        except redis.RedisError as exc:
+            logger.warning("Could not update circuit breaker: %s", exc)
+
+    def _trip(self, site: str, reason: str, cooldown: float) -> None:
+        state = {"until": self._clock() + cooldown, "cooldown": cooldown, "reason": reason}
+        # Outlive the cool-down so the next failure knows to double it.
+        ttl = int(cooldown + self._max_cooldown)
+        self._redis.set(self._key(site, "open"), json.dumps(state), ex=ttl)
+        self._redis.delete(self._key(site, "probe"), self._key(site, "failures"))
+        logger.warning("Circuit for %s open for %.0fs: %s", site, cooldown, reason)
@@ -0,0 +1,165 @@
+"""Postgres-backed crawl frontier: pending detail fetches, leased to workers.
+
+The staged pipeline's search stage (``app.scrape_pipeline``) no longer hands
+its rows to fetch tasks in the message itself. It ``enqueue``s them into
+``crawl_frontier``, and every ``scrape.fetch`` task ``claim``s the next batch:
+
+    UPDATE crawl_frontier SET attempts = attempts + 1,
+                              leased_until = now() + <lease>
+    WHERE id IN (SELECT id FROM crawl_frontier
+                 WHERE <claimable> ORDER BY priority DESC, id
+                 LIMIT <n> FOR UPDATE SKIP LOCKED)
+    RETURNING id, url, row
+
+``SKIP LOCKED`` lets any number of fetch workers claim concurrently without
+blocking on, or double-claiming, each other's rows. A row is deleted
+(``complete``) only after its listing is committed by ``scrape.persist``. If
+a worker dies, its lease simply runs out and ``scrape.frontier`` (Celery
+beat) hands the orphan to a fresh fetch task; since the frontier lives in
+Postgres rather than in a task's memory, that holds across restarts too.
+Rows that have failed
+``settings.scraper_frontier_max_attempts`` times stay in the table for
+inspection and are never claimed again, until a later search finds the URL
+again: ``enqueue`` then resets the dead row for the new job.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from .listing_record import ListingRecord
+from .models import CrawlFrontierEntry
+
+_table = CrawlFrontierEntry.__table__
+
+
+@dataclass
+class FrontierItem:
+    id: int
+    url: str
+    row: Dict[str, Any]
+
+
+def enqueue(
+    session: Session,
+    rows: Sequence[ListingRecord],
+    job_id: Optional[str],
+    priority: int = 0,
+    *,
+    max_attempts: int,
+) -> int:
+    """Queue search ``rows`` for detail fetching; return how many were queued.
+
+    A URL that is already pending (another job queued it) is left alone. One
+    whose row is dead (``max_attempts`` failures) is handed to this job as if
+    new: attempts, lease and age reset. The caller commits.
+    """
+    if not rows:
+        return 0
+    stmt = pg_insert(_table).values(
+        [
+            {"url": row.url, "job_id": job_id, "row": row.to_dict(), "priority": priority}
+            for row in rows
+        ]
+    )
+    excluded = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["url"],
+        set_={
+            "job_id": excluded.job_id,
+            "row": excluded.row,
+            "priority": excluded.priority,
+            "attempts": 0,
+            "leased_until": None,
+            "created_at": func.now(),
+        },
+        where=_table.c.attempts >= max_attempts,
+    ).returning(_table.c.id)
+    return len(session.execute(stmt).all())
+
+
+def _orphaned(lease: timedelta):
+    # Lease ran out, or queued a whole lease period ago and never claimed.
+    now = func.now()
+    return or_(
+        _table.c.leased_until < now,
+        _table.c.leased_until.is_(None) & (_table.c.created_at < now - lease),
+    )
+
+
+def claim_statement(
+    limit: int,
+    lease_seconds: float,
+    max_attempts: int,
+    job_id: Optional[str] = None,
+):
+    """``UPDATE ... RETURNING`` that leases up to ``limit`` claimable rows.
+
+    With ``job_id`` only that job's rows are considered. Without it, only
+    *orphans*: rows whose lease ran out, or that nobody claimed within one
+    lease period of being queued.
+    """
+    now = func.now()
+    lease = timedelta(seconds=lease_seconds)
+    candidates = (
+        select(_table.c.id)
+        .where(_table.c.attempts < max_attempts)
+        .order_by(_table.c.priority.desc(), _table.c.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    if job_id is not None:
+        candidates = candidates.where(
+            _table.c.job_id == job_id,
+            or_(_table.c.leased_until.is_(None), _table.c.leased_until < now),
+        )
+    else:
+        candidates = candidates.where(_orphaned(lease))
+    return (
+        update(_table)
+        .where(_table.c.id.in_(candidates.scalar_subquery()))
+        .values(attempts=_table.c.attempts + 1, leased_until=now + lease)
+        .returning(_table.c.id, _table.c.url, _table.c.row)
+    )
+
+
+def claim(
+    session: Session,
+    limit: int,
+    *,
+    lease_seconds: float,
+    max_attempts: int,
+    job_id: Optional[str] = None,
+) -> List[FrontierItem]:
+    """Lease the next batch (see ``claim_statement``). The caller commits."""
+    result = session.execute(claim_statement(limit, lease_seconds, max_attempts, job_id))
+    return [FrontierItem(id, url, row) for id, url, row in result]
+
+
+def complete(session: Session, ids: Sequence[int]) -> None:
+    """Drop fetched-and-persisted rows. The caller commits."""
+    if ids:
+        session.execute(delete(_table).where(_table.c.id.in_(list(ids))))
+
+
+def pending_count(session: Session, job_id: str, max_attempts: int) -> int:
+    """Rows queued under ``job_id`` that are still due a fetch attempt."""
+    stmt = select(func.count()).where(
+        _table.c.job_id == job_id, _table.c.attempts < max_attempts
+    )
+    return session.execute(stmt).scalar_one()
+
+
+def orphan_count(session: Session, lease_seconds: float, max_attempts: int) -> int:
+    """Rows ``claim(job_id=None)`` would pick up right now."""
+    stmt = select(func.count()).where(
+        _table.c.attempts < max_attempts,
+        _orphaned(timedelta(seconds=lease_seconds)),
+    )
+    return session.execute(stmt).scalar_one()
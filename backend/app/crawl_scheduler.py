@@ -0,0 +1,205 @@
+"""Yield-driven crawl scheduler, run by Celery beat.
+
+Every (city, query) a user scrapes becomes a *target*. After each sweep the
+task records what it cost (HTTP requests) and what it found (newly inserted
+listings) via ``CrawlScheduler.record``. Both counters decay exponentially
+with ``settings.scraper_schedule_half_life_h``, so a target's score
+
+    (decayed new listings + prior) / (decayed requests + prior weight)
+
+tracks its *recent* yield of fresh listings per request. The prior is
+optimistic: a brand-new target is tried early, and a dead one's evidence
+fades back towards the prior over a few half-lives, so it gets re-probed
+now and then instead of being written off forever.
+
+On every beat tick (``settings.scraper_schedule_interval_s``) ``plan`` pops
+targets off a max-heap by score and hands each a share of the global
+request budget (``scraper_schedule_budget``) proportional to its score,
+capped at ``scraper_schedule_max_requests``, until the budget is spent.
+Targets nobody has asked for within ``scraper_schedule_target_ttl_days`` are
+dropped.
+
+State is one Redis hash in DB 2. ``record`` is a read-modify-write, which is
+fine because one target is only swept by one job at a time in practice; a
+lost update just costs a little scoring accuracy. Redis errors disable
+scheduling for that tick, never a scrape.
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, List, Tuple
+
+import redis
+
+from .redis_client import get_redis
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+TARGETS_KEY = "scraper:schedule:targets"
+
+# Optimistic prior: as if every target had already yielded PRIOR_YIELD new
+# listings per request over PRIOR_REQUESTS requests.
+PRIOR_YIELD = 0.5
+PRIOR_REQUESTS = 4.0
+
+# A sweep costs at least one results page plus one detail page.
+MIN_REQUESTS = 2
+
+
+@dataclass
+class Target:
+    city: str
+    query: str
+    new_listings: float = 0.0
+    requests: float = 0.0
+    updated_at: float = 0.0
+    requested_at: float = 0.0
+
+    def decayed(self, now: float, half_life: float) -> "Target":
+        """Counters as of ``now`` (halved every ``half_life`` seconds)."""
+        factor = 0.5 ** (max(0.0, now - self.updated_at) / half_life) if half_life > 0 else 1.0
+        return Target(
+            self.city,
+            self.query,
+            self.new_listings * factor,
+            self.requests * factor,
+            now,
+            self.requested_at,
+        )
+
+    @property
+    def score(self) -> float:
+        """Expected new listings per request."""
+        return (self.new_listings + PRIOR_YIELD * PRIOR_REQUESTS) / (
+            self.requests + PRIOR_REQUESTS
+        )
+
+
+@dataclass
+class PlannedSweep:
+    city: str
+    query: str
+    max_results: int
+    score: float
+
+
+def _field(city: str, query: str) -> str:
+    return f"{city.strip().lower()}:{' '.join(query.lower().split())}"
+
+
+class CrawlScheduler:
+    def __init__(
+        self,
+        client: redis.Redis,
+        *,
+        budget: int,
+        max_requests: int,
+        half_life: float,
+        target_ttl: float,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._redis = client
+        self.budget = budget
+        self._max_requests = max(MIN_REQUESTS, max_requests)
+        self._half_life = half_life
+        self._target_ttl = target_ttl
+        self._clock = clock
+
+    @classmethod
+    def from_settings(cls) -> "CrawlScheduler":
+        return cls(
+            get_redis(),
+            budget=settings.scraper_schedule_budget,
+            max_requests=settings.scraper_schedule_max_requests,
+            half_life=settings.scraper_schedule_half_life_h * 3600,
+            target_ttl=settings.scraper_schedule_target_ttl_days * 86400,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.budget > 0
+
+    def _load(self, city: str, query: str) -> Target:
+        raw = self._redis.hget(TARGETS_KEY, _field(city, query))
+        if raw:
+            return Target(**json.loads(raw))
+        return Target(city.strip().lower(), " ".join(query.split()), updated_at=self._clock())
+
+    def _save(self, target: Target) -> None:
+        self._redis.hset(
+            TARGETS_KEY, _field(target.city, target.query), json.dumps(asdict(target))
+        )
+
+    def register(self, city: str, query: str) -> None:
+        """Keep (city, query) on the schedule: a user asked for it just now."""
+        if not self.enabled:
+            return
+        try:
+            target = self._load(city, query)
+            target.requested_at = self._clock()
+            self._save(target)
+        except redis.RedisError as exc:
+            logger.warning("Could not register crawl target: %s", exc)
+
+    def record(self, city: str, query: str, new_listings: int, requests: int) -> None:
+        """Fold one finished sweep's cost and yield into the target's score."""
+        if not self.enabled:
+            return
+        try:
+            raw = self._redis.hget(TARGETS_KEY, _field(city, query))
+            if not raw:
+                return  # not a scheduled target (or expired)
+            target = Target(**json.loads(raw)).decayed(self._clock(), self._half_life)
+            target.new_listings += new_listings
+            target.requests += max(1, requests)
+            self._save(target)
+        except redis.RedisError as exc:
+            logger.warning("Could not record crawl yield: %s", exc)
+
+    def targets(self) -> List[Target]:
+        """All live targets, decayed to now; expired ones are deleted."""
+        now = self._clock()
+        live: List[Target] = []
+        expired: List[str] = []
+        for field, raw in self._redis.hgetall(TARGETS_KEY).items():
+            target = Target(**json.loads(raw))
+            if now - target.requested_at > self._target_ttl:
+                expired.append(field)
+            else:
+                live.append(target.decayed(now, self._half_life))
+        if expired:
+            self._redis.hdel(TARGETS_KEY, *expired)
+        return live
+
+    def plan(self) -> List[PlannedSweep]:
+        """Split this tick's request budget across the highest-yield targets."""
+        if not self.enabled:
+            return []
+        try:
+            targets = self.targets()
+        except redis.RedisError as exc:
+            logger.warning("Crawl schedule unavailable, skipping tick: %s", exc)
+            return []
+
+        total_score = sum(target.score for target in targets)
+        heap: List[Tuple[float, str, str]] = [
+            (-target.score, target.city, target.query) for target in targets
+        ]
+        heapq.heapify(heap)
+
+        remaining = self.budget
+        planned: List[PlannedSweep] = []
+        while heap and remaining >= MIN_REQUESTS:
+            neg_score, city, query = heapq.heappop(heap)
+            share = round(self.budget * -neg_score / total_score)
+            grant = min(max(share, MIN_REQUESTS), self._max_requests, remaining)
+            remaining -= grant
+            # One request goes to the results page; the rest to detail pages.
+            planned.append(PlannedSweep(city, query, grant - 1, -neg_score))
+        return planned
@@ -0,0 +1,116 @@
+"""Incremental-crawl watermarks per (city, query).
+
+Craigslist lists results newest first, so once a sweep reaches a results page
+whose posts were *all* handled by an earlier sweep of the same search,
+everything after it is older still and the crawl can stop. A watermark
+records, per (city, query), the most recent Craigslist post ids the search
+has handled (fetched or already stored), newest first and capped at
+``settings.scraper_watermark_ids``. Post ids, not dates: static results rows
+carry no timestamp, so ``covers`` has nothing else to compare.
+
+Recurring sweeps then cost roughly one results page plus the new listings
+instead of the whole result set. Stored as one JSON value in Redis DB 2; a
+missing or unreadable watermark just means a full crawl.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional
+
+import redis
+
+from .listing_ids import craigslist_post_id
+from .redis_client import get_redis
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+_KEY = "scraper:watermark:{city}:{query}"
+
+
+def post_id(url: str) -> Optional[str]:
+    """Craigslist post id from a listing URL, as stored in the watermark."""
+    external_id = craigslist_post_id(url)
+    return str(external_id) if external_id is not None else None
+
+
+@dataclass
+class Watermark:
+    post_ids: List[str] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        self._known = set(self.post_ids)
+
+    def covers(self, urls: List[str]) -> bool:
+        """True when every URL on a results page was handled before."""
+        ids = [post_id(url) for url in urls]
+        return bool(ids) and all(pid is not None and pid in self._known for pid in ids)
+
+    def advanced(self, urls: Iterable[str], limit: int) -> "Watermark":
+        """New watermark with ``urls`` (newest first) ahead of the old ids."""
+        merged: List[str] = []
+        seen = set()
+        fresh = (post_id(url) for url in urls)
+        for pid in [*fresh, *self.post_ids]:
+            if pid is not None and pid not in seen:
+                seen.add(pid)
+                merged.append(pid)
+        return Watermark(merged[:limit])
+
+
+def _key(city: str, query: str) -> str:
+    return _KEY.format(city=city.strip().lower(), query=" ".join(query.lower().split()))
+
+
+class WatermarkStore:
+    def __init__(self, client: redis.Redis, *, max_ids: int, ttl_seconds: int) -> None:
+        self._redis = client
+        self._max_ids = max_ids
+        self._ttl = ttl_seconds
+
+    @classmethod
+    def from_settings(cls) -> "WatermarkStore":
+        return cls(
+            get_redis(),
+            max_ids=settings.scraper_watermark_ids,
+            ttl_seconds=settings.scraper_watermark_ttl_days * 86400,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_ids > 0
+
+    def load(self, city: str, query: str) -> Watermark:
+        """Stored watermark, or an empty one (=> full crawl)."""
+        if not self.enabled:
+            return Watermark()
+        try:
+            raw = self._redis.get(_key(city, query))
+        except redis.RedisError as exc:
+            logger.warning("Crawl watermark unavailable, crawling fully: %s", exc)
+            return Watermark()
+        if not raw:
+            return Watermark()
+        return Watermark(list(json.loads(raw).get("post_ids") or []))
+
+    def advance(
+        self,
+        city: str,
+        query: str,
+        previous: Watermark,
+        urls: Iterable[str],
+    ) -> Watermark:
+        """Fold a finished sweep's handled ``urls`` into the watermark."""
+        mark = previous.advanced(urls, self._max_ids)
+        if not self.enabled:
+            return mark
+        payload = {"post_ids": mark.post_ids}
+        try:
+            self._redis.set(_key(city, query), json.dumps(payload), ex=self._ttl)
+        except redis.RedisError as exc:
+            # Next sweep simply crawls further than it needed to.
+            logger.warning("Could not save crawl watermark: %s", exc)
+        return mark
@@ -0,0 +1,256 @@
+"""Pluggable HTML extraction backends for the Craigslist scraper.
+
+A backend only *locates* the handful of nodes the scraper needs and returns
+their raw strings (``RawSearchRow`` / ``RawDetail``); all field logic (price,
+year, mileage, timestamps, boilerplate stripping) stays in
+``scraper_craigslist`` so every backend yields identical listings.
+
+* ``Bs4Backend`` — the original ``BeautifulSoup(..., "html.parser")`` path.
+  Pure Python, always available, and the fallback for anything lxml rejects.
+* ``LxmlBackend`` — libxml2 tree building plus targeted XPath over only the
+  result rows / attribute groups / posting body, skipping soupsieve and the
+  BeautifulSoup object model entirely. Several times faster per page (see
+  ``benchmarks/parse_throughput.py``).
+
+Selection is ``settings.scraper_html_parser``: ``"auto"`` (lxml when
+importable), ``"lxml"`` or ``"bs4"``.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Callable, Iterator, List, NamedTuple, Optional, Protocol, Tuple
+
+from bs4 import BeautifulSoup
+
+from .settings import settings
+
+try:  # optional fast path
+    import lxml.html
+    from lxml import etree
+except ImportError:  # pragma: no cover - depends on the environment
+    lxml = None  # type: ignore[assignment]
+    etree = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+# CSS selectors (BS4) and their XPath equivalents (lxml). Keep them in sync.
+SEARCH_ROW_CSS = "li.cl-static-search-result"
+NEXT_PAGE_CSS = 'link[rel~="next"][href], a[rel~="next"][href], a.cl-next-page[href]'
+ATTR_CSS = ".attrgroup span, .attr"
+JUNK_CSS = ".print-information, .notices"
+
+# Tags whose text BeautifulSoup's get_text() leaves out.
+_NON_TEXT_TAGS = frozenset({"script", "style", "template"})
+
+
+class RawSearchRow(NamedTuple):
+    href: Optional[str]
+    title_attr: str
+    title_text: str
+    price_text: str
+    location_text: str
+
+
+class RawDetail(NamedTuple):
+    attr_texts: List[str]
+    posted_raw: str
+    description_text: Optional[str]
+
+
+class HtmlBackend(Protocol):
+    name: str
+
+    def search_page(self, html: str) -> Tuple[List[RawSearchRow], Optional[str]]:
+        """Raw result rows plus the (unresolved) next-page href, if any."""
+
+    def detail_page(self, html: str) -> RawDetail:
+        """Raw attribute texts, ``<time datetime>`` value and posting body."""
+
+
+# ── BeautifulSoup ─────────────────────────────────────────────────────────────
+
+
+class Bs4Backend:
+    name = "bs4"
+
+    def search_page(self, html: str) -> Tuple[List[RawSearchRow], Optional[str]]:
+        soup = BeautifulSoup(html, "html.parser")
+        rows = [self.search_row(node) for node in soup.select(SEARCH_ROW_CSS)]
+        link = soup.select_one(NEXT_PAGE_CSS)
+        return rows, (link["href"] if link is not None else None)
+
+    def detail_page(self, html: str) -> RawDetail:
+        soup = BeautifulSoup(html, "html.parser")
+        return RawDetail(
+            self.attr_texts(soup),
+            self.posted_raw(soup),
+            self.description_text(soup),
+        )
+
+    @staticmethod
+    def search_row(node) -> RawSearchRow:
+        anchor = node.find("a", href=True)
+        title_el = node.select_one(".title")
+        price_el = node.select_one(".price")
+        location_el = node.select_one(".location")
+        return RawSearchRow(
+            href=anchor["href"] if anchor is not None else None,
+            title_attr=node.get("title") or "",
+            title_text=title_el.get_text(strip=True) if title_el else "",
+            price_text=price_el.get_text() if price_el else "",
+            location_text=location_el.get_text(strip=True) if location_el else "",
+        )
+
+    @staticmethod
+    def attr_texts(detail: BeautifulSoup) -> List[str]:
+        return [span.get_text(" ", strip=True) for span in detail.select(ATTR_CSS)]
+
+    @staticmethod
+    def posted_raw(detail: BeautifulSoup) -> str:
+        time_el = detail.select_one("time[datetime]")
+        return time_el.get("datetime", "").strip() if time_el is not None else ""
+
+    @staticmethod
+    def description_text(detail: BeautifulSoup) -> Optional[str]:
+        body = detail.select_one("#postingbody")
+        if body is None:
+            return None
+        for junk in body.select(JUNK_CSS):
+            junk.decompose()
+        return body.get_text("\n", strip=True)
+
+
+# ── lxml ──────────────────────────────────────────────────────────────────────
+
+
+def _has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+_X_ROWS = f"//li[{_has_class('cl-static-search-result')}]"
+_X_NEXT = (
+    "//*[(self::link or self::a) and @href and "
+    "contains(concat(' ', normalize-space(@rel), ' '), ' next ')]"
+    f" | //a[@href and {_has_class('cl-next-page')}]"
+)
+_X_ATTRS = f"//*[{_has_class('attrgroup')}]//span | //*[{_has_class('attr')}]"
+_JUNK_CLASSES = ("print-information", "notices")
+
+
+def _strings(el, skip: Optional[Callable] = None) -> Iterator[str]:
+    """Text nodes under ``el`` in document order, like BS4's ``_all_strings``.
+
+    Comments and script/style contents are left out; ``skip``-ped subtrees
+    drop their own text but keep their tail (what ``decompose`` does).
+    """
+    if el.text:
+        yield el.text
+    for child in el:
+        if (
+            isinstance(child.tag, str)
+            and child.tag not in _NON_TEXT_TAGS
+            and not (skip is not None and skip(child))
+        ):
+            yield from _strings(child, skip)
+        if child.tail:
+            yield child.tail
+
+
+def _text(el, sep: str = "", strip: bool = False, skip: Optional[Callable] = None) -> str:
+    pieces = _strings(el, skip)
+    if strip:
+        pieces = (p.strip() for p in pieces)
+        return sep.join(p for p in pieces if p)
+    return sep.join(pieces)
+
+
+def _first_with_class(el, name: str):
+    found = el.xpath(f"(.//*[{_has_class(name)}])[1]")
+    return found[0] if found else None
+
+
+def _is_junk(el) -> bool:
+    classes = (el.get("class") or "").split()
+    return any(name in classes for name in _JUNK_CLASSES)
+
+
+class LxmlBackend:
+    name = "lxml"
+
+    def __init__(self) -> None:
+        self._fallback = Bs4Backend()
+
+    def _document(self, html: str):
+        return lxml.html.document_fromstring(html)
+
+    def search_page(self, html: str) -> Tuple[List[RawSearchRow], Optional[str]]:
+        try:
+            doc = self._document(html)
+        except (etree.ParserError, ValueError) as exc:
+            logger.debug("lxml rejected search page, using bs4: %s", exc)
+            return self._fallback.search_page(html)
+
+        rows = [self._search_row(node) for node in doc.xpath(_X_ROWS)]
+        links = doc.xpath(_X_NEXT)
+        return rows, (links[0].get("href") if links else None)
+
+    def detail_page(self, html: str) -> RawDetail:
+        try:
+            doc = self._document(html)
+        except (etree.ParserError, ValueError) as exc:
+            logger.debug("lxml rejected detail page, using bs4: %s", exc)
+            return self._fallback.detail_page(html)
+
+        attr_texts = [_text(el, " ", strip=True) for el in doc.xpath(_X_ATTRS)]
+
+        times = doc.xpath("//time[@datetime]")
+        posted_raw = times[0].get("datetime", "").strip() if times else ""
+
+        bodies = doc.xpath("//*[@id='postingbody']")
+        description = (
+            _text(bodies[0], "\n", strip=True, skip=_is_junk) if bodies else None
+        )
+        return RawDetail(attr_texts, posted_raw, description)
+
+    @staticmethod
+    def _search_row(node) -> RawSearchRow:
+        anchors = node.xpath(".//a[@href]")
+        title_el = _first_with_class(node, "title")
+        price_el = _first_with_class(node, "price")
+        location_el = _first_with_class(node, "location")
+        return RawSearchRow(
+            href=anchors[0].get("href") if anchors else None,
+            title_attr=node.get("title") or "",
+            title_text=_text(title_el, strip=True) if title_el is not None else "",
+            price_text=_text(price_el) if price_el is not None else "",
+            location_text=(
+                _text(location_el, strip=True) if location_el is not None else ""
+            ),
+        )
+
+
+# ── Selection ─────────────────────────────────────────────────────────────────
+
+
+def lxml_available() -> bool:
+    return lxml is not None
+
+
+def get_backend(name: Optional[str] = None) -> HtmlBackend:
+    """Backend for ``name`` (default ``settings.scraper_html_parser``)."""
+    configured = name or settings.scraper_html_parser
+    choice = configured.lower()
+    if choice == "bs4":
+        return _BS4
+    if choice in ("lxml", "auto") and lxml_available():
+        return _LXML
+    if choice == "lxml":
+        logger.warning("scraper_html_parser=lxml but lxml is not installed; using bs4")
+    elif choice != "auto":
+        raise ValueError(f"Unknown HTML parser backend: {configured!r}")
+    return _BS4
+
+
+_BS4 = Bs4Backend()
+_LXML = LxmlBackend() if lxml_available() else None
@@ -0,0 +1,260 @@
+"""On-disk conditional HTTP cache for the scrapers.
+
+``CachingTransport`` wraps the real ``httpx`` transport. Any 200 GET response
+carrying an ``ETag`` or ``Last-Modified`` validator is stored (zlib-compressed)
+in a SQLite file keyed by URL. The next request for that URL is sent with
+``If-None-Match`` / ``If-Modified-Since``; on a 304 the transport hands back the
+stored body as a normal 200 response marked with
+``response.extensions["cache_revalidated"] = True``.
+
+Callers may also memoize what they *parsed* out of a page
+(``store_parsed`` / ``load_parsed``) so that a revalidated page skips HTML
+parsing entirely. The file is bounded by ``max_bytes`` of stored bodies with
+least-recently-used eviction, and ``stats`` counts hits, misses and the bytes
+and parses saved so a sweep's savings can be logged.
+
+SQLite is used because it is stdlib, safe to share between the detail-fetch
+threads (one connection behind a lock) and between worker processes on the
+same host (file locking).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import httpx
+
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Response headers worth replaying on a revalidated hit. Transfer headers
+# (content-encoding/length) are dropped: the stored body is already decoded.
+_REPLAY_HEADERS = ("content-type", "etag", "last-modified")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    url           TEXT PRIMARY KEY,
+    etag          TEXT,
+    last_modified TEXT,
+    content_type  TEXT,
+    body          BLOB NOT NULL,
+    size          INTEGER NOT NULL,
+    parsed        TEXT,
+    last_access   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_entries_last_access ON entries (last_access);
+"""
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    bytes_saved: int = 0
+    parses_skipped: int = 0
+
+    def snapshot(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+class HttpCache:
+    """Size-bounded, LRU-evicted SQLite store of validated HTTP bodies."""
+
+    def __init__(self, path: Path | str, max_bytes: int) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.path), timeout=30, check_same_thread=False
+        )
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ── HTTP entries ─────────────────────────────────────────────────────────
+
+    def validators(self, url: str) -> Dict[str, str]:
+        """Conditional-request headers for ``url`` (empty when uncached)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return {}
+        headers: Dict[str, str] = {}
+        if row[0]:
+            headers["If-None-Match"] = row[0]
+        if row[1]:
+            headers["If-Modified-Since"] = row[1]
+        return headers
+
+    def load(self, url: str) -> Optional[tuple[bytes, Dict[str, str]]]:
+        """Stored body + replay headers for ``url``; bumps its LRU position."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, last_modified, content_type FROM entries "
+                "WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE entries SET last_access = ? WHERE url = ?",
+                (time.time(), url),
+            )
+            self._conn.commit()
+        body = zlib.decompress(row[0])
+        values = dict(zip(_REPLAY_HEADERS, (row[3], row[1], row[2])))
+        return body, {k: v for k, v in values.items() if v}
+
+    def store(self, url: str, body: bytes, headers: httpx.Headers) -> None:
+        blob = zlib.compress(body)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries "
+                "(url, etag, last_modified, content_type, body, size, parsed, "
+                "last_access) VALUES (?, ?, ?, ?, ?, ?, NULL, ?)",
+                (
+                    url,
+                    headers.get("etag"),
+                    headers.get("last-modified"),
+                    headers.get("content-type"),
+                    blob,
+                    len(blob),
+                    time.time(),
+                ),
+            )
+            self._evict_locked()
+            self._conn.commit()
+        self.stats.stores += 1
+
+    def _evict_locked(self) -> None:
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for url, size in self._conn.execute(
+            "SELECT url, size FROM entries ORDER BY last_access ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM entries WHERE url = ?", (url,))
+            total -= size
+            self.stats.evictions += 1
+
+    # ── Parsed-field memo ────────────────────────────────────────────────────
+
+    def load_parsed(self, url: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT parsed FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return json.loads(row[0])
+
+    def store_parsed(self, url: str, fields: Dict[str, Any]) -> None:
+        """Attach JSON-serialisable ``fields`` to the stored entry for ``url``."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE entries SET parsed = ? WHERE url = ?",
+                (json.dumps(fields, default=str), url),
+            )
+            self._conn.commit()
+
+
+class CachingTransport(httpx.BaseTransport):
+    """``httpx`` transport that revalidates GETs against an ``HttpCache``."""
+
+    def __init__(self, transport: httpx.BaseTransport, cache: HttpCache) -> None:
+        self._transport = transport
+        self._cache = cache
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != "GET":
+            return self._transport.handle_request(request)
+
+        url = str(request.url)
+        for name, value in self._cache.validators(url).items():
+            request.headers.setdefault(name, value)
+
+        response = self._transport.handle_request(request)
+
+        if response.status_code == 304:
+            response.close()
+            cached = self._cache.load(url)
+            if cached is not None:
+                body, headers = cached
+                self._cache.stats.hits += 1
+                self._cache.stats.bytes_saved += len(body)
+                return httpx.Response(
+                    200,
+                    headers=headers,
+                    content=body,
+                    request=request,
+                    extensions={"cache_revalidated": True},
+                )
+            # Evicted between the conditional request and now: refetch plainly.
+            for name in ("If-None-Match", "If-Modified-Since"):
+                request.headers.pop(name, None)
+            response = self._transport.handle_request(request)
+
+        self._cache.stats.misses += 1
+        if response.status_code != 200 or not _is_cacheable(response.headers):
+            return response
+
+        body = response.read()
+        response.close()
+        self._cache.store(url, body, response.headers)
+        headers = {
+            name: response.headers[name]
+            for name in _REPLAY_HEADERS
+            if name in response.headers
+        }
+        return httpx.Response(
+            200, headers=headers, content=body, request=request
+        )
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+def _is_cacheable(headers: httpx.Headers) -> bool:
+    if "no-store" in headers.get("cache-control", "").lower():
+        return False
+    return "etag" in headers or "last-modified" in headers
+
+
+_http_cache: Optional[HttpCache] = None
+_http_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> Optional[HttpCache]:
+    """Process-wide cache, or None when ``settings.scraper_cache_dir`` is blank."""
+    global _http_cache
+    if not settings.scraper_cache_dir:
+        return None
+    with _http_cache_lock:
+        if _http_cache is None:
+            _http_cache = HttpCache(
+                Path(settings.scraper_cache_dir) / "http-cache.sqlite3",
+                max_bytes=settings.scraper_cache_max_mb * 1024 * 1024,
+            )
+            logger.info("Scraper HTTP cache at %s", _http_cache.path)
+        return _http_cache
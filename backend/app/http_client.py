@@ -0,0 +1,170 @@
+"""Long-lived HTTP client shared by every scrape in a worker process.
+
+Opening an ``httpx.Client`` per task threw the connection pool away after
+each job, so back-to-back jobs against the same Craigslist host paid a fresh
+TCP + TLS handshake per connection. One client per process keeps those
+connections alive between tasks:
+
+* created on Celery's ``worker_process_init`` (after the prefork fork, so no
+  sockets are shared between children) and closed on
+  ``worker_process_shutdown`` (see ``celery_app``); callers outside a worker
+  get one lazily from ``get_http_client``,
+* pool size and keep-alive expiry come from ``settings.scraper_pool_*``,
+* HTTP/2 (``settings.scraper_http2``) multiplexes concurrent detail fetches
+  over one connection per host; it needs the optional ``h2`` package and
+  falls back to HTTP/1.1 without it,
+* ``pool_stats`` reports requests served vs. connections opened, so reuse is
+  visible in logs.
+
+``httpx.Client`` is thread-safe, so the detail-fetch threads of a job share
+it as before.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional, Set
+
+import httpx
+
+from .http_cache import CachingTransport, get_http_cache
+from .settings import settings
+
+try:  # optional: HTTP/2 support for httpx
+    import h2  # noqa: F401
+except ImportError:  # pragma: no cover - depends on the environment
+    h2 = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+HEADERS = {
+    "User-Agent": settings.scraper_user_agent,
+    "Accept": (
+        "text/html,application/xhtml+xml,application/xml;q=0.9,"
+        "image/avif,image/webp,*/*;q=0.8"
+    ),
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+
+@dataclass
+class PoolStats:
+    requests: int = 0
+    connections_opened: int = 0
+
+    def snapshot(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+class _PoolObserver:
+    """Counts requests and newly opened connections via a response hook."""
+
+    def __init__(self, transport: httpx.HTTPTransport) -> None:
+        self.stats = PoolStats()
+        self._transport = transport
+        self._seen: Set[int] = set()
+        self._lock = threading.Lock()
+
+    def _connections(self) -> list:
+        # httpcore's pool is the only place connection objects are visible.
+        pool = getattr(self._transport, "_pool", None)
+        return list(getattr(pool, "connections", ()))
+
+    def on_response(self, response: httpx.Response) -> None:
+        with self._lock:
+            self.stats.requests += 1
+            live = {id(conn) for conn in self._connections()}
+            self.stats.connections_opened += len(live - self._seen)
+            # Forget closed connections so a recycled id() counts as new.
+            self._seen = live
+
+    def report(self) -> Dict[str, Any]:
+        connections = self._connections()
+        with self._lock:
+            report: Dict[str, Any] = self.stats.snapshot()
+        report["open"] = len(connections)
+        report["idle"] = sum(1 for conn in connections if conn.is_idle())
+        report["http2"] = sum(
+            1 for conn in connections if "HTTP/2" in conn.info()
+        )
+        requests = report["requests"]
+        report["reuse_ratio"] = (
+            round(1 - report["connections_opened"] / requests, 3) if requests else 0.0
+        )
+        return report
+
+
+_client: Optional[httpx.Client] = None
+_observer: Optional[_PoolObserver] = None
+_lock = threading.Lock()
+
+
+def http2_enabled() -> bool:
+    if not settings.scraper_http2:
+        return False
+    if h2 is None:
+        logger.warning("scraper_http2 is set but h2 is not installed; using HTTP/1.1")
+        return False
+    return True
+
+
+def _build_client() -> httpx.Client:
+    global _observer
+    network = httpx.HTTPTransport(
+        http2=http2_enabled(),
+        limits=httpx.Limits(
+            max_connections=settings.scraper_pool_max_connections,
+            max_keepalive_connections=settings.scraper_pool_max_keepalive,
+            keepalive_expiry=settings.scraper_keepalive_expiry_s,
+        ),
+    )
+    _observer = _PoolObserver(network)
+    cache = get_http_cache()
+    transport: httpx.BaseTransport = (
+        CachingTransport(network, cache) if cache is not None else network
+    )
+    return httpx.Client(
+        headers=HEADERS,
+        timeout=settings.scraper_request_timeout,
+        follow_redirects=True,
+        transport=transport,
+        event_hooks={"response": [_observer.on_response]},
+    )
+
+
+def get_http_client() -> httpx.Client:
+    """Process-wide scraper client (created on first use)."""
+    global _client
+    with _lock:
+        if _client is None:
+            _client = _build_client()
+        return _client
+
+
+def init_http_client() -> None:
+    """Open a fresh client for this process (Celery ``worker_process_init``)."""
+    global _client
+    with _lock:
+        # A client inherited across fork() must not be reused: drop it unclosed.
+        _client = _build_client()
+    logger.info("Scraper HTTP client ready (http2=%s)", http2_enabled())
+
+
+def close_http_client() -> None:
+    """Close the client and its pooled connections (worker shutdown)."""
+    global _client, _observer
+    with _lock:
+        client, _client = _client, None
+        if client is None:
+            return
+        logger.info("Closing scraper HTTP client: %s", pool_stats())
+        _observer = None
+    client.close()
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Counters for the current client: requests, connections opened/open/idle."""
+    observer = _observer
+    return observer.report() if observer is not None else PoolStats().snapshot()
@@ -0,0 +1,45 @@
+"""Canonical identity of a scraped listing.
+
+A Craigslist post keeps its numeric post id across the URL variants that
+reach us — other city subdomains ("nearby areas"), re-slugged titles,
+tracking query strings — so ``(source, external_id)`` is the dedupe key
+everywhere: the ``listings`` unique constraint, the Redis seen-index, batch
+URL claims and crawl watermarks. The URL is kept for display only.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Optional
+from urllib.parse import urlsplit, urlunsplit
+
+CRAIGSLIST = "craigslist"
+
+# .../cto/d/austin-2015-honda-civic/7712345678.html -> 7712345678
+_POST_ID_RE = re.compile(r"/(\d+)\.html?$")
+
+
+def craigslist_post_id(url: str) -> Optional[int]:
+    """Numeric post id from a Craigslist listing URL (None if it has none)."""
+    match = _POST_ID_RE.search(urlsplit(url).path)
+    return int(match.group(1)) if match else None
+
+
+def canonical_url(url: str) -> str:
+    """Lowercase scheme and host, no query string or fragment."""
+    parts = urlsplit(url.strip())
+    return urlunsplit(
+        (parts.scheme.lower(), parts.netloc.lower(), parts.path, "", "")
+    )
+
+
+def row_key(source: str, external_id: Optional[int], url: str) -> str:
+    """``"craigslist:7712345678"``; the canonical URL when there is no post id."""
+    if external_id is None:
+        return canonical_url(url)
+    return f"{source}:{external_id}"
+
+
+def dedupe_key(url: str, source: str = CRAIGSLIST) -> str:
+    """``row_key`` for a freshly scraped URL."""
+    return row_key(source, craigslist_post_id(url), url)
@@ -0,0 +1,188 @@
+"""Periodic liveness checks: retire listings whose Craigslist post is gone.
+
+Sold or deleted posts used to stay in ``listings`` forever and keep ranking
+at the top of ``/deals``. ``scrape.liveness`` (Celery beat, every
+``settings.scraper_liveness_interval_s``) re-checks a batch of active
+listings and marks the dead ones ``is_active = false`` with an
+``expired_at``; ``/deals`` only serves active listings.
+
+* **What gets checked**: active listings not checked within
+  ``scraper_liveness_recheck_h``, best deals first (they are the ones users
+  see), then oldest posts (the likeliest to be gone); ``due_statement``.
+* **How**: one ``HEAD`` per URL, so no body is transferred. Hosts that
+  refuse ``HEAD`` get a ``GET``, which the conditional HTTP cache
+  (``app.http_cache``) turns into a 304 when the page is unchanged. 404/410
+  means gone, 2xx means alive; anything else (throttled, 5xx, network error)
+  is left for the next tick.
+* **Politeness**: requests go through the scraper's ``Pacer``, so the shared
+  per-host rate limit, Retry-After and the circuit breaker apply exactly as
+  for scrapes. The batch is interleaved by host so the
+  ``scraper_liveness_concurrency`` threads spread over many cities instead of
+  queueing on one host's slots, and probes stop once
+  ``scraper_liveness_time_budget_s`` is spent.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Callable, Deque, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import httpx
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.orm import Session
+
+from .circuit_breaker import BLOCK_STATUSES, ScraperBlocked, site_of
+from .http_client import get_http_client
+from .models import Listing
+from .politeness import Pacer, TimeBudgetExhausted, build_pacer, host_of
+from .scraper_craigslist import DETAIL_DELAY_RANGE
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Craigslist answers a removed (deleted, expired, flagged) post with these.
+GONE_STATUSES = frozenset({404, 410})
+
+# "HEAD not allowed": ask again with a (conditional) GET.
+_HEAD_REFUSED = frozenset({405, 501})
+
+ALIVE = "alive"
+GONE = "gone"
+UNKNOWN = "unknown"
+
+_table = Listing.__table__
+
+
+@dataclass
+class LivenessReport:
+    alive: List[UUID] = field(default_factory=list)
+    gone: List[UUID] = field(default_factory=list)
+    unknown: List[UUID] = field(default_factory=list)
+
+    def add(self, listing_id: UUID, verdict: str) -> None:
+        getattr(self, verdict).append(listing_id)
+
+    def counts(self) -> Dict[str, int]:
+        return {ALIVE: len(self.alive), GONE: len(self.gone), UNKNOWN: len(self.unknown)}
+
+
+def due_statement(limit: int, recheck_after: timedelta):
+    """Active listings due for a check, in the order they should be checked."""
+    return (
+        select(_table.c.id, _table.c.url)
+        .where(
+            _table.c.is_active.is_(True),
+            or_(
+                _table.c.checked_at.is_(None),
+                _table.c.checked_at < func.now() - recheck_after,
+            ),
+        )
+        .order_by(_table.c.undervalue_percent.desc(), _table.c.posted_at)
+        .limit(limit)
+    )
+
+
+def interleave_by_host(rows: Sequence[Tuple[UUID, str]]) -> List[Tuple[UUID, str]]:
+    """Round-robin ``rows`` across hosts, keeping each host's own order."""
+    by_host: "OrderedDict[str, Deque[Tuple[UUID, str]]]" = OrderedDict()
+    for row in rows:
+        by_host.setdefault(host_of(row[1]), deque()).append(row)
+    out: List[Tuple[UUID, str]] = []
+    while by_host:
+        for host in list(by_host):
+            queue = by_host[host]
+            out.append(queue.popleft())
+            if not queue:
+                del by_host[host]
+    return out
+
+
+def _paced(client: httpx.Client, pacer: Pacer, method: str, url: str) -> httpx.Response:
+    with pacer.request(url) as outcome:
+        resp = client.request(method, url)
+        outcome.observe(resp)
+    return resp
+
+
+def probe(client: httpx.Client, pacer: Pacer, url: str) -> str:
+    """``ALIVE``, ``GONE`` or ``UNKNOWN`` for one listing URL.
+
+    Raises ``ScraperBlocked`` on a block page or while the breaker is open.
+    """
+    breaker = pacer.breaker
+    if breaker is not None:
+        breaker.before_request(url)
+    resp = _paced(client, pacer, "HEAD", url)
+    if resp.status_code in _HEAD_REFUSED:
+        resp = _paced(client, pacer, "GET", url)
+
+    status = resp.status_code
+    if status in BLOCK_STATUSES:
+        reason = f"HTTP {status}"
+        if breaker is not None:
+            breaker.record_block(url, reason)
+        raise ScraperBlocked(site_of(url), reason)
+    if breaker is not None and status < 500:
+        breaker.record_success(url)
+    if status in GONE_STATUSES:
+        return GONE
+    if 200 <= status < 300:
+        return ALIVE
+    return UNKNOWN
+
+
+def check_listings(
+    rows: Sequence[Tuple[UUID, str]],
+    *,
+    concurrency: Optional[int] = None,
+    time_budget: Optional[float] = None,
+    client: Optional[httpx.Client] = None,
+    clock: Callable[[], float] = time.monotonic,
+) -> LivenessReport:
+    """Probe ``(id, url)`` rows concurrently; rows not reached stay unknown."""
+    workers = max(1, concurrency or settings.scraper_liveness_concurrency)
+    budget = settings.scraper_liveness_time_budget_s if time_budget is None else time_budget
+    deadline = clock() + budget
+    pacer = build_pacer(DETAIL_DELAY_RANGE, workers, time_budget=budget)
+    client = client or get_http_client()
+
+    def check(url: str) -> str:
+        if clock() >= deadline:
+            return UNKNOWN
+        try:
+            return probe(client, pacer, url)
+        except ScraperBlocked as exc:
+            logger.warning("Liveness check of %s skipped: %s", url, exc)
+        except TimeBudgetExhausted:
+            pass  # the budget ran out while waiting for this host's slot
+        except httpx.HTTPError as exc:
+            logger.info("Liveness check of %s failed: %s", url, exc)
+        return UNKNOWN
+
+    rows = interleave_by_host(rows)
+    report = LivenessReport()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cl-liveness") as pool:
+        for (listing_id, _url), verdict in zip(rows, pool.map(check, [url for _, url in rows])):
+            report.add(listing_id, verdict)
+    return report
+
+
+def record(session: Session, report: LivenessReport) -> None:
+    """Stamp checked listings and retire the gone ones. The caller commits."""
+    now = func.now()
+    if report.gone:
+        session.execute(
+            update(_table)
+            .where(_table.c.id.in_(report.gone))
+            .values(is_active=False, expired_at=now, checked_at=now)
+        )
+    if report.alive:
+        session.execute(
+            update(_table).where(_table.c.id.in_(report.alive)).values(checked_at=now)
+        )
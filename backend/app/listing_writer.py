@@ -0,0 +1,378 @@
+"""Micro-batched persistence for listings streamed out of the scraper.
+
+``scrape_craigslist_task`` consumes ``iter_craigslist_cars`` and hands each
+listing to a ``MicroBatcher``; every ``settings.scraper_persist_batch_size``
+listings (or ``settings.scraper_persist_flush_s`` seconds, whichever comes
+first) the batch is written by ``persist_listings`` and committed. A crash at
+listing 95 of 100 therefore keeps the first 90, and new deals reach ``/deals``
+seconds after they were scraped instead of at the end of the job.
+
+A batch is written with one statement, not a SELECT + ``session.add`` per
+listing::
+
+    INSERT INTO listings (...) VALUES (...), (...)
+    ON CONFLICT ON CONSTRAINT uq_listings_source_external_id DO UPDATE
+        SET <scraped fields> = <new value>, is_active = true
+        WHERE <any scraped field> IS DISTINCT FROM <new value>
+    RETURNING (xmax = 0)
+
+where the new value is ``excluded.<field>``, except that a detail field a
+failed detail fetch left empty (description, mileage, VIN, attributes)
+keeps the stored one and ``posted_at`` never moves later, so a degraded
+re-scrape neither wipes a good row nor counts as an update.
+
+Because a key conflict becomes an update, two workers writing the same post
+no longer fail each other's commit: whoever comes second updates (or leaves
+alone) the row the first inserted.
+``RETURNING`` yields one row per insert (``xmax = 0``) or real update, and
+nothing for an unchanged listing, which gives exact inserted / updated /
+skipped counts. Rows are sorted by key so concurrent batches take row locks
+in the same order and cannot deadlock. Batches of
+``settings.scraper_persist_copy_threshold`` listings or more are ``COPY``ed
+into a temporary staging table first and upserted with ``INSERT ... SELECT``.
+
+Before that, a car re-posted under another post id (same VIN) is collapsed
+onto the listing stored first for that VIN (one ``ix_listings_vin`` lookup
+per batch). Listings without a post id cannot conflict on the key; they are
+matched on URL instead (one lookup per batch on the partial unique index
+``ux_listings_url_without_post_id``) and only inserted if new, with
+``ON CONFLICT DO NOTHING`` on that index so a concurrent writer's copy is
+skipped rather than duplicated.
+
+Items are ``ListingRecord``s, already validated, so no field is re-checked
+here.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Generic, List, Optional, Sequence, Set, Tuple, TypeVar
+
+from sqlalchemy import case, column, func, literal_column, or_, select, table, text, true
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from .listing_record import ListingRecord
+from .models import Listing
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_table = Listing.__table__
+
+# Columns written for every listing, in COPY order.
+_COLUMNS = (
+    "id",
+    "source",
+    "external_id",
+    "url",
+    "title",
+    "description",
+    "listed_price",
+    "predicted_price",
+    "undervalue_percent",
+    "year",
+    "make",
+    "model",
+    "mileage",
+    "attributes",
+    "vin",
+    "location",
+    "created_at",
+    "posted_at",
+)
+
+# What a re-scrape refreshes on an existing listing (id/created_at are kept).
+_REFRESHED = tuple(
+    name for name in _COLUMNS if name not in ("id", "source", "external_id", "created_at")
+)
+
+# A change in any of these counts as an update; derived/positional columns
+# (url slug, predicted price, ...) follow along but do not trigger one.
+_COMPARED = ("title", "description", "listed_price", "mileage", "attributes", "vin", "location")
+
+# Detail-page fields a failed detail fetch leaves empty (NULL / {}): an empty
+# value keeps what is stored instead of wiping it.
+_KEPT_IF_MISSING = ("description", "mileage", "vin")
+
+_STAGE = "listings_stage"
+
+
+@dataclass
+class BatchOutcome:
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0
+    # URLs now stored (new or pre-existing), for SeenIndex.mark.
+    persisted_urls: List[str] = field(default_factory=list)
+
+
+def listing_row(item: ListingRecord, now: datetime) -> Dict[str, Any]:
+    """Column values for one new listing (``_COLUMNS``)."""
+    if item.predicted_price is None:
+        item.score()
+    return {
+        "id": uuid.uuid4(),
+        "source": item.source,
+        "external_id": item.external_id,
+        "url": item.url,
+        "title": item.title,
+        "description": item.description,
+        "listed_price": item.listed_price,
+        "predicted_price": item.predicted_price,
+        "undervalue_percent": item.undervalue_percent,
+        "year": item.year or 0,
+        "make": item.make,
+        "model": item.model,
+        "mileage": item.mileage,
+        "attributes": item.attributes,
+        "vin": item.vin,
+        "location": item.location,
+        "created_at": now,
+        "posted_at": item.posted_at,
+    }
+
+
+def _refreshed_values(excluded) -> Dict[str, Any]:
+    """What a re-scrape writes per column, never worse than what is stored."""
+    values: Dict[str, Any] = {name: excluded[name] for name in _REFRESHED}
+    for name in _KEPT_IF_MISSING:
+        values[name] = func.coalesce(excluded[name], _table.c[name])
+    values["attributes"] = case(
+        (excluded.attributes == text("'{}'::jsonb"), _table.c.attributes),
+        else_=excluded.attributes,
+    )
+    # A failed detail fetch stamps posted_at with the scrape time, which is
+    # always later than the real one: the earliest value is the real one.
+    values["posted_at"] = func.least(excluded.posted_at, _table.c.posted_at)
+    return values
+
+
+def _on_conflict(stmt):
+    values = _refreshed_values(stmt.excluded)
+    changed = or_(
+        _table.c.is_active.is_distinct_from(true()),
+        *(_table.c[name].is_distinct_from(values[name]) for name in _COMPARED),
+    )
+    return stmt.on_conflict_do_update(
+        constraint="uq_listings_source_external_id",
+        set_={
+            **values,
+            # Seen on the site again: it is not sold after all.
+            "is_active": true(),
+            "expired_at": None,
+        },
+        where=changed,
+    ).returning(literal_column("(xmax = 0)").label("inserted"))
+
+
+def upsert_statement(rows: Sequence[Dict[str, Any]]):
+    """Multi-row ``INSERT ... ON CONFLICT DO UPDATE ... RETURNING (xmax = 0)``."""
+    return _on_conflict(pg_insert(_table).values(list(rows)))
+
+
+def insert_unkeyed_statement(rows: Sequence[Dict[str, Any]]):
+    """Insert listings without a post id, skipping URLs stored meanwhile."""
+    return (
+        pg_insert(_table)
+        .values(list(rows))
+        .on_conflict_do_nothing(
+            index_elements=["url"], index_where=_table.c.external_id.is_(None)
+        )
+        .returning(literal_column("true").label("inserted"))
+    )
+
+
+def staged_upsert_statement():
+    """``upsert_statement`` reading from the COPY staging table instead."""
+    stage = table(_STAGE, *(column(name) for name in _COLUMNS))
+    rows = select(*(stage.c[name] for name in _COLUMNS)).order_by(
+        stage.c.source, stage.c.external_id
+    )
+    return _on_conflict(pg_insert(_table).from_select(list(_COLUMNS), rows))
+
+
+def persist_listings(
+    session: Session,
+    items: List[ListingRecord],
+    *,
+    copy_threshold: Optional[int] = None,
+) -> BatchOutcome:
+    """Upsert ``items`` in one statement, plus one for id-less ones (the caller commits)."""
+    outcome = BatchOutcome(persisted_urls=[item.url for item in items])
+    now = datetime.now(timezone.utc)
+
+    keyed: Dict[Tuple[str, int], ListingRecord] = {}
+    unkeyed: List[ListingRecord] = []
+    for item in items:
+        if item.external_id is None:
+            unkeyed.append(item)
+        elif (item.source, item.external_id) in keyed:
+            outcome.skipped += 1  # the same post twice in one batch
+        else:
+            keyed[(item.source, item.external_id)] = item
+
+    new = [listing_row(item, now) for item in _new_by_url(session, unkeyed, outcome)]
+    if new:
+        new.sort(key=lambda row: row["url"])
+        inserted = len(session.execute(insert_unkeyed_statement(new)).scalars().all())
+        outcome.inserted += inserted
+        outcome.skipped += len(new) - inserted
+
+    rows = [listing_row(item, now) for item in _collapse_vins(session, keyed, outcome)]
+    if not rows:
+        return outcome
+    # One lock order for every writer: no deadlocks between overlapping batches.
+    rows.sort(key=lambda row: (row["source"], row["external_id"]))
+
+    threshold = settings.scraper_persist_copy_threshold if copy_threshold is None else copy_threshold
+    if threshold and len(rows) >= threshold:
+        _copy_to_stage(session, rows)
+        flags = session.execute(staged_upsert_statement()).scalars().all()
+    else:
+        flags = session.execute(upsert_statement(rows)).scalars().all()
+
+    outcome.inserted += sum(1 for inserted in flags if inserted)
+    outcome.updated += sum(1 for inserted in flags if not inserted)
+    outcome.skipped += len(rows) - len(flags)
+    return outcome
+
+
+def _collapse_vins(
+    session: Session,
+    keyed: Dict[Tuple[str, int], ListingRecord],
+    outcome: BatchOutcome,
+) -> List[ListingRecord]:
+    """Drop listings whose VIN is already stored (or queued) under another post."""
+    vins = {item.vin for item in keyed.values() if item.vin}
+    owners: Dict[str, Set[Tuple[str, int]]] = {}
+    if vins:
+        stmt = select(Listing.vin, Listing.source, Listing.external_id).where(
+            Listing.vin.in_(vins)
+        )
+        for vin, source, external_id in session.execute(stmt):
+            owners.setdefault(vin, set()).add((source, external_id))
+
+    kept: List[ListingRecord] = []
+    for key, item in keyed.items():
+        if item.vin:
+            holders = owners.setdefault(item.vin, {key})
+            if key not in holders:
+                logger.info(
+                    "Collapsed %s onto the listing already stored for VIN %s", item.url, item.vin
+                )
+                outcome.skipped += 1
+                continue
+        kept.append(item)
+    return kept
+
+
+def _new_by_url(
+    session: Session, items: List[ListingRecord], outcome: BatchOutcome
+) -> List[ListingRecord]:
+    """Listings without a post id that are not stored yet (matched on URL)."""
+    if not items:
+        return []
+    urls = {item.url for item in items}
+    stored = set(
+        session.execute(
+            select(Listing.url).where(Listing.external_id.is_(None), Listing.url.in_(urls))
+        ).scalars()
+    )
+    new: List[ListingRecord] = []
+    for item in items:
+        if item.url in stored:
+            outcome.skipped += 1
+            continue
+        stored.add(item.url)
+        new.append(item)
+    return new
+
+
+def _csv_value(value: Any) -> str:
+    # COPY ... (FORMAT csv): an unquoted empty field is NULL, so every
+    # non-NULL text value is quoted (and "" stays an empty string).
+    if value is None:
+        return ""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return repr(value)
+    if isinstance(value, dict):
+        value = json.dumps(value)
+    elif isinstance(value, datetime):
+        value = value.isoformat()
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def _copy_to_stage(session: Session, rows: Sequence[Dict[str, Any]]) -> None:
+    """``COPY`` ``rows`` into a per-transaction staging table (psycopg2 only)."""
+    session.execute(
+        text(
+            f"CREATE TEMP TABLE IF NOT EXISTS {_STAGE} "
+            "(LIKE listings INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+        )
+    )
+    session.execute(text(f"TRUNCATE {_STAGE}"))
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(",".join(_csv_value(row[name]) for name in _COLUMNS))
+        buffer.write("\n")
+    buffer.seek(0)
+    cursor = session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {_STAGE} ({', '.join(_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+    finally:
+        cursor.close()
+
+
+class MicroBatcher(Generic[T]):
+    """Buffer items and hand them to ``flush`` by count or by age.
+
+    The age check runs when an item arrives, so a batch is never older than
+    ``interval`` seconds plus one item's fetch time.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[List[T]], None],
+        *,
+        size: int,
+        interval: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._flush = flush
+        self._size = max(1, size)
+        self._interval = interval
+        self._clock = clock
+        self._items: List[T] = []
+        self._started = 0.0
+
+    def add(self, item: T) -> None:
+        if not self._items:
+            self._started = self._clock()
+        self._items.append(item)
+        if (
+            len(self._items) >= self._size
+            or self._clock() - self._started >= self._interval
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        """Hand the buffer to ``flush``; if that raises, the items stay buffered."""
+        if not self._items:
+            return
+        items, self._items = self._items, []
+        try:
+            self._flush(items)
+        except BaseException:  # incl. SoftTimeLimitExceeded mid-write
+            self._items = items
+            raise
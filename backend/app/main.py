@@ -1,12 +1,13 @@
 from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import Any, List, Optional
-from uuid import UUID
+from uuid import UUID, uuid4
 
+from celery import group
 from celery.result import AsyncResult
 from fastapi import FastAPI, HTTPException, Depends, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
@@ -16,12 +17,17 @@ from starlette.middleware.sessions import SessionMiddleware
 
 from .auth import get_current_user, router as auth_router
 from .celery_app import celery_app
+from .circuit_breaker import CircuitBreaker
 from .cookies import require_csrf
+from .crawl_scheduler import CrawlScheduler
 from .db import engine, get_db
 from .donations import router as donations_router
 from .limiter import limiter
 from .models import Listing, User
 from .oauth import router as oauth_router
+from .scrape_batches import load_manifest, normalise_targets, rollup, save_manifest
+from .scrape_checkpoints import CheckpointStore
+from .scrape_coalescing import join_or_claim, release
 from .settings import settings
 from .tasks import scrape_craigslist_task
 
@@ -89,11 +95,16 @@ class Deal(BaseModel):
     make: str
     model: str
     mileage: Optional[int] = None
+    attributes: dict[str, str] = {}
+    vin: Optional[str] = None
     location: str
 
     created_at: datetime
     posted_at: datetime
 
+    is_active: bool = True
+    expired_at: Optional[datetime] = None
+
 
 class ScrapeJobAccepted(BaseModel):
     job_id: str
@@ -101,6 +112,8 @@ class ScrapeJobAccepted(BaseModel):
     city: str
     query: str
     max_results: int
+    # True when an identical in-flight (or just finished) job was reused.
+    coalesced: bool = False
 
 
 class ScrapeJobStatus(BaseModel):
@@ -111,6 +124,29 @@ class ScrapeJobStatus(BaseModel):
     error: Optional[str] = None
 
 
+class ScrapeBatchIn(BaseModel):
+    cities: List[str] = Field(min_length=1)
+    queries: List[str] = Field(min_length=1)
+    max_results: int = 10
+
+
+class ScrapeBatchAccepted(BaseModel):
+    batch_id: str
+    status: str = "queued"
+    jobs: List[dict[str, str]]
+    max_results: int
+
+
+class ScrapeBatchStatus(BaseModel):
+    batch_id: str
+    state: str
+    total: int
+    completed: int
+    failed: int
+    totals: dict[str, int]
+    jobs: List[dict[str, Any]]
+
+
 # ── Endpoints ─────────────────────────────────────────────────────────────────
 
 @app.get("/health", tags=["meta"])
@@ -126,9 +162,35 @@ async def list_deals(
     make: Optional[str] = None,
     model: Optional[str] = None,
     location: Optional[str] = None,
+    condition: Optional[str] = None,
+    title_status: Optional[str] = None,
+    transmission: Optional[str] = None,
+    drive: Optional[str] = None,
+    fuel: Optional[str] = None,
+    cylinders: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
 ):
-    stmt = select(Listing).where(Listing.undervalue_percent >= min_undervalue_percent)
+    stmt = select(Listing).where(
+        Listing.is_active.is_(True),
+        Listing.undervalue_percent >= min_undervalue_percent,
+    )
+
+    # Detail-page attributes, matched exactly (stored lowercased). One
+    # `attributes @> {...}` containment is served by the GIN index.
+    wanted = {
+        key: " ".join(value.split()).lower()
+        for key, value in (
+            ("condition", condition),
+            ("title_status", title_status),
+            ("transmission", transmission),
+            ("drive", drive),
+            ("fuel", fuel),
+            ("cylinders", cylinders),
+        )
+        if value and value.strip()
+    }
+    if wanted:
+        stmt = stmt.where(Listing.attributes.contains(wanted))
 
     if make:
         stmt = stmt.where(Listing.make.ilike(make))
@@ -152,6 +214,17 @@ async def get_deal(deal_id: UUID, db: AsyncSession = Depends(get_db)):
     return listing
 
 
+def _reject_while_blocked() -> None:
+    """503 instead of queueing jobs that would only fail fast on the breaker."""
+    retry_in = CircuitBreaker.from_settings().open_for("https://craigslist.org/")
+    if retry_in is not None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Craigslist is currently blocking scrapes; try again later",
+            headers={"Retry-After": str(int(retry_in) + 1)},
+        )
+
+
 @app.post(
     "/scrape/craigslist",
     response_model=ScrapeJobAccepted,
@@ -164,20 +237,121 @@ async def enqueue_craigslist_scrape(
     city: str,
     query: str,
     max_results: int = 10,
+    continuation: Optional[str] = None,
     user: User = Depends(get_current_user),
     _csrf: None = Depends(require_csrf),
 ):
-    async_result = scrape_craigslist_task.delay(
-        city=city, query=query, max_results=max_results
-    )
+    if continuation:
+        # Resume a job that hit its time limit (its result's "continuation").
+        checkpoint = CheckpointStore.from_settings().load(continuation)
+        if checkpoint is None or not checkpoint.matches(city, query):
+            raise HTTPException(
+                status_code=404, detail="Unknown or expired continuation token"
+            )
+    _reject_while_blocked()
+    CrawlScheduler.from_settings().register(city, query)
+
+    job_id = str(uuid4())
+    if not continuation:
+        existing = join_or_claim(city, query, max_results, job_id)
+        if existing is not None:
+            return ScrapeJobAccepted(
+                job_id=existing,
+                city=city,
+                query=query,
+                max_results=max_results,
+                coalesced=True,
+            )
+    try:
+        scrape_craigslist_task.apply_async(
+            kwargs={
+                "city": city,
+                "query": query,
+                "max_results": max_results,
+                "continuation": continuation,
+            },
+            task_id=job_id,
+        )
+    except Exception:
+        release(city, query, max_results, job_id)
+        raise
     return ScrapeJobAccepted(
-        job_id=async_result.id,
+        job_id=job_id,
         city=city,
         query=query,
         max_results=max_results,
     )
 
 
+@app.post(
+    "/scrape/craigslist/batch",
+    response_model=ScrapeBatchAccepted,
+    status_code=status.HTTP_202_ACCEPTED,
+    tags=["scraper"],
+)
+@limiter.limit("2/minute")
+async def enqueue_craigslist_scrape_batch(
+    request: Request,
+    body: ScrapeBatchIn,
+    user: User = Depends(get_current_user),
+    _csrf: None = Depends(require_csrf),
+):
+    targets = normalise_targets(body.cities, body.queries)
+    if not targets:
+        raise HTTPException(status_code=422, detail="No cities/queries given")
+    if len(targets) > settings.scrape_batch_max_jobs:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Batch expands to {len(targets)} jobs; the limit is "
+            f"{settings.scrape_batch_max_jobs}",
+        )
+    _reject_while_blocked()
+    scheduler = CrawlScheduler.from_settings()
+    for city, query in targets:
+        scheduler.register(city, query)
+
+    batch_id = str(uuid4())
+    group_result = group(
+        scrape_craigslist_task.s(
+            city=city,
+            query=query,
+            max_results=body.max_results,
+            batch_id=batch_id,
+        )
+        for city, query in targets
+    ).apply_async()
+
+    jobs = [
+        {"job_id": child.id, "city": city, "query": query}
+        for child, (city, query) in zip(group_result.children, targets)
+    ]
+    save_manifest(batch_id, jobs, body.max_results)
+
+    return ScrapeBatchAccepted(
+        batch_id=batch_id, jobs=jobs, max_results=body.max_results
+    )
+
+
+@app.get(
+    "/scrape/batches/{batch_id}",
+    response_model=ScrapeBatchStatus,
+    tags=["scraper"],
+)
+@limiter.limit("120/minute")
+async def get_scrape_batch(
+    request: Request,
+    batch_id: str,
+    user: User = Depends(get_current_user),
+):
+    manifest = load_manifest(batch_id)
+    if manifest is None:
+        raise HTTPException(status_code=404, detail="Batch not found or expired")
+
+    results = [AsyncResult(job["job_id"], app=celery_app) for job in manifest["jobs"]]
+    summary = rollup(manifest["jobs"], [(r.state, r.info) for r in results])
+    return ScrapeBatchStatus(batch_id=batch_id, **summary)
+
+
 @app.get(
     "/scrape/jobs/{job_id}",
     response_model=ScrapeJobStatus,
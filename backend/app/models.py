@@ -1,5 +1,5 @@
-from sqlalchemy import Column, String, Integer, Float, DateTime, Text, Boolean, UniqueConstraint
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import BigInteger, Column, String, Integer, Float, DateTime, Text, Boolean, Index, UniqueConstraint, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from datetime import datetime, timezone
 import uuid
 
@@ -12,7 +12,10 @@ class Listing(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
 
     source = Column(String, nullable=False)
-    url = Column(String, nullable=False, unique=True)
+    # Dedupe key is (source, external_id) — the Craigslist post id — not the
+    # URL, which varies by subdomain, slug and query string (app.listing_ids).
+    external_id = Column(BigInteger, nullable=True)
+    url = Column(String, nullable=False)
 
     title = Column(String, nullable=False)
     description = Column(Text, nullable=True)
@@ -25,12 +28,79 @@ class Listing(Base):
     make = Column(String, nullable=False)
     model = Column(String, nullable=False)
     mileage = Column(Integer, nullable=True)
+    # Full detail-page attribute group, e.g. {"condition": "excellent",
+    # "title_status": "clean", "drive": "4wd"}; lowercased string values.
+    attributes = Column(JSONB, nullable=False, default=dict, server_default=text("'{}'::jsonb"))
+    # Check-digit-validated VIN from the attributes/description (app.vin).
+    # Indexed: ingest collapses re-posts of one car onto the first listing.
+    vin = Column(String(17), nullable=True, index=True)
 
     location = Column(String, nullable=False)
 
     created_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
     posted_at = Column(DateTime(timezone=True), nullable=False)
 
+    # Liveness (app.listing_liveness): a post found deleted/sold is kept but
+    # deactivated; /deals only serves active listings.
+    is_active = Column(Boolean, nullable=False, default=True, server_default=text("true"))
+    expired_at = Column(DateTime(timezone=True), nullable=True)
+    checked_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("source", "external_id", name="uq_listings_source_external_id"),
+        # jsonb_path_ops: smaller index that serves the `attributes @> {...}`
+        # containment filters on /deals.
+        Index(
+            "ix_listings_attributes",
+            "attributes",
+            postgresql_using="gin",
+            postgresql_ops={"attributes": "jsonb_path_ops"},
+        ),
+        # /deals and the liveness queue both walk active listings by deal score.
+        Index(
+            "ix_listings_active_undervalue",
+            text("undervalue_percent DESC"),
+            postgresql_where=text("is_active"),
+        ),
+        # Listings without a post id are deduped on URL (app.listing_writer).
+        Index(
+            "ux_listings_url_without_post_id",
+            "url",
+            unique=True,
+            postgresql_where=text("external_id IS NULL"),
+        ),
+    )
+
+
+class CrawlFrontierEntry(Base):
+    """A search-result row waiting for its detail fetch (app.crawl_frontier)."""
+
+    __tablename__ = "crawl_frontier"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    # Canonical listing URL; a post is pending at most once.
+    url = Column(String, nullable=False)
+    # Scrape job that queued it (NULL once handed to the orphan drain).
+    job_id = Column(String, nullable=True, index=True)
+    # The search-page row (title, price, make/model, ...) the fetch enriches.
+    row = Column(JSONB, nullable=False)
+    priority = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    attempts = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    # Claimed until then by whichever worker leased it; NULL = never claimed.
+    leased_until = Column(DateTime(timezone=True), nullable=True)
+
+    created_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc),
+        server_default=text("now()"),
+    )
+
+    __table_args__ = (
+        UniqueConstraint("url", name="uq_crawl_frontier_url"),
+        Index("ix_crawl_frontier_claim_order", text("priority DESC"), "id"),
+    )
+
 
 class User(Base):
     __tablename__ = "users"
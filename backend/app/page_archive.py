@@ -0,0 +1,210 @@
+"""Append-only archive of every raw page the scrapers fetch.
+
+Improving a parser used to mean re-crawling (hours of polite requests) before
+old rows picked up the fix. Instead, every successfully fetched search and
+detail page is appended here, and ``python -m app.reparse`` re-runs the
+current parsers over the archive and updates ``listings`` offline.
+
+Layout (under ``settings.scraper_archive_dir``):
+
+* ``pages-<pid>-<n>.warc.gz`` — WARC/1.1-style ``resource`` records, each its
+  own gzip member, so a record is readable on its own given its offset and
+  length. Every process appends only to its own segment (no interleaved
+  writes between Celery children), rolling over at
+  ``settings.scraper_archive_segment_mb``.
+* ``index.sqlite3`` — one row per record: URL, page kind, fetch time,
+  segment, offset, length and SHA-1 payload digest. A page whose digest
+  matches the URL's latest record is not stored again.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
+from uuid import uuid4
+
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+SEARCH_PAGE = "search"
+DETAIL_PAGE = "detail"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    url         TEXT NOT NULL,
+    kind        TEXT NOT NULL,
+    fetched_at  REAL NOT NULL,
+    segment     TEXT NOT NULL,
+    offset      INTEGER NOT NULL,
+    length      INTEGER NOT NULL,
+    digest      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_records_url ON records (url, id);
+"""
+
+
+@dataclass(frozen=True)
+class ArchivedPage:
+    url: str
+    kind: str
+    fetched_at: float
+    segment: str
+    offset: int
+    length: int
+
+
+def _warc_record(url: str, kind: str, body: bytes, fetched_at: float, digest: str) -> bytes:
+    date = datetime.fromtimestamp(fetched_at, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    header = (
+        "WARC/1.1\r\n"
+        "WARC-Type: resource\r\n"
+        f"WARC-Record-ID: <urn:uuid:{uuid4()}>\r\n"
+        f"WARC-Target-URI: {url}\r\n"
+        f"WARC-Date: {date}\r\n"
+        f"WARC-Payload-Digest: sha1:{digest}\r\n"
+        f"X-Page-Kind: {kind}\r\n"
+        "Content-Type: text/html\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "\r\n"
+    ).encode("utf-8")
+    return gzip.compress(header + body + b"\r\n\r\n")
+
+
+def _record_payload(record: bytes) -> bytes:
+    head, _, rest = record.partition(b"\r\n\r\n")
+    for line in head.split(b"\r\n"):
+        name, _, value = line.partition(b":")
+        if name.strip().lower() == b"content-length":
+            return rest[: int(value)]
+    return rest[: -len(b"\r\n\r\n")]
+
+
+class PageArchive:
+    """Thread-safe writer/reader for one archive directory."""
+
+    def __init__(self, directory: Path | str, *, segment_max_bytes: int) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_max_bytes = segment_max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.directory / "index.sqlite3"), timeout=30, check_same_thread=False
+        )
+        self._conn.executescript(_SCHEMA)
+        self._pid = 0
+        self._segment: Optional[BinaryIO] = None
+        self._segment_name = ""
+        self._segment_no = 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
+            self._conn.close()
+
+    # ── Writing ──────────────────────────────────────────────────────────────
+
+    def append(
+        self, url: str, kind: str, body: bytes, *, fetched_at: Optional[float] = None
+    ) -> bool:
+        """Archive ``body``; False when it equals the URL's latest record."""
+        digest = hashlib.sha1(body).hexdigest()
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        with self._lock:
+            latest = self._conn.execute(
+                "SELECT digest FROM records WHERE url = ? ORDER BY id DESC LIMIT 1",
+                (url,),
+            ).fetchone()
+            if latest is not None and latest[0] == digest:
+                return False
+
+            record = _warc_record(url, kind, body, fetched_at, digest)
+            segment = self._writable_segment(len(record))
+            offset = segment.tell()
+            segment.write(record)
+            segment.flush()
+            self._conn.execute(
+                "INSERT INTO records (url, kind, fetched_at, segment, offset, length, digest) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, kind, fetched_at, self._segment_name, offset, len(record), digest),
+            )
+            self._conn.commit()
+        return True
+
+    def _writable_segment(self, incoming: int) -> BinaryIO:
+        pid = os.getpid()
+        if self._segment is not None and self._pid == pid:
+            if self._segment.tell() + incoming <= self.segment_max_bytes:
+                return self._segment
+            self._segment.close()
+            self._segment_no += 1
+        elif self._pid != pid:
+            # New process (e.g. a forked Celery child): never share a file.
+            self._pid, self._segment_no = pid, 0
+        while True:
+            name = f"pages-{pid}-{self._segment_no:05d}.warc.gz"
+            path = self.directory / name
+            if not path.exists() or path.stat().st_size + incoming <= self.segment_max_bytes:
+                break
+            self._segment_no += 1
+        self._segment = open(path, "ab")
+        self._segment_name = name
+        return self._segment
+
+    # ── Reading ──────────────────────────────────────────────────────────────
+
+    def latest(self, kind: Optional[str] = None) -> Iterator[ArchivedPage]:
+        """Newest record per URL (optionally of one ``kind``), oldest first."""
+        sql = (
+            "SELECT url, kind, fetched_at, segment, offset, length FROM records "
+            "WHERE id IN (SELECT MAX(id) FROM records GROUP BY url)"
+        )
+        params: tuple = ()
+        if kind is not None:
+            sql += " AND kind = ?"
+            params = (kind,)
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY fetched_at, id", params).fetchall()
+        for row in rows:
+            yield ArchivedPage(*row)
+
+    def read(self, page: ArchivedPage) -> bytes:
+        return read_page(self.directory, page)
+
+
+def read_page(directory: Path | str, page: ArchivedPage) -> bytes:
+    """Payload of one archived record (safe to call from any process)."""
+    with open(Path(directory) / page.segment, "rb") as fh:
+        fh.seek(page.offset)
+        return _record_payload(gzip.decompress(fh.read(page.length)))
+
+
+_page_archive: Optional[PageArchive] = None
+_page_archive_lock = threading.Lock()
+
+
+def get_page_archive() -> Optional[PageArchive]:
+    """Process-wide archive, or None when ``settings.scraper_archive_dir`` is blank."""
+    global _page_archive
+    if not settings.scraper_archive_dir:
+        return None
+    with _page_archive_lock:
+        if _page_archive is None:
+            _page_archive = PageArchive(
+                settings.scraper_archive_dir,
+                segment_max_bytes=settings.scraper_archive_segment_mb * 1024 * 1024,
+            )
+            logger.info("Scraper page archive at %s", _page_archive.directory)
+        return _page_archive
@@ -0,0 +1,366 @@
+"""Per-host request pacing for the scrapers.
+
+Three cooperating pieces, combined by ``Pacer``:
+
+* A **rate limiter** hands out start slots per host. ``RedisTokenBucket`` is
+  the production one: a GCRA token bucket in Redis shared by every scraper
+  worker, so adding workers cannot push a host past
+  ``settings.scraper_host_rate``. ``HostScheduler`` is the in-process
+  equivalent (random gap from the politeness window) used when Redis is
+  unavailable or disabled.
+* **Retry-After**: a 429/503 pushes the host's next slot past the advertised
+  delay for *all* workers (``penalize``). A slot further away than the
+  task's remaining time budget is left unclaimed and ``TimeBudgetExhausted``
+  raised instead of sleeping into Celery's soft time limit; the task stops
+  the way it does at that limit (partial result + continuation).
+* ``AdaptiveConcurrency`` (AIMD) caps in-flight requests per process: +1 per
+  window of fast clean responses, halved on errors/throttling.
+
+Only the thread that owns a slot sleeps, and only until its slot.
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Iterator, Optional, Protocol, Tuple
+from urllib.parse import urlsplit
+
+import redis
+from celery.exceptions import SoftTimeLimitExceeded
+
+from .celery_app import celery_app
+from .circuit_breaker import CircuitBreaker
+from .redis_client import get_redis
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Responses that mean "slow down" (and may carry Retry-After).
+THROTTLE_STATUSES = frozenset({429, 503})
+
+
+class TimeBudgetExhausted(SoftTimeLimitExceeded):
+    """The next request slot for a host starts after the task's time budget.
+
+    A ``SoftTimeLimitExceeded``, so tasks wind down exactly as at the soft
+    time limit; it is not a sign of the site blocking us.
+    """
+
+
+def host_of(url: str) -> str:
+    """Lowercased network location of ``url`` ('' when it has none)."""
+    return urlsplit(url).netloc.lower()
+
+
+def parse_retry_after(value: Optional[str], *, now: Optional[datetime] = None) -> Optional[float]:
+    """Seconds to wait from a ``Retry-After`` header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - (now or datetime.now(timezone.utc))).total_seconds())
+
+
+class RateLimiter(Protocol):
+    def reserve(self, host: str, max_wait: Optional[float] = None) -> float:
+        """Claim the next start slot for ``host``; return seconds until it.
+
+        A slot more than ``max_wait`` seconds away is not claimed (the wait
+        is still returned), so it stays free for other workers.
+        """
+
+    def penalize(self, host: str, seconds: float) -> None:
+        """Make no slot for ``host`` start within the next ``seconds``."""
+
+
+class HostScheduler:
+    """Thread-safe start-time scheduler keyed by host.
+
+    ``reserve`` is the non-blocking core (unit-tested with a fake clock);
+    ``wait`` reserves and then sleeps the calling thread until its slot.
+    """
+
+    def __init__(
+        self,
+        delay_range: Tuple[float, float],
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._delay_range = delay_range
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._next_free: Dict[str, float] = {}
+
+    def reserve(self, host: str, max_wait: Optional[float] = None) -> float:
+        """Claim the next start slot for ``host``; return seconds until it."""
+        with self._lock:
+            now = self._clock()
+            slot = max(now, self._next_free.get(host, now))
+            if max_wait is None or slot - now <= max_wait:
+                self._next_free[host] = slot + random.uniform(*self._delay_range)
+            return slot - now
+
+    def penalize(self, host: str, seconds: float) -> None:
+        with self._lock:
+            until = self._clock() + seconds
+            self._next_free[host] = max(self._next_free.get(host, until), until)
+
+    def wait(self, url: str) -> None:
+        delay = self.reserve(host_of(url))
+        if delay > 0:
+            time.sleep(delay)
+
+
+# GCRA: KEYS[1] holds the host's theoretical arrival time (TAT). Uses the Redis
+# server clock so workers on different machines agree. Floats are returned as
+# strings because Lua numbers are truncated to integers in replies.
+_RESERVE_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local interval = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or '0')
+if tat < now then tat = now end
+local wait = tat - now - tolerance
+if wait < 0 then wait = 0 end
+local max_wait = tonumber(ARGV[4])
+if max_wait >= 0 and wait > max_wait then
+  return string.format('%.6f', wait)
+end
+redis.call('SET', KEYS[1], string.format('%.6f', tat + interval), 'EX', ARGV[3])
+return string.format('%.6f', wait)
+"""
+
+_PENALIZE_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local until_ts = now + tonumber(ARGV[1])
+local tat = tonumber(redis.call('GET', KEYS[1]) or '0')
+if tat < until_ts then
+  redis.call('SET', KEYS[1], string.format('%.6f', until_ts), 'EX', ARGV[2])
+end
+return 1
+"""
+
+
+class RedisTokenBucket:
+    """Per-host token bucket shared by all workers (GCRA in one Lua call).
+
+    ``rate`` is requests/second per host and ``burst`` how many may start
+    back-to-back. On any Redis error the reservation is served by the local
+    ``fallback`` limiter instead, so a Redis outage slows nothing down beyond
+    the local politeness window.
+    """
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        rate: float,
+        burst: int,
+        fallback: RateLimiter,
+        *,
+        key_prefix: str = "scraper:rate:",
+    ) -> None:
+        self._interval = 1.0 / rate
+        self._tolerance = max(0, burst - 1) * self._interval
+        self._fallback = fallback
+        self._prefix = key_prefix
+        self._reserve = client.register_script(_RESERVE_LUA)
+        self._penalize = client.register_script(_PENALIZE_LUA)
+
+    def _ttl(self, extra: float = 0.0) -> int:
+        return int(max(60.0, extra + 60.0))
+
+    def reserve(self, host: str, max_wait: Optional[float] = None) -> float:
+        try:
+            return float(
+                self._reserve(
+                    keys=[self._prefix + host],
+                    args=[
+                        self._interval,
+                        self._tolerance,
+                        self._ttl(),
+                        -1 if max_wait is None else max_wait,
+                    ],
+                )
+            )
+        except redis.RedisError as exc:
+            logger.warning("Shared rate limiter unavailable, pacing locally: %s", exc)
+            return self._fallback.reserve(host, max_wait)
+
+    def penalize(self, host: str, seconds: float) -> None:
+        self._fallback.penalize(host, seconds)
+        try:
+            self._penalize(
+                keys=[self._prefix + host], args=[seconds, self._ttl(seconds)]
+            )
+        except redis.RedisError as exc:
+            logger.warning("Could not share Retry-After for %s: %s", host, exc)
+
+
+class AdaptiveConcurrency:
+    """AIMD cap on in-flight requests within one process.
+
+    Every fast, clean response adds ``1/limit`` (≈ +1 per full window); an
+    error or throttle response halves the limit. Slow successes hold it.
+    """
+
+    def __init__(
+        self,
+        *,
+        minimum: int = 1,
+        maximum: int,
+        initial: Optional[float] = None,
+        slow_after: float = 2.0,
+    ) -> None:
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(initial if initial is not None else self.minimum)
+        self.slow_after = slow_after
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, *, ok: bool, latency: float) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            if not ok:
+                self.limit = max(float(self.minimum), self.limit / 2)
+            elif latency < self.slow_after:
+                self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+class RequestOutcome:
+    """What ``Pacer.request`` learns about the response it guarded."""
+
+    def __init__(self) -> None:
+        self.status: Optional[int] = None
+        self.retry_after: Optional[float] = None
+
+    def observe(self, response) -> None:
+        self.status = response.status_code
+        if self.status in THROTTLE_STATUSES:
+            self.retry_after = parse_retry_after(response.headers.get("retry-after"))
+
+    @property
+    def throttled(self) -> bool:
+        return self.status in THROTTLE_STATUSES
+
+
+class Pacer:
+    """Rate limiter + Retry-After + optional AIMD, around one request.
+
+    ``breaker`` rides along for the scraper to consult (see
+    ``app.circuit_breaker``); the pacer itself never trips it.
+
+    ``deadline`` (on ``clock``) is when the calling task runs out of time:
+    once it has passed, or when the next slot starts after it, the request
+    raises ``TimeBudgetExhausted`` without claiming a slot, rather than
+    sleeping until the task is killed mid-request.
+    """
+
+    def __init__(
+        self,
+        limiter: RateLimiter,
+        concurrency: Optional[AdaptiveConcurrency] = None,
+        *,
+        breaker: Optional[CircuitBreaker] = None,
+        default_backoff: float = 30.0,
+        max_backoff: float = 300.0,
+        deadline: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.limiter = limiter
+        self.concurrency = concurrency
+        self.breaker = breaker
+        self.deadline = deadline
+        self._default_backoff = default_backoff
+        self._max_backoff = max_backoff
+        self._clock = clock
+
+    @contextmanager
+    def request(self, url: str) -> Iterator[RequestOutcome]:
+        host = host_of(url)
+        outcome = RequestOutcome()
+        if self.concurrency is not None:
+            self.concurrency.acquire()
+        ok = False
+        started = self._clock()
+        try:
+            budget = None if self.deadline is None else self.deadline - started
+            if budget is not None and budget <= 0:
+                raise TimeBudgetExhausted(f"time budget spent before requesting {url}")
+            delay = self.limiter.reserve(host, budget)
+            if budget is not None and delay > budget:
+                raise TimeBudgetExhausted(
+                    f"next {host} slot is {delay:.0f}s away, {budget:.0f}s of budget left"
+                )
+            if delay > 0:
+                time.sleep(delay)
+            started = self._clock()
+            yield outcome
+            ok = not outcome.throttled and (outcome.status or 200) < 500
+        finally:
+            if outcome.throttled:
+                backoff = outcome.retry_after
+                if backoff is None:
+                    backoff = self._default_backoff
+                self.limiter.penalize(host, min(backoff, self._max_backoff))
+            if self.concurrency is not None:
+                self.concurrency.release(ok=ok, latency=self._clock() - started)
+
+
+def build_pacer(
+    delay_range: Tuple[float, float],
+    max_concurrency: int,
+    time_budget: Optional[float] = None,
+) -> Pacer:
+    """Pacer for one scrape job, configured from ``settings``.
+
+    ``time_budget`` is how long the job may keep pacing requests; by default
+    the Celery soft time limit less one request timeout, so the last request
+    still completes before the limit fires.
+    """
+    if time_budget is None:
+        time_budget = celery_app.conf.task_soft_time_limit - settings.scraper_request_timeout
+    limiter: RateLimiter = HostScheduler(delay_range)
+    if settings.scraper_rate_limit_backend == "redis":
+        limiter = RedisTokenBucket(
+            get_redis(),
+            rate=settings.scraper_host_rate,
+            burst=settings.scraper_host_burst,
+            fallback=limiter,
+        )
+    concurrency = None
+    if max_concurrency > 1:
+        concurrency = AdaptiveConcurrency(
+            maximum=max_concurrency,
+            initial=min(2, max_concurrency),
+            slow_after=settings.scraper_slow_response_s,
+        )
+    return Pacer(
+        limiter,
+        concurrency,
+        breaker=CircuitBreaker.from_settings(),
+        max_backoff=settings.scraper_retry_after_max_s,
+        deadline=time.monotonic() + time_budget,
+    )
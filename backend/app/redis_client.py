@@ -0,0 +1,31 @@
+"""Shared synchronous Redis connection for scraper-side state.
+
+Celery already owns Redis DB 0 (broker) and DB 1 (results); scraper state
+(seen-URL index, rate limits, checkpoints, ...) lives in DB 2 so it can be
+inspected or flushed independently.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Optional
+
+import redis
+
+from .settings import settings
+
+_client: Optional[redis.Redis] = None
+_lock = threading.Lock()
+
+
+def get_redis() -> redis.Redis:
+    """Process-wide client (thread-safe; redis-py pools connections)."""
+    global _client
+    with _lock:
+        if _client is None:
+            _client = redis.Redis.from_url(
+                f"{settings.redis_url}/2",
+                decode_responses=True,
+                socket_timeout=5,
+            )
+        return _client
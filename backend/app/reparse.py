@@ -0,0 +1,165 @@
+"""Re-run the current parsers over the raw-page archive and update listings.
+
+    cd backend
+    python -m app.reparse                 # all archived pages, all CPUs
+    python -m app.reparse --workers 4 --dry-run
+
+Only the newest archived copy of each URL is parsed. Search pages refresh
+the title-derived fields (``year``, ``make``, ``model``); detail pages
+refresh ``mileage``, ``attributes``, ``description``, ``vin`` and
+``posted_at`` (the latter only when the page actually carries a timestamp).
+Parsing runs in a process pool — HTML parsing is CPU-bound — and the
+updates are applied to ``listings`` in bulk
+``UPDATE ... WHERE (source, external_id) = ...`` batches. Nothing is fetched
+from the network.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+from urllib.parse import urlsplit
+
+from sqlalchemy import bindparam, select
+
+from .listing_ids import CRAIGSLIST, craigslist_post_id
+from .page_archive import DETAIL_PAGE, SEARCH_PAGE, ArchivedPage, PageArchive, read_page
+from .scraper_craigslist import _parse_detail_strict, _parse_search_results
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+# url -> {column: value}
+FieldUpdates = Dict[str, Dict[str, Any]]
+
+_UPDATE_CHUNK = 1000
+
+
+def _city_of(url: str) -> str:
+    # https://austin.craigslist.org/... -> "austin" (location fallback only).
+    return urlsplit(url).netloc.split(".", 1)[0]
+
+
+def reparse_page(kind: str, url: str, html: str) -> FieldUpdates:
+    """Listing fields the current parsers derive from one archived page."""
+    if kind == SEARCH_PAGE:
+        return {
+            row.url: {"year": row.year or 0, "make": row.make, "model": row.model}
+            for row in _parse_search_results(html, _city_of(url))
+        }
+    if kind == DETAIL_PAGE:
+        fields = _parse_detail_strict(html)
+        if fields["posted_at"] is None:
+            del fields["posted_at"]
+        return {url: fields}
+    return {}
+
+
+def _reparse_archived(job: Tuple[str, ArchivedPage]) -> FieldUpdates:
+    directory, page = job
+    html = read_page(directory, page).decode("utf-8", errors="replace")
+    try:
+        return reparse_page(page.kind, page.url, html)
+    except Exception as exc:  # noqa: BLE001 - one bad page must not stop the run
+        logger.warning("Could not re-parse %s: %s", page.url, exc)
+        return {}
+
+
+def merge_updates(results: Iterable[FieldUpdates]) -> FieldUpdates:
+    """Fold per-page results, in archive order, into one update per URL."""
+    merged: FieldUpdates = {}
+    for result in results:
+        for url, fields in result.items():
+            merged.setdefault(url, {}).update(fields)
+    return merged
+
+
+def reparse_archive(archive: PageArchive, workers: int) -> FieldUpdates:
+    pages = list(archive.latest())
+    logger.info("Re-parsing %d archived pages with %d workers", len(pages), workers)
+    jobs = [(str(archive.directory), page) for page in pages]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # map() keeps archive order, so newer pages win in merge_updates.
+        results = pool.map(_reparse_archived, jobs, chunksize=32)
+        return merge_updates(results)
+
+
+def apply_updates(updates: FieldUpdates) -> int:
+    """Bulk-apply ``updates`` to listings that exist; return rows updated."""
+    from .db import SyncSessionLocal
+    from .models import Listing
+
+    table = Listing.__table__
+    # Keyed by post id: archived URL variants of one post update one row.
+    by_id: Dict[int, Dict[str, Any]] = {}
+    for url, fields in updates.items():
+        external_id = craigslist_post_id(url)
+        if external_id is not None and fields:
+            by_id.setdefault(external_id, {}).update(fields)
+    ids = list(by_id)
+    updated = 0
+    with SyncSessionLocal() as session:
+        for start in range(0, len(ids), _UPDATE_CHUNK):
+            chunk = ids[start : start + _UPDATE_CHUNK]
+            stored = set(
+                session.execute(
+                    select(Listing.external_id).where(
+                        Listing.source == CRAIGSLIST, Listing.external_id.in_(chunk)
+                    )
+                ).scalars()
+            )
+            # executemany needs one column set per statement.
+            groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+            for external_id in chunk:
+                if external_id not in stored:
+                    continue
+                fields = by_id[external_id]
+                columns = tuple(sorted(fields))
+                groups.setdefault(columns, []).append(
+                    {"b_id": external_id, **{f"b_{c}": fields[c] for c in columns}}
+                )
+            for columns, params in groups.items():
+                stmt = (
+                    table.update()
+                    .where(table.c.source == CRAIGSLIST)
+                    .where(table.c.external_id == bindparam("b_id"))
+                    .values({c: bindparam(f"b_{c}") for c in columns})
+                )
+                session.connection().execute(stmt, params)
+                updated += len(params)
+            session.commit()
+    return updated
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--archive-dir", default=settings.scraper_archive_dir)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--dry-run", action="store_true", help="parse only, no DB writes")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+
+    if not args.archive_dir or not Path(args.archive_dir).is_dir():
+        parser.error("no archive: set SCRAPER_ARCHIVE_DIR or pass --archive-dir")
+
+    archive = PageArchive(
+        args.archive_dir,
+        segment_max_bytes=settings.scraper_archive_segment_mb * 1024 * 1024,
+    )
+    try:
+        updates = reparse_archive(archive, max(1, args.workers))
+    finally:
+        archive.close()
+
+    if args.dry_run:
+        print(f"{len(updates)} URLs re-parsed (dry run, database untouched)")
+        return
+    print(f"{apply_updates(updates)} listings updated from {len(updates)} re-parsed URLs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Multi-city scrape batches: manifest, cross-city URL claims and roll-up.
+
+``POST /scrape/craigslist/batch`` fans one ``scrape.craigslist`` task per
+(city, query) out as a Celery ``group`` and records a manifest under one
+batch id. Craigslist's "nearby areas" results make neighbouring cities return
+the same posts, so every job in a batch *claims* the URLs it is about to
+fetch (``claim_urls``); URLs already claimed by a sibling job are skipped
+before their detail fetch. ``rollup`` folds the per-job Celery states into
+one batch status.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from .celery_app import celery_app
+from .listing_ids import dedupe_key
+from .redis_client import get_redis
+
+_MANIFEST_KEY = "scrape:batch:{batch_id}"
+_CLAIMS_KEY = "scrape:batch:{batch_id}:claims"
+
+_TOTAL_FIELDS = ("fetched", "inserted", "updated", "skipped", "pre_filtered", "batch_duplicates")
+
+
+def _ttl() -> int:
+    # Keep batch bookkeeping exactly as long as the task results it points at.
+    return int(celery_app.conf.result_expires or 3600)
+
+
+def normalise_targets(
+    cities: Sequence[str], queries: Sequence[str]
+) -> List[Tuple[str, str]]:
+    """Distinct (city, query) pairs, order-preserving, blanks dropped."""
+    seen_cities = dict.fromkeys(c.strip().lower() for c in cities if c.strip())
+    seen_queries = dict.fromkeys(" ".join(q.split()) for q in queries if q.strip())
+    return [(c, q) for c in seen_cities for q in seen_queries]
+
+
+def save_manifest(batch_id: str, jobs: List[Dict[str, str]], max_results: int) -> None:
+    get_redis().set(
+        _MANIFEST_KEY.format(batch_id=batch_id),
+        json.dumps({"jobs": jobs, "max_results": max_results}),
+        ex=_ttl(),
+    )
+
+
+def load_manifest(batch_id: str) -> Optional[Dict[str, Any]]:
+    raw = get_redis().get(_MANIFEST_KEY.format(batch_id=batch_id))
+    return json.loads(raw) if raw else None
+
+
+def claim_urls(batch_id: str, job_id: str, urls: List[str]) -> Set[str]:
+    """Claim ``urls`` for ``job_id``; return those owned by a sibling job.
+
+    Claims are per post (``dedupe_key``), so a sibling city's URL variant of
+    the same post counts as taken. They are first-writer-wins (``HSETNX``) and
+    remember their owner, so a retried job still gets back the URLs it claimed
+    on an earlier attempt.
+    """
+    if not urls:
+        return set()
+    key = _CLAIMS_KEY.format(batch_id=batch_id)
+    members = [dedupe_key(url) for url in urls]
+    client = get_redis()
+    with client.pipeline() as pipe:
+        for member in members:
+            pipe.hsetnx(key, member, job_id)
+        pipe.expire(key, _ttl())
+        pipe.execute()
+    owners = client.hmget(key, members)
+    return {url for url, owner in zip(urls, owners) if owner != job_id}
+
+
+def rollup(
+    jobs: List[Dict[str, str]], states: List[Tuple[str, Any]]
+) -> Dict[str, Any]:
+    """Aggregate per-job ``(state, info)`` pairs into one batch status.
+
+    ``info`` is the task's PROGRESS meta, its result dict on SUCCESS, or the
+    exception on FAILURE.
+    """
+    totals = dict.fromkeys(_TOTAL_FIELDS, 0)
+    per_job: List[Dict[str, Any]] = []
+    done = failed = 0
+
+    for job, (state, info) in zip(jobs, states):
+        entry: Dict[str, Any] = {**job, "state": state}
+        if state == "SUCCESS" and isinstance(info, dict):
+            done += 1
+            entry["result"] = info
+            for field in _TOTAL_FIELDS:
+                totals[field] += int(info.get(field) or 0)
+        elif state in ("FAILURE", "REVOKED"):
+            failed += 1
+            entry["error"] = str(info) if info else "Task failed"
+        elif state == "PROGRESS" and isinstance(info, dict):
+            entry["progress"] = info
+        per_job.append(entry)
+
+    if done + failed < len(jobs):
+        started = any(s != "PENDING" for s, _ in states)
+        state = "PROGRESS" if started else "PENDING"
+    elif failed == 0:
+        state = "SUCCESS"
+    elif done == 0:
+        state = "FAILURE"
+    else:
+        state = "PARTIAL"
+
+    return {
+        "state": state,
+        "total": len(jobs),
+        "completed": done,
+        "failed": failed,
+        "totals": totals,
+        "jobs": per_job,
+    }
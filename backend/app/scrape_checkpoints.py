@@ -0,0 +1,119 @@
+"""Per-job checkpoints so retried or interrupted scrapes resume, not restart.
+
+``scrape_craigslist_task`` checkpoints after every committed micro-batch:
+the URLs it has handled (persisted *or* skipped) go into a Redis set and its
+running counters into a small JSON value, both under the job's *token*.
+
+* Celery autoretries keep the task id, which is the token, so a retry skips
+  every URL already done and keeps counting from where the failed attempt
+  stopped.
+* When the soft time limit fires, the task flushes what it has, checkpoints,
+  and returns its partial counters with ``partial: true`` and
+  ``continuation: <token>``. Passing that token back
+  (``POST /scrape/craigslist?continuation=...``) starts a new job that
+  resumes the same checkpoint.
+
+A job that finishes clears its checkpoint. Checkpoints expire after
+``settings.scraper_checkpoint_ttl_h`` (0 disables them). Redis errors only
+cost the resume; the scrape itself carries on.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional, Set
+
+import redis
+
+from .redis_client import get_redis
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+_STATE_KEY = "scrape:checkpoint:{token}"
+_DONE_KEY = "scrape:checkpoint:{token}:done"
+
+
+@dataclass
+class Checkpoint:
+    city: str
+    query: str
+    max_results: int
+    counters: Dict[str, int] = field(default_factory=dict)
+    done: Set[str] = field(default_factory=set)
+
+    def matches(self, city: str, query: str) -> bool:
+        return (city.strip().lower(), " ".join(query.lower().split())) == (
+            self.city.strip().lower(),
+            " ".join(self.query.lower().split()),
+        )
+
+
+class CheckpointStore:
+    def __init__(self, client: redis.Redis, *, ttl_seconds: int) -> None:
+        self._redis = client
+        self._ttl = ttl_seconds
+
+    @classmethod
+    def from_settings(cls) -> "CheckpointStore":
+        return cls(get_redis(), ttl_seconds=settings.scraper_checkpoint_ttl_h * 3600)
+
+    @property
+    def enabled(self) -> bool:
+        return self._ttl > 0
+
+    def load(self, token: str) -> Optional[Checkpoint]:
+        if not self.enabled:
+            return None
+        try:
+            raw = self._redis.get(_STATE_KEY.format(token=token))
+            if not raw:
+                return None
+            done = self._redis.smembers(_DONE_KEY.format(token=token))
+        except redis.RedisError as exc:
+            logger.warning("Scrape checkpoint unavailable, starting over: %s", exc)
+            return None
+        state = json.loads(raw)
+        return Checkpoint(
+            state["city"],
+            state["query"],
+            state["max_results"],
+            state.get("counters") or {},
+            set(done),
+        )
+
+    def save(self, token: str, checkpoint: Checkpoint, done_urls: Iterable[str]) -> None:
+        """Persist ``checkpoint``'s counters and add ``done_urls`` to its set."""
+        if not self.enabled:
+            return
+        done_urls = list(done_urls)
+        checkpoint.done.update(done_urls)
+        state = {
+            "city": checkpoint.city,
+            "query": checkpoint.query,
+            "max_results": checkpoint.max_results,
+            "counters": checkpoint.counters,
+        }
+        state_key = _STATE_KEY.format(token=token)
+        done_key = _DONE_KEY.format(token=token)
+        try:
+            with self._redis.pipeline() as pipe:
+                pipe.set(state_key, json.dumps(state), ex=self._ttl)
+                if done_urls:
+                    pipe.sadd(done_key, *done_urls)
+                pipe.expire(done_key, self._ttl)
+                pipe.execute()
+        except redis.RedisError as exc:
+            logger.warning("Could not save scrape checkpoint: %s", exc)
+
+    def clear(self, token: str) -> None:
+        if not self.enabled:
+            return
+        try:
+            self._redis.delete(
+                _STATE_KEY.format(token=token), _DONE_KEY.format(token=token)
+            )
+        except redis.RedisError as exc:
+            logger.warning("Could not clear scrape checkpoint: %s", exc)
@@ -0,0 +1,105 @@
+"""Single-flight coalescing of identical ``POST /scrape/craigslist`` requests.
+
+Two users (or one double click) asking for the same city/query/max_results
+should share one crawl. The endpoint claims a Redis key derived from the
+normalised parameters with ``SET NX`` before enqueueing; whoever finds the
+key already taken gets the existing ``job_id`` back instead of a new task.
+
+The key lives while the job is queued or running (``_IN_FLIGHT_TTL`` is only
+a safety net for a worker that died mid-job). When the job succeeds it
+``settle``s the key down to ``settings.scrape_coalesce_window_s``, so
+requests arriving shortly after still reuse its result; a job cut short by
+its time limit ``release``s it instead. A job that failed or was revoked is
+never joined: the next request replaces it. A window of 0
+disables coalescing. Redis errors fail open: the request just gets its own
+job.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Callable, Optional
+
+import redis
+from celery.result import AsyncResult
+
+from .celery_app import celery_app
+from .redis_client import get_redis
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+_KEY = "scrape:single-flight:{city}:{query}:{max_results}"
+
+# Longest a job can be "in flight": every retry of a hard-time-limited task.
+_IN_FLIGHT_TTL = 15 * 60
+
+_DEAD_STATES = frozenset({"FAILURE", "REVOKED"})
+
+JobState = Callable[[str], str]
+
+
+def _job_state(job_id: str) -> str:
+    return AsyncResult(job_id, app=celery_app).state
+
+
+def _key(city: str, query: str, max_results: int) -> str:
+    return _KEY.format(
+        city=city.strip().lower(),
+        query=" ".join(query.lower().split()),
+        max_results=max_results,
+    )
+
+
+def join_or_claim(
+    city: str,
+    query: str,
+    max_results: int,
+    job_id: str,
+    job_state: JobState = _job_state,
+) -> Optional[str]:
+    """Existing job id to reuse, or None once ``job_id`` owns the flight."""
+    if settings.scrape_coalesce_window_s <= 0:
+        return None
+    key = _key(city, query, max_results)
+    client = get_redis()
+    try:
+        for _ in range(2):
+            if client.set(key, job_id, nx=True, ex=_IN_FLIGHT_TTL):
+                return None
+            existing = client.get(key)
+            if existing is None:
+                continue  # expired in between: try to claim again
+            if job_state(existing) not in _DEAD_STATES:
+                return existing
+            # Never hand out a failed job; whoever wins the next SET NX runs it.
+            if client.get(key) == existing:
+                client.delete(key)
+    except redis.RedisError as exc:
+        logger.warning("Scrape coalescing unavailable, enqueueing anyway: %s", exc)
+    return None
+
+
+def settle(city: str, query: str, max_results: int, job_id: str) -> None:
+    """Job ``job_id`` succeeded: stay joinable for the freshness window only."""
+    window = settings.scrape_coalesce_window_s
+    if window <= 0:
+        return
+    key = _key(city, query, max_results)
+    client = get_redis()
+    try:
+        if client.get(key) == job_id:
+            client.expire(key, window)
+    except redis.RedisError as exc:
+        logger.warning("Could not settle coalesced scrape: %s", exc)
+
+
+def release(city: str, query: str, max_results: int, job_id: str) -> None:
+    """Give up a claim whose job never got enqueued or stopped short."""
+    key = _key(city, query, max_results)
+    client = get_redis()
+    try:
+        if client.get(key) == job_id:
+            client.delete(key)
+    except redis.RedisError as exc:
+        logger.warning("Could not release coalesced scrape: %s", exc)
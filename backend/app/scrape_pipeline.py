@@ -0,0 +1,337 @@
+"""Staged scrape pipeline across dedicated Celery queues.
+
+With ``settings.scraper_pipeline = "staged"`` one scrape job runs as::
+
+    scrape.craigslist  ─┬─ scrape.fetch ─ scrape.score ─ scrape.persist ─┐
+    (search stage)      ├─ scrape.fetch ─ scrape.score ─ scrape.persist ─┼─ scrape.finish
+                        └─ ...  one chain per scraper_fetch_batch_size rows ┘
+
+* **search** (queue ``scrape.search``) walks the results pages, drops known
+  and batch-claimed URLs, queues the remaining rows in the Postgres crawl
+  frontier (``app.crawl_frontier``) and fans out one chain per batch.
+* **fetch** (``scrape.fetch``, I/O-bound) leases the job's next batch from
+  the frontier (``FOR UPDATE SKIP LOCKED``) and fetches the detail pages.
+* **score** (``scrape.score``, CPU-bound) prices each listing.
+* **persist** (``scrape.persist``, DB-bound) writes in
+  ``scraper_persist_batch_size`` micro-batches, removes the rows from the
+  frontier and bumps the job's progress.
+* **finish** (chord body, ``scrape.persist``) totals the chunks, advances the
+  crawl watermark, records the scheduler yield and becomes the job's result:
+  the search task ``replace``s itself with the chord, so the ``job_id``
+  handed to the client resolves to the same result dict as before.
+
+Listings cross each queue as ``ListingRecord.to_dict()`` and are rebuilt
+(and re-validated) with ``ListingRecord.from_dict`` on the other side.
+
+Each queue gets its own worker pool (see docker-compose), so slow fetches no
+longer hold DB connections and each stage scales on its own. Frontier rows
+whose worker died are picked up by ``scrape.frontier`` (Celery beat) once
+their lease runs out. ``"single"`` (the default) keeps the whole job in one
+task (``app.tasks``), which is also the only mode with checkpoints and
+continuation tokens.
+
+The search stage is safe to retry: its frontier rows are committed before
+the hand-over, so a re-run finds them already queued (``enqueue`` returns 0)
+and fans out over the job's pending rows instead (``pending_count``).
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Set
+
+from celery import Task, chord
+
+from .celery_app import celery_app
+from .crawl_frontier import claim, complete, enqueue, orphan_count, pending_count
+from .crawl_scheduler import CrawlScheduler
+from .crawl_watermarks import WatermarkStore
+from .db import SyncSessionLocal
+from .http_client import pool_stats
+from .listing_record import ListingRecord
+from .listing_writer import persist_listings
+from .redis_client import get_redis
+from .scrape_batches import claim_urls
+from .scrape_coalescing import settle
+from .scraper_craigslist import fetch_details, search_new_rows
+from .seen_index import SeenIndex
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Counters every scrape result carries (summed by scrape_batches.rollup).
+COUNTERS = ("fetched", "inserted", "updated", "skipped", "pre_filtered", "batch_duplicates")
+
+_PROGRESS_KEY = "scrape:pipeline:{job_id}"
+
+# Cap on fetch chains one scrape.frontier tick starts for orphaned rows.
+_DRAIN_MAX_CHAINS = 50
+
+KnownUrls = Callable[[List[str]], Set[str]]
+
+
+def make_skip_known(
+    seen: SeenIndex,
+    counters: Dict[str, int],
+    already_stored: List[str],
+    resumed: FrozenSet[str] = frozenset(),
+) -> KnownUrls:
+    """``skip_known`` hook for the scraper: seen index and checkpoint.
+
+    Each known URL is recorded in ``already_stored`` (and counted as
+    ``pre_filtered`` unless it was ``resumed``) once, however often its page
+    is walked.
+    """
+    recorded = set(already_stored)
+
+    def skip_known(urls: List[str]) -> Set[str]:
+        done = {u for u in urls if u in resumed}
+        known = seen.known_urls([u for u in urls if u not in done]) | done
+        for url in urls:
+            if url in known and url not in recorded:
+                recorded.add(url)
+                already_stored.append(url)
+                if url not in done:
+                    counters["pre_filtered"] += 1
+        return known
+
+    return skip_known
+
+
+def make_claim(
+    batch_id: Optional[str], job_id: str, counters: Dict[str, int]
+) -> Optional[KnownUrls]:
+    """``claim`` hook for the scraper, or None outside a batch.
+
+    Sibling cities in the same batch see the same "nearby" posts; the scraper
+    only claims the rows it is about to fetch, so rows past ``max_results``
+    stay free for the siblings.
+    """
+    if not batch_id:
+        return None
+
+    def claim(urls: List[str]) -> Set[str]:
+        taken = claim_urls(batch_id, job_id, urls)
+        counters["batch_duplicates"] += len(taken)
+        return taken
+
+    return claim
+
+
+def _add_progress(job_id: str, deltas: Dict[str, int]) -> Dict[str, int]:
+    """Add ``deltas`` to the job's shared counters; return the new totals."""
+    key = _PROGRESS_KEY.format(job_id=job_id)
+    client = get_redis()
+    with client.pipeline() as pipe:
+        for name, value in deltas.items():
+            pipe.hincrby(key, name, value)
+        pipe.expire(key, int(celery_app.conf.result_expires or 3600))
+        pipe.hgetall(key)
+        totals = pipe.execute()[-1]
+    return {name: int(value) for name, value in totals.items()}
+
+
+def _fetch_chain(job_id: Optional[str], city: Optional[str], query: Optional[str]):
+    return (
+        fetch_stage.s(job_id)
+        | score_stage.s()
+        | persist_stage.s(job_id=job_id, city=city, query=query)
+    )
+
+
+def run_search_stage(
+    task: Task,
+    city: str,
+    query: str,
+    max_results: int,
+    batch_id: Optional[str],
+    priority: int = 0,
+) -> Any:
+    """Search stage of ``scrape.craigslist``: fan the new rows out and hand over."""
+    job_id = task.request.id
+    requests_before = pool_stats()["requests"]
+    seen = SeenIndex.from_settings()
+    watermarks = WatermarkStore.from_settings()
+    watermark = watermarks.load(city, query)
+    counters = dict.fromkeys(COUNTERS, 0)
+    already_stored: List[str] = []
+
+    rows = search_new_rows(
+        city,
+        query,
+        max_results=max_results,
+        skip_known=make_skip_known(seen, counters, already_stored),
+        page_already_seen=watermark.covers if watermarks.enabled else None,
+        claim=make_claim(batch_id, job_id, counters),
+    )
+    with SyncSessionLocal() as session:
+        enqueue(
+            session,
+            rows,
+            job_id,
+            priority,
+            max_attempts=settings.scraper_frontier_max_attempts,
+        )
+        session.commit()
+        # Not enqueue's count: an autoretried search finds its own rows
+        # already queued by the attempt that failed after committing them.
+        queued = pending_count(session, job_id, settings.scraper_frontier_max_attempts)
+    _add_progress(job_id, counters)
+    task.update_state(
+        state="PROGRESS",
+        meta={"stage": "fetching", "city": city, "query": query, **counters},
+    )
+
+    search = {
+        "counters": counters,
+        "already_stored": already_stored,
+        "requests": pool_stats()["requests"] - requests_before,
+    }
+    finish = finish_stage.s(
+        city=city, query=query, max_results=max_results, job_id=job_id, search=search
+    )
+    # Rows another job already has pending are that job's to fetch.
+    chains = [
+        _fetch_chain(job_id, city, query)
+        for _ in range(math.ceil(queued / max(1, settings.scraper_fetch_batch_size)))
+    ]
+    if not chains:
+        return finish_stage([], **finish.kwargs)
+    logger.info(
+        "Scrape %s: %d rows for %r in %r queued for %d fetch tasks",
+        job_id,
+        queued,
+        query,
+        city,
+        len(chains),
+    )
+    return task.replace(chord(chains, finish))
+
+
+@celery_app.task(name="scrape.fetch")
+def fetch_stage(job_id: Optional[str]) -> Dict[str, Any]:
+    """Lease a batch of ``job_id``'s frontier rows (orphans if None) and fetch them.
+
+    ``ScraperBlocked`` (or running out of time budget) fails the task; the
+    leased rows go back to the frontier when the lease runs out.
+    """
+    with SyncSessionLocal() as session:
+        items = claim(
+            session,
+            max(1, settings.scraper_fetch_batch_size),
+            lease_seconds=settings.scraper_frontier_lease_s,
+            max_attempts=settings.scraper_frontier_max_attempts,
+            job_id=job_id,
+        )
+        session.commit()
+    requests_before = pool_stats()["requests"]
+    listings = fetch_details([ListingRecord.from_dict(item.row) for item in items])
+    return {
+        "listings": [listing.to_dict() for listing in listings],
+        "frontier_ids": [item.id for item in items],
+        "requests": pool_stats()["requests"] - requests_before,
+    }
+
+
+@celery_app.task(name="scrape.score")
+def score_stage(batch: Dict[str, Any]) -> Dict[str, Any]:
+    listings = [ListingRecord.from_dict(item).score() for item in batch["listings"]]
+    return {**batch, "listings": [listing.to_dict() for listing in listings]}
+
+
+@celery_app.task(
+    bind=True,
+    name="scrape.persist",
+    autoretry_for=(Exception,),
+    retry_backoff=True,
+    retry_backoff_max=30,
+    max_retries=3,
+)
+def persist_stage(
+    self,
+    batch: Dict[str, Any],
+    job_id: Optional[str],
+    city: Optional[str],
+    query: Optional[str],
+) -> Dict[str, Any]:
+    """Write one batch in micro-batches; a retry skips what already committed."""
+    listings = [ListingRecord.from_dict(item) for item in batch["listings"]]
+    chunk = {"fetched": len(listings), "inserted": 0, "updated": 0, "skipped": 0}
+    seen = SeenIndex.from_settings()
+    size = max(1, settings.scraper_persist_batch_size)
+
+    with SyncSessionLocal() as session:
+        for start in range(0, len(listings), size):
+            outcome = persist_listings(session, listings[start : start + size])
+            session.commit()
+            seen.mark(outcome.persisted_urls)
+            chunk["inserted"] += outcome.inserted
+            chunk["updated"] += outcome.updated
+            chunk["skipped"] += outcome.skipped
+        complete(session, batch["frontier_ids"])
+        session.commit()
+
+    if job_id is not None:
+        totals = _add_progress(job_id, chunk)
+        self.update_state(
+            task_id=job_id,
+            state="PROGRESS",
+            meta={"stage": "scraping", "city": city, "query": query, **totals},
+        )
+    return {
+        **chunk,
+        "requests": batch["requests"],
+        "urls": [item.url for item in listings],
+    }
+
+
+@celery_app.task(name="scrape.finish")
+def finish_stage(
+    chunks: List[Dict[str, Any]],
+    city: str,
+    query: str,
+    max_results: int,
+    job_id: str,
+    search: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Chord body: the scrape job's final result."""
+    counters = dict(search["counters"])
+    fetched_urls: List[str] = []
+    requests = search["requests"]
+    for chunk in chunks:
+        for name in ("fetched", "inserted", "updated", "skipped"):
+            counters[name] += chunk[name]
+        fetched_urls.extend(chunk["urls"])
+        requests += chunk["requests"]
+
+    # Reloaded, not carried over: a sweep that finished meanwhile is kept.
+    watermarks = WatermarkStore.from_settings()
+    watermarks.advance(
+        city,
+        query,
+        watermarks.load(city, query),
+        fetched_urls + search["already_stored"],
+    )
+    CrawlScheduler.from_settings().record(city, query, counters["inserted"], requests)
+    settle(city, query, max_results, job_id)
+    get_redis().delete(_PROGRESS_KEY.format(job_id=job_id))
+    return {"city": city, "query": query, **counters}
+
+
+@celery_app.task(name="scrape.frontier")
+def drain_frontier_task() -> Dict[str, Any]:
+    """Celery beat: fetch frontier rows whose worker died or never came."""
+    with SyncSessionLocal() as session:
+        orphans = orphan_count(
+            session,
+            settings.scraper_frontier_lease_s,
+            settings.scraper_frontier_max_attempts,
+        )
+    size = max(1, settings.scraper_fetch_batch_size)
+    chains = min(math.ceil(orphans / size), _DRAIN_MAX_CHAINS)
+    for _ in range(chains):
+        _fetch_chain(None, None, None).apply_async()
+    if orphans:
+        logger.info("Crawl frontier: %d orphaned rows, %d fetch chains started", orphans, chains)
+    return {"orphans": orphans, "chains": chains}
@@ -2,90 +2,77 @@
 
 Scrapes Craigslist's *static* (no-JS) search results page, which Craigslist
 still serves to non-JavaScript clients and which is far more stable to parse
-than the JavaScript-rendered gallery. For each result we then fetch the
-listing detail page to enrich it with mileage, the exact posted-at timestamp,
-and the description.
-
-Public contract (consumed by ``app.tasks.scrape_craigslist_task``): every dict
-returned MUST contain ``source``, ``url``, ``title``, ``listed_price``,
-``make``, ``model``, ``location`` and ``posted_at`` (these are accessed without
-defaults downstream). ``description``, ``year`` and ``mileage`` are optional.
+than the JavaScript-rendered gallery, following its "next" links page by
+page. For each result we then fetch the listing detail page to enrich it with
+mileage, the rest of the attribute group, the exact posted-at timestamp, and
+the description.
+
+Public contract (consumed by ``app.tasks.scrape_craigslist_task``): listings
+are ``ListingRecord``s (``app.listing_record``), validated once when the
+results row is parsed, so ``source``, ``url``, ``title``, ``listed_price``,
+``make``, ``model`` and ``location`` are always set. Every record returned
+(or streamed by ``iter_craigslist_cars``) also has ``posted_at``;
+``description``, ``year``, ``mileage``, ``vin`` and ``attributes`` may be
+empty. The detail stage fills the row's record in place rather than copying
+it.
 
 The scraper is intentionally synchronous (``httpx.Client``) because the Celery
-worker pool that calls it is sync (psycopg2).
+worker pool that calls it is sync (psycopg2). Detail pages are fetched with a
+bounded thread pool sharing that one client, which is the worker process's
+long-lived pooled client (``app.http_client``) so keep-alive connections
+survive from one task to the next; politeness (shared per-host rate
+limit, Retry-After, adaptive concurrency) is enforced by ``app.politeness``
+rather than a sleep before every request.
 """
 
 from __future__ import annotations
 
 import logging
-import random
 import re
-import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Set, Tuple
 from urllib.parse import quote_plus, urljoin
 
 import httpx
 from bs4 import BeautifulSoup
 
+from .circuit_breaker import ScraperBlocked, classify_block, site_of
+from .html_backends import Bs4Backend, HtmlBackend, RawSearchRow, get_backend
+from .http_cache import HttpCache, get_http_cache
+from .http_client import get_http_client, pool_stats
+from .listing_ids import CRAIGSLIST, canonical_url, craigslist_post_id
+from .listing_record import ListingRecord
+from .page_archive import DETAIL_PAGE, SEARCH_PAGE, get_page_archive
+from .politeness import THROTTLE_STATUSES, Pacer, TimeBudgetExhausted, build_pacer
 from .settings import settings
+from .vehicle_catalog import classify_title, classify_titles
+from .vin import extract_vin
 
 logger = logging.getLogger(__name__)
 
-# Craigslist cars+trucks, all sellers (owner + dealer).
-SEARCH_URL_TEMPLATE = "https://{city}.craigslist.org/search/cta?query={query}"
+# Craigslist cars+trucks, all sellers (owner + dealer), newest first (the
+# incremental-crawl cut-off in iter_craigslist_cars relies on that order).
+SEARCH_URL_TEMPLATE = "https://{city}.craigslist.org/search/cta?query={query}&sort=date"
 
-HEADERS = {
-    "User-Agent": settings.scraper_user_agent,
-    "Accept": (
-        "text/html,application/xhtml+xml,application/xml;q=0.9,"
-        "image/avif,image/webp,*/*;q=0.8"
-    ),
-    "Accept-Language": "en-US,en;q=0.9",
-}
+# Bulk "which of these URLs do we already have?" hook (see iter_craigslist_cars).
+KnownUrlFilter = Callable[[List[str]], Set[str]]
+# "Claim these URLs for this job; which does another job own?" (batch claims).
+UrlClaim = Callable[[List[str]], Set[str]]
+# "Was this whole results page handled by an earlier sweep?" (crawl cut-off).
+SeenPageCheck = Callable[[List[str]], bool]
 
-# Politeness window (seconds) between sequential detail-page fetches.
+# Politeness window (seconds) between request starts against the same host
+# when pacing locally (no shared Redis rate limiter).
 DETAIL_DELAY_RANGE: Tuple[float, float] = (0.4, 0.8)
 
-# Lowercased make -> canonical make. Aliases collapse to the canonical name.
-KNOWN_MAKES: Dict[str, str] = {
-    "acura": "Acura",
-    "audi": "Audi",
-    "bmw": "BMW",
-    "buick": "Buick",
-    "cadillac": "Cadillac",
-    "chevrolet": "Chevrolet",
-    "chevy": "Chevrolet",
-    "chrysler": "Chrysler",
-    "dodge": "Dodge",
-    "fiat": "Fiat",
-    "ford": "Ford",
-    "gmc": "GMC",
-    "honda": "Honda",
-    "hyundai": "Hyundai",
-    "infiniti": "Infiniti",
-    "jeep": "Jeep",
-    "kia": "Kia",
-    "lexus": "Lexus",
-    "mazda": "Mazda",
-    "mercedes": "Mercedes-Benz",
-    "mercedes-benz": "Mercedes-Benz",
-    "benz": "Mercedes-Benz",
-    "mini": "Mini",
-    "mitsubishi": "Mitsubishi",
-    "nissan": "Nissan",
-    "porsche": "Porsche",
-    "ram": "Ram",
-    "subaru": "Subaru",
-    "tesla": "Tesla",
-    "toyota": "Toyota",
-    "volkswagen": "Volkswagen",
-    "vw": "Volkswagen",
-    "volvo": "Volvo",
-}
+# Present on every static results page, including ones with zero matches.
+_RESULTS_MARKUP = "cl-static-search-result"
 
 _YEAR_RE = re.compile(r"\b(19[8-9]\d|20[0-4]\d)\b")
 _MILEAGE_RE = re.compile(r"odometer", re.IGNORECASE)
+_ATTR_KEY_RE = re.compile(r"[^a-z0-9]+")
 _DIGITS_RE = re.compile(r"[\d,]+")
 
 
@@ -93,133 +80,430 @@ def search_craigslist_cars(
     city: str,
     query: str,
     max_results: int = 10,
-) -> List[Dict[str, Any]]:
+    concurrency: Optional[int] = None,
+    skip_known: Optional[KnownUrlFilter] = None,
+    page_already_seen: Optional[SeenPageCheck] = None,
+    claim: Optional[UrlClaim] = None,
+) -> List[ListingRecord]:
     """Fetch live Craigslist car/truck listings for ``query`` in ``city``.
 
-    Returns a list of listing dicts (see module docstring for the contract).
-    Network/HTTP errors on the *search* request propagate so Celery's
-    ``autoretry_for`` can retry the whole job; per-listing failures are caught
-    and skipped so one bad page never aborts the batch.
+    Returns a list of listings (see module docstring for the contract),
+    in search-page order. Thin wrapper over ``iter_craigslist_cars`` for
+    callers that want the whole batch at once.
     """
-    search_url = SEARCH_URL_TEMPLATE.format(
-        city=city, query=quote_plus(query)
+    return list(
+        iter_craigslist_cars(
+            city,
+            query,
+            max_results=max_results,
+            concurrency=concurrency,
+            skip_known=skip_known,
+            page_already_seen=page_already_seen,
+            claim=claim,
+        )
     )
 
-    with httpx.Client(
-        headers=HEADERS,
-        timeout=settings.scraper_request_timeout,
-        follow_redirects=True,
-    ) as client:
-        resp = client.get(search_url)
-        resp.raise_for_status()
 
-        rows = _parse_search_results(resp.text, city=city)
-        if not rows:
-            logger.warning(
-                "Craigslist returned no static search results for %r in %r "
-                "(layout change or no matches)",
+def iter_craigslist_cars(
+    city: str,
+    query: str,
+    max_results: int = 10,
+    concurrency: Optional[int] = None,
+    skip_known: Optional[KnownUrlFilter] = None,
+    page_already_seen: Optional[SeenPageCheck] = None,
+    claim: Optional[UrlClaim] = None,
+) -> Iterator[ListingRecord]:
+    """Stream enriched listings for ``query`` in ``city`` as they complete.
+
+    Follows the static results pagination and stops requesting pages as soon
+    as ``max_results`` rows have been handed to the detail fetchers. At most
+    ``concurrency`` detail pages (default ``settings.scraper_concurrency``) are
+    in flight, and listings are yielded in search-page order, so memory stays
+    bounded by one results page plus the in-flight window.
+
+    ``skip_known`` receives each results page's URLs in one call and returns
+    those to drop before any detail fetch (e.g. ``SeenIndex.known_urls``).
+    Dropped rows do not count towards ``max_results``.
+
+    ``claim`` is called with exactly the rows about to be submitted (after the
+    ``max_results`` cut) and returns those another job owns; they are dropped
+    too and the next rows on the page take their place.
+
+    ``page_already_seen`` enables incremental crawling: results are newest
+    first, so the walk stops at the first page for which it returns True
+    (e.g. ``Watermark.covers`` from ``app.crawl_watermarks``).
+
+    Network/HTTP errors on the *first* search request propagate so Celery's
+    ``autoretry_for`` can retry the whole job; a failing later page just ends
+    the crawl. Per-listing failures are caught and degraded so one bad page
+    never aborts the batch.
+    """
+    workers = max(1, concurrency or settings.scraper_concurrency)
+    pacer = build_pacer(DETAIL_DELAY_RANGE, workers)
+    client = get_http_client()
+    cache = get_http_cache()
+    cache_before = cache.stats.snapshot() if cache is not None else None
+
+    # The client is process-wide and outlives this job: never close it here.
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cl-detail") as pool:
+        in_flight: Deque["Future[ListingRecord]"] = deque()
+        for row in _iter_rows_to_fetch(
+            client, pacer, city, query, max_results, skip_known, page_already_seen, claim
+        ):
+            in_flight.append(pool.submit(_enrich_with_detail, client, row, pacer, cache))
+            if len(in_flight) >= workers:
+                # Only ScraperBlocked/TimeBudgetExhausted escape _enrich_with_detail.
+                yield in_flight.popleft().result()
+
+        while in_flight:
+            yield in_flight.popleft().result()
+
+    if cache is not None:
+        after = cache.stats.snapshot()
+        logger.info(
+            "HTTP cache for %r in %r: %s",
+            query,
+            city,
+            {k: after[k] - cache_before[k] for k in after},
+        )
+    logger.debug("HTTP pool after %r in %r: %s", query, city, pool_stats())
+
+
+def search_new_rows(
+    city: str,
+    query: str,
+    max_results: int = 10,
+    skip_known: Optional[KnownUrlFilter] = None,
+    page_already_seen: Optional[SeenPageCheck] = None,
+    claim: Optional[UrlClaim] = None,
+) -> List[ListingRecord]:
+    """Search stage only: the result rows ``iter_craigslist_cars`` would fetch.
+
+    Same pagination, ``skip_known``/``page_already_seen``/``claim`` filtering
+    and ``max_results`` cap, but no detail pages; ``fetch_details`` does those
+    (possibly on another worker, see ``app.scrape_pipeline``).
+    """
+    pacer = build_pacer(DETAIL_DELAY_RANGE, 1)
+    return list(
+        _iter_rows_to_fetch(
+            get_http_client(),
+            pacer,
+            city,
+            query,
+            max_results,
+            skip_known,
+            page_already_seen,
+            claim,
+        )
+    )
+
+
+def fetch_details(
+    rows: List[ListingRecord], concurrency: Optional[int] = None
+) -> List[ListingRecord]:
+    """Detail stage only: enrich search ``rows`` in order (see ``_enrich_with_detail``)."""
+    workers = max(1, concurrency or settings.scraper_concurrency)
+    pacer = build_pacer(DETAIL_DELAY_RANGE, workers)
+    client = get_http_client()
+    cache = get_http_cache()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cl-detail") as pool:
+        futures = [
+            pool.submit(_enrich_with_detail, client, row, pacer, cache) for row in rows
+        ]
+        return [future.result() for future in futures]
+
+
+def _iter_rows_to_fetch(
+    client: httpx.Client,
+    pacer: Pacer,
+    city: str,
+    query: str,
+    max_results: int,
+    skip_known: Optional[KnownUrlFilter],
+    page_already_seen: Optional[SeenPageCheck],
+    claim: Optional[UrlClaim] = None,
+) -> Iterator[ListingRecord]:
+    """Walk the results pages lazily, yielding each row worth a detail fetch."""
+    search_url = SEARCH_URL_TEMPLATE.format(city=city, query=quote_plus(query))
+    sighted: Set[Any] = set()
+    submitted = 0
+    found = 0
+
+    for rows in _iter_search_pages(client, pacer, search_url, city):
+        found += len(rows)
+        urls = [row.url for row in rows]
+        if page_already_seen is not None and page_already_seen(urls):
+            logger.info(
+                "Caught up with the previous sweep of %r in %r after %d rows",
                 query,
                 city,
+                found,
             )
-            return []
+            return
+        if skip_known is not None:
+            known = skip_known(urls)
+            rows = [row for row in rows if row.url not in known]
+        # Reposts of one post under several URLs: fetch it once per job.
+        rows = [row for row in rows if _first_sighting(row, sighted)]
+        while rows and submitted < max_results:
+            wanted, rows = rows[: max_results - submitted], rows[max_results - submitted :]
+            taken = claim([row.url for row in wanted]) if claim is not None else set()
+            for row in wanted:
+                if row.url not in taken:
+                    submitted += 1
+                    yield row
+        if submitted >= max_results:
+            return
+
+    if found == 0:
+        logger.warning(
+            "Craigslist returned no static search results for %r in %r "
+            "(layout change or no matches)",
+            query,
+            city,
+        )
 
-        results: List[Dict[str, Any]] = []
-        for row in rows[:max_results]:
-            listing = _enrich_with_detail(client, row)
-            results.append(listing)
 
-        return results
+def _first_sighting(row: ListingRecord, sighted: Set[Any]) -> bool:
+    key = row.dedupe_key
+    if key in sighted:
+        return False
+    sighted.add(key)
+    return True
 
 
-def _parse_search_results(html: str, city: str) -> List[Dict[str, Any]]:
-    """Parse the static search results page into partial listing dicts.
+def _iter_search_pages(
+    client: httpx.Client,
+    pacer: Pacer,
+    search_url: str,
+    city: str,
+) -> Iterator[List[ListingRecord]]:
+    """Yield the parsed rows of each results page, following "next" links.
+
+    Pages are fetched lazily, one per ``next()``, and the walk ends at the
+    first empty page, a missing/repeated next link, or
+    ``settings.scraper_max_pages``.
+    """
+    page_url: Optional[str] = search_url
+    visited: Set[str] = set()
+
+    while page_url and page_url not in visited:
+        if len(visited) >= settings.scraper_max_pages:
+            return
+        visited.add(page_url)
+
+        try:
+            resp = _paced_get(client, pacer, page_url)
+            resp.raise_for_status()
+        except httpx.HTTPError as exc:
+            if page_url == search_url:
+                raise
+            logger.warning(
+                "Failed to fetch Craigslist results page %s: %s", page_url, exc
+            )
+            return
+
+        _archive_page(page_url, SEARCH_PAGE, resp)
+        raw_rows, next_href = get_backend().search_page(resp.text)
+        rows = _rows_from_raw(raw_rows, city)
+        if not rows:
+            if page_url == search_url and _RESULTS_MARKUP not in resp.text:
+                # Not "no matches" (that page still has the results list):
+                # a soft block or layout change. Enough of these trip the breaker.
+                if pacer is not None and pacer.breaker is not None:
+                    pacer.breaker.record_block(page_url, "results page without listings")
+            return
+        yield rows
+
+        next_href = (next_href or "").strip()
+        page_url = urljoin(page_url, next_href) if next_href else None
+
+
+def _parse_search_results(
+    html: str, city: str, backend: Optional[HtmlBackend] = None
+) -> List[ListingRecord]:
+    """Parse the static search results page into partial listing records.
 
     Each row carries everything available from the results page: url, title,
     listed_price, location, and year/make/model parsed from the title. Rows
     without a parseable price are dropped (they're useless for deal scoring).
     """
-    soup = BeautifulSoup(html, "html.parser")
-    rows: List[Dict[str, Any]] = []
+    raw_rows, _ = (backend or get_backend()).search_page(html)
+    return _rows_from_raw(raw_rows, city)
 
-    for node in soup.select("li.cl-static-search-result"):
-        anchor = node.find("a", href=True)
-        if anchor is None:
+
+def _rows_from_raw(
+    raw_rows: List[RawSearchRow], city: str
+) -> List[ListingRecord]:
+    # (url, title, listed_price, location) until make/model are known.
+    parsed: List[Tuple[str, str, int, str]] = []
+
+    for raw in raw_rows:
+        if raw.href is None:
             continue
-        url = anchor["href"].strip()
+        url = raw.href.strip()
         if not url:
             continue
+        url = canonical_url(url)
 
-        title = (node.get("title") or "").strip()
-        if not title:
-            title_el = node.select_one(".title")
-            title = title_el.get_text(strip=True) if title_el else ""
+        title = raw.title_attr.strip() or raw.title_text
         if not title:
             continue
 
-        price_el = node.select_one(".price")
-        listed_price = _parse_price(price_el.get_text() if price_el else "")
+        listed_price = _parse_price(raw.price_text)
         if listed_price is None:
             continue
 
-        location_el = node.select_one(".location")
-        location = (
-            location_el.get_text(strip=True) if location_el else ""
-        ) or city.title()
-
-        year = _parse_year(title)
-        make, model = _parse_make_model(title)
-
-        rows.append(
-            {
-                "source": "craigslist",
-                "url": url,
-                "title": title,
-                "listed_price": listed_price,
-                "location": location,
-                "year": year,
-                "make": make,
-                "model": model,
-            }
+        location = raw.location_text or city.title()
+        parsed.append((url, title, listed_price, location))
+
+    # One batch call per page against the compiled make/model catalog.
+    makes_models = classify_titles(title for _, title, _, _ in parsed)
+    return [
+        ListingRecord(
+            source=CRAIGSLIST,
+            url=url,
+            title=title,
+            listed_price=listed_price,
+            location=location,
+            make=make,
+            model=model,
+            external_id=craigslist_post_id(url),
+            year=_parse_year(title),
         )
-
-    return rows
+        for (url, title, listed_price, location), (make, model) in zip(parsed, makes_models)
+    ]
 
 
 def _enrich_with_detail(
-    client: httpx.Client, row: Dict[str, Any]
-) -> Dict[str, Any]:
-    """Fetch the detail page and add mileage, posted_at and description.
-
-    Always returns a complete, contract-compliant dict. On any failure the
-    search-page data is kept, mileage/description are left null, and
-    ``posted_at`` falls back to now (UTC).
+    client: httpx.Client,
+    row: ListingRecord,
+    pacer: Optional[Pacer] = None,
+    cache: Optional[HttpCache] = None,
+) -> ListingRecord:
+    """Fetch the detail page and add mileage, attributes, posted_at, description and VIN.
+
+    Fills ``row`` in place and returns it, always contract-compliant. On any
+    failure the search-page data is kept, mileage/description/vin stay null,
+    and ``posted_at`` falls back to now (UTC). When ``cache`` revalidates the
+    page (304) the fields parsed last time are reused and no HTML is parsed.
     """
-    listing: Dict[str, Any] = {
-        **row,
-        "description": None,
-        "mileage": None,
-        "posted_at": datetime.now(timezone.utc),
-    }
-
-    time.sleep(random.uniform(*DETAIL_DELAY_RANGE))
-
     try:
-        resp = client.get(row["url"])
+        resp = _paced_get(client, pacer, row.url)
         resp.raise_for_status()
-        detail = BeautifulSoup(resp.text, "html.parser")
-
-        listing["mileage"] = _parse_mileage(detail)
-        listing["posted_at"] = _parse_posted_at(detail)
-        listing["description"] = _clean_description(detail)
-        # Prefer an odometer-derived year/make refinement only if missing.
-        if listing.get("year") is None:
-            listing["year"] = _parse_year(row["title"])
+        _archive_page(row.url, DETAIL_PAGE, resp)
+
+        fields = None
+        if cache is not None and resp.extensions.get("cache_revalidated"):
+            fields = _detail_fields_from_cache(cache.load_parsed(row.url))
+            if fields is not None:
+                cache.stats.parses_skipped += 1
+        if fields is None:
+            fields = _parse_detail(resp.text)
+            if cache is not None:
+                cache.store_parsed(row.url, fields)
+
+        row.apply_detail(fields)
+    except (ScraperBlocked, TimeBudgetExhausted):
+        raise  # ends the whole job, not just this listing
     except Exception as exc:  # noqa: BLE001 - degrade gracefully per-listing
         logger.warning(
-            "Failed to fetch Craigslist detail page %s: %s", row["url"], exc
+            "Failed to fetch Craigslist detail page %s: %s", row.url, exc
         )
 
-    return listing
+    if row.posted_at is None:
+        row.posted_at = datetime.now(timezone.utc)
+    return row
+
+
+def _paced_get(
+    client: httpx.Client, pacer: Optional[Pacer], url: str
+) -> httpx.Response:
+    """GET ``url`` through ``pacer``; one retry after a 429/503.
+
+    The pacer has already pushed the host's next slot past Retry-After, so
+    the retry simply waits its turn like every other worker. Block pages (403,
+    captcha, throttled twice) raise ``ScraperBlocked`` and count towards the
+    pacer's circuit breaker, which also fails fast while it is open.
+    """
+    if pacer is None:
+        return client.get(url)
+    breaker = pacer.breaker
+    if breaker is not None:
+        breaker.before_request(url)
+    for attempt in range(2):
+        with pacer.request(url) as outcome:
+            resp = client.get(url)
+            outcome.observe(resp)
+        if resp.status_code not in THROTTLE_STATUSES:
+            break
+
+    reason = classify_block(resp.status_code, resp.text)
+    if reason is None and resp.status_code in THROTTLE_STATUSES:
+        reason = f"HTTP {resp.status_code} after retry"
+    if reason is not None:
+        if breaker is not None:
+            breaker.record_block(url, reason)
+        raise ScraperBlocked(site_of(url), reason)
+    if breaker is not None:
+        breaker.record_success(url)
+    return resp
+
+
+def _archive_page(url: str, kind: str, resp: httpx.Response) -> None:
+    """Append ``resp`` to the raw-page archive, if enabled; never raises."""
+    archive = get_page_archive()
+    if archive is None:
+        return
+    try:
+        archive.append(url, kind, resp.content)
+    except Exception as exc:  # noqa: BLE001 - archiving must not fail a scrape
+        logger.warning("Could not archive %s: %s", url, exc)
+
+
+def _parse_detail(
+    html: str, backend: Optional[HtmlBackend] = None
+) -> Dict[str, Any]:
+    """Parse one detail page into its ``mileage``/``posted_at``/``description``/``vin``."""
+    fields = _parse_detail_strict(html, backend)
+    fields["posted_at"] = fields["posted_at"] or datetime.now(timezone.utc)
+    return fields
+
+
+def _parse_detail_strict(
+    html: str, backend: Optional[HtmlBackend] = None
+) -> Dict[str, Any]:
+    """``_parse_detail`` without the posted-at fallback (None when absent)."""
+    raw = (backend or get_backend()).detail_page(html)
+    attributes = _attributes_from_texts(raw.attr_texts)
+    description = _description_from_text(raw.description_text)
+    return {
+        "mileage": _mileage_from_attrs(raw.attr_texts),
+        "attributes": attributes,
+        "posted_at": _parse_iso_datetime(raw.posted_raw),
+        "description": description,
+        # Craigslist's own "vin:" attribute first, then the seller's text.
+        "vin": extract_vin(attributes.get("vin"), description),
+    }
+
+
+def _detail_fields_from_cache(
+    cached: Optional[Dict[str, Any]],
+) -> Optional[Dict[str, Any]]:
+    """Rehydrate fields memoized by ``_enrich_with_detail`` (JSON round-trip)."""
+    if not cached:
+        return None
+    posted_at = _parse_iso_datetime(cached.get("posted_at") or "")
+    # Memos written before attributes/VINs were parsed are re-parsed once.
+    if posted_at is None or "attributes" not in cached or "vin" not in cached:
+        return None
+    return {
+        "mileage": cached.get("mileage"),
+        "attributes": cached["attributes"],
+        "posted_at": posted_at,
+        "description": cached.get("description"),
+        "vin": cached["vin"],
+    }
 
 
 def _parse_price(text: str) -> Optional[int]:
@@ -245,36 +529,22 @@ def _parse_year(title: str) -> Optional[int]:
 def _parse_make_model(title: str) -> Tuple[str, str]:
     """Best-effort make + model from a free-text title.
 
-    Matches the first known make token; model is the token immediately
-    following it. Both default to 'Unknown' so the downstream contract (which
-    accesses make/model without defaults) is always satisfied.
+    Delegates to the compiled catalog matcher (``app.vehicle_catalog``):
+    multi-word makes/models and aliases are recognised, and an uncatalogued
+    model falls back to the token after the make. Both default to 'Unknown'
+    so the downstream contract (which accesses make/model without defaults)
+    is always satisfied.
     """
-    if not title:
-        return "Unknown", "Unknown"
-
-    tokens = re.findall(r"[A-Za-z0-9\-]+", title)
-    lowered = [t.lower() for t in tokens]
-
-    for idx, token in enumerate(lowered):
-        make = KNOWN_MAKES.get(token)
-        if make is None:
-            continue
-        model = "Unknown"
-        for follow in tokens[idx + 1 :]:
-            # Skip a trailing year sitting right after the make.
-            if _YEAR_RE.fullmatch(follow):
-                continue
-            model = follow.capitalize()
-            break
-        return make, model
-
-    return "Unknown", "Unknown"
+    return classify_title(title)
 
 
 def _parse_mileage(detail: BeautifulSoup) -> Optional[int]:
     """Pull the odometer reading from the listing's attribute groups."""
-    for span in detail.select(".attrgroup span, .attr"):
-        text = span.get_text(" ", strip=True)
+    return _mileage_from_attrs(Bs4Backend.attr_texts(detail))
+
+
+def _mileage_from_attrs(attr_texts: List[str]) -> Optional[int]:
+    for text in attr_texts:
         if _MILEAGE_RE.search(text):
             match = _DIGITS_RE.search(text)
             if match:
@@ -285,17 +555,33 @@ def _parse_mileage(detail: BeautifulSoup) -> Optional[int]:
     return None
 
 
+def _attributes_from_texts(attr_texts: List[str]) -> Dict[str, str]:
+    """``"title status: clean"`` -> ``{"title_status": "clean"}``, lowercased.
+
+    Captures the whole attribute group (condition, drive, fuel, cylinders, ...)
+    in the same pass as the odometer. Label-less spans such as the
+    "2015 honda civic" heading are skipped; the first value per key wins.
+    """
+    attributes: Dict[str, str] = {}
+    for text in attr_texts:
+        label, sep, value = text.partition(":")
+        if not sep:
+            continue
+        key = _ATTR_KEY_RE.sub("_", label.strip().lower()).strip("_")
+        value = " ".join(value.split()).lower()
+        if key and value and key not in attributes:
+            attributes[key] = value
+    return attributes
+
+
 def _parse_posted_at(detail: BeautifulSoup) -> datetime:
     """Read the posting timestamp from the <time datetime=...> element.
 
     Falls back to now (UTC) when absent or unparseable.
     """
-    time_el = detail.select_one("time[datetime]")
-    if time_el is not None:
-        raw = time_el.get("datetime", "").strip()
-        parsed = _parse_iso_datetime(raw)
-        if parsed is not None:
-            return parsed
+    parsed = _parse_iso_datetime(Bs4Backend.posted_raw(detail))
+    if parsed is not None:
+        return parsed
     return datetime.now(timezone.utc)
 
 
@@ -320,12 +606,11 @@ def _parse_iso_datetime(raw: str) -> Optional[datetime]:
 
 def _clean_description(detail: BeautifulSoup) -> Optional[str]:
     """Extract the listing body, stripping the QR-code boilerplate."""
-    body = detail.select_one("#postingbody")
-    if body is None:
+    return _description_from_text(Bs4Backend.description_text(detail))
+
+
+def _description_from_text(text: Optional[str]) -> Optional[str]:
+    if text is None:
         return None
-    # Remove the "QR Code Link to This Post" helper block if present.
-    for junk in body.select(".print-information, .notices"):
-        junk.decompose()
-    text = body.get_text("\n", strip=True)
     text = text.replace("QR Code Link to This Post", "").strip()
     return text or None
@@ -0,0 +1,178 @@
+"""Redis index of already-persisted listings.
+
+Lets the scraper drop known listings *before* paying for their detail fetch:
+``known_urls`` answers a whole results page with one ``ZMSCORE`` round trip.
+
+The index is a sorted set ``listing key -> unix time it was last persisted``,
+where the key is ``app.listing_ids.dedupe_key`` (``craigslist:<post id>``), so
+URL variants of one post hit the same member. It is kept in sync with
+``listings`` by ``mark`` (called after each commit) and
+rebuilt from the table whenever the key is missing (fresh Redis, flush,
+eviction). One worker rebuilds at a time (``SET NX`` lock); the others use
+Postgres until the new index is swapped in. A member older than ``settings.scraper_refresh_after_hours`` counts
+as stale and is let through for a refetch; ``0`` disables refreshing.
+
+Redis is an optimisation, not a source of truth: on any Redis error the
+lookup falls back to one ``(source, external_id)`` query against Postgres.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+import uuid
+from typing import Callable, Iterable, Iterator, List, Optional, Set, Tuple
+
+import redis
+from sqlalchemy import select
+
+from .db import SyncSessionLocal
+from .listing_ids import CRAIGSLIST, craigslist_post_id, dedupe_key, row_key
+from .models import Listing
+from .redis_client import get_redis
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Members are listing keys (was: raw URLs under "scraper:seen:listings").
+SEEN_KEY = "scraper:seen:posts"
+
+_REBUILD_CHUNK = 5000
+
+# Safety net for a worker that dies mid-rebuild: its lock and half-filled
+# temp key go away on their own.
+_REBUILD_TTL = 10 * 60
+
+# (listing key, unix seconds) pairs used to (re)seed the index.
+RowLoader = Callable[[], Iterable[Tuple[str, float]]]
+
+
+def _load_listing_keys() -> Iterator[Tuple[str, float]]:
+    with SyncSessionLocal() as session:
+        result = session.execute(
+            select(
+                Listing.source, Listing.external_id, Listing.url, Listing.created_at
+            ).execution_options(yield_per=_REBUILD_CHUNK)
+        )
+        for source, external_id, url, created_at in result:
+            yield row_key(source, external_id, url), created_at.timestamp()
+
+
+def _db_known_urls(urls: List[str]) -> Set[str]:
+    by_id = {craigslist_post_id(url): url for url in urls}
+    by_id.pop(None, None)
+    with SyncSessionLocal() as session:
+        stored = session.execute(
+            select(Listing.external_id).where(
+                Listing.source == CRAIGSLIST,
+                Listing.external_id.in_(list(by_id)),
+            )
+        ).scalars()
+        return {by_id[external_id] for external_id in stored}
+
+
+class SeenIndex:
+    def __init__(
+        self,
+        client: redis.Redis,
+        *,
+        key: str = SEEN_KEY,
+        refresh_after_seconds: float = 0,
+        load_rows: RowLoader = _load_listing_keys,
+        db_lookup: Callable[[List[str]], Set[str]] = _db_known_urls,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._redis = client
+        self._key = key
+        self._refresh_after = refresh_after_seconds
+        self._load_rows = load_rows
+        self._db_lookup = db_lookup
+        self._clock = clock
+        self._loaded = False
+
+    @classmethod
+    def from_settings(cls) -> "SeenIndex":
+        return cls(
+            get_redis(),
+            refresh_after_seconds=settings.scraper_refresh_after_hours * 3600,
+        )
+
+    def known_urls(self, urls: List[str]) -> Set[str]:
+        """Subset of ``urls`` that is already stored and not yet stale."""
+        if not urls:
+            return set()
+        try:
+            if not self._ensure_loaded():
+                return self._db_lookup(urls)
+            scores = self._redis.zmscore(self._key, [dedupe_key(url) for url in urls])
+        except redis.RedisError as exc:
+            logger.warning("Seen-URL index unavailable, using the DB: %s", exc)
+            return self._db_lookup(urls)
+
+        cutoff = self._cutoff()
+        return {
+            url
+            for url, score in zip(urls, scores)
+            if score is not None and (cutoff is None or score >= cutoff)
+        }
+
+    def mark(self, urls: Iterable[str]) -> None:
+        """Record ``urls`` as persisted just now (call after commit)."""
+        now = self._clock()
+        mapping = {dedupe_key(url): now for url in urls}
+        if not mapping:
+            return
+        try:
+            self._redis.zadd(self._key, mapping)
+        except redis.RedisError as exc:
+            # Harmless: the DB unique constraint still dedupes, and a missing
+            # key triggers a rebuild next time.
+            logger.warning("Could not update seen-URL index: %s", exc)
+
+    def rebuild(self) -> int:
+        """Reseed the index from ``listings``; atomic swap via RENAME."""
+        # Per-call temp key: a second rebuild never writes into this one.
+        tmp_key = f"{self._key}:rebuild:{uuid.uuid4().hex}"
+        count = 0
+        chunk: dict = {}
+        for member, ts in self._load_rows():
+            chunk[member] = ts
+            if len(chunk) >= _REBUILD_CHUNK:
+                self._add_chunk(tmp_key, chunk)
+                count += len(chunk)
+                chunk = {}
+        if chunk:
+            self._add_chunk(tmp_key, chunk)
+            count += len(chunk)
+
+        if count:
+            self._redis.rename(tmp_key, self._key)
+            self._redis.persist(self._key)
+        logger.info("Rebuilt seen-URL index with %d listings", count)
+        return count
+
+    def _add_chunk(self, tmp_key: str, chunk: dict) -> None:
+        with self._redis.pipeline() as pipe:
+            pipe.zadd(tmp_key, chunk)
+            pipe.expire(tmp_key, _REBUILD_TTL)
+            pipe.execute()
+
+    def _ensure_loaded(self) -> bool:
+        """True once the index is usable; False while another worker rebuilds it."""
+        if self._loaded:
+            return True
+        if not self._redis.exists(self._key):
+            lock = f"{self._key}:rebuilding"
+            if not self._redis.set(lock, "1", nx=True, ex=_REBUILD_TTL):
+                return False
+            try:
+                self.rebuild()
+            finally:
+                self._redis.delete(lock)
+        self._loaded = True
+        return True
+
+    def _cutoff(self) -> Optional[float]:
+        if self._refresh_after <= 0:
+            return None
+        return self._clock() - self._refresh_after
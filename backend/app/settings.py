@@ -22,6 +22,89 @@ class Settings(BaseSettings):
         "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
     )
     scraper_request_timeout: float = 20.0
+    # Per-worker-process connection pool, kept alive across scrape tasks.
+    scraper_pool_max_connections: int = 20
+    scraper_pool_max_keepalive: int = 10
+    scraper_keepalive_expiry_s: float = 60.0
+    scraper_http2: bool = False  # needs the h2 package
+    # Ceiling on detail pages in flight per scrape job (AIMD adapts below it).
+    scraper_concurrency: int = 4
+    # Shared per-host pacing across all workers: "redis" (token bucket) or
+    # "local" (per-process politeness window only).
+    scraper_rate_limit_backend: str = "redis"
+    scraper_host_rate: float = 2.0  # requests/second per host, all workers
+    scraper_host_burst: int = 2
+    # Responses slower than this stop AIMD from growing concurrency.
+    scraper_slow_response_s: float = 2.0
+    # Cap on how long one Retry-After may pause a host. A pause longer than
+    # the running task has left ends it early, as at the soft time limit.
+    scraper_retry_after_max_s: float = 300.0
+    # Block-detection circuit breaker (per site, shared via Redis): this many
+    # block signals within the window open it for the cool-down, doubling on
+    # each failed half-open probe. 0 = detection only, no shared breaker.
+    scraper_breaker_threshold: int = 5
+    scraper_breaker_window_s: float = 120.0
+    scraper_breaker_cooldown_s: float = 300.0
+    scraper_breaker_max_cooldown_s: float = 3600.0
+    # Hard stop on results pages followed per search (guards pagination loops).
+    scraper_max_pages: int = 25
+    # On-disk conditional HTTP cache (ETag/Last-Modified). Blank = disabled.
+    scraper_cache_dir: str = ""
+    scraper_cache_max_mb: int = 256
+    # Scrape tasks commit listings in micro-batches of this many, or sooner
+    # once the oldest buffered listing is this many seconds old.
+    scraper_persist_batch_size: int = 10
+    scraper_persist_flush_s: float = 5.0
+    # Batches this large are COPYed into a staging table before the upsert
+    # instead of sent as one multi-row INSERT. 0 = never COPY.
+    scraper_persist_copy_threshold: int = 500
+    # "single": the whole job in one task (checkpoints, continuation tokens);
+    # "staged": search -> fetch -> score -> persist tasks on their own queues
+    # (app.scrape_pipeline), no checkpoints yet.
+    scraper_pipeline: str = "single"
+    # Search rows per detail-fetch task (and per score/persist task after it).
+    scraper_fetch_batch_size: int = 10
+    # Crawl frontier (app.crawl_frontier): how long a fetch worker may hold a
+    # leased row before it is handed out again, and how often it may fail.
+    scraper_frontier_lease_s: float = 300.0
+    scraper_frontier_max_attempts: int = 3
+    # Append-only archive of raw fetched pages for offline re-parsing
+    # (python -m app.reparse). Blank = disabled.
+    scraper_archive_dir: str = ""
+    scraper_archive_segment_mb: int = 256
+    # Max (city, query) jobs one POST /scrape/craigslist/batch may fan out to.
+    scrape_batch_max_jobs: int = 50
+    # Identical POST /scrape/craigslist requests join the queued/running job,
+    # or one that finished within this many seconds. 0 = never coalesce.
+    scrape_coalesce_window_s: int = 60
+    # HTML parser backend: "auto" (lxml when installed), "lxml" or "bs4".
+    scraper_html_parser: str = "auto"
+    # Known listings older than this are refetched; 0 = never refetch.
+    scraper_refresh_after_hours: int = 0
+    # Incremental crawl: recent post ids remembered per (city, query); a sweep
+    # stops at the first results page made only of these. 0 = always crawl fully.
+    scraper_watermark_ids: int = 1000
+    scraper_watermark_ttl_days: int = 14
+    # Celery beat crawl scheduler: every interval, hand this many requests to
+    # the (city, query) targets with the best recent yield of new listings
+    # per request. Budget 0 = no scheduled crawls.
+    scraper_schedule_interval_s: float = 900.0
+    scraper_schedule_budget: int = 120
+    scraper_schedule_max_requests: int = 40  # per target per tick
+    scraper_schedule_half_life_h: float = 24.0
+    scraper_schedule_target_ttl_days: int = 14  # since a user last asked
+    # Per-job checkpoints (done URLs + counters) that retries and
+    # continuation tokens resume from. 0 = no checkpoints.
+    scraper_checkpoint_ttl_h: int = 24
+    # Liveness checks (app.listing_liveness): every interval, HEAD up to
+    # batch_size active listings not checked within recheck_h (best deals and
+    # oldest posts first) and deactivate the deleted ones. Batch 0 = off.
+    scraper_liveness_interval_s: float = 3600.0
+    scraper_liveness_batch_size: int = 300
+    scraper_liveness_recheck_h: float = 24.0
+    scraper_liveness_concurrency: int = 16
+    # Probes not started within this many seconds wait for the next tick.
+    scraper_liveness_time_budget_s: float = 60.0
 
     # OAuth (social login). Leave a provider's id/secret blank to disable it.
     google_client_id: str = ""
@@ -1,18 +1,35 @@
-from datetime import datetime, timezone
-from typing import Any, Dict
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
 
-from sqlalchemy import select
+from celery.exceptions import SoftTimeLimitExceeded
 
 from .celery_app import celery_app
+from .circuit_breaker import CircuitBreaker, ScraperBlocked
+from .crawl_scheduler import CrawlScheduler, PlannedSweep
+from .crawl_watermarks import WatermarkStore
 from .db import SyncSessionLocal
-from .models import Listing
-from .scraper_craigslist import search_craigslist_cars
+from .http_client import pool_stats
+from .listing_liveness import check_listings, due_statement, record
+from .listing_record import ListingRecord
+from .listing_writer import MicroBatcher, persist_listings
+from .scrape_checkpoints import Checkpoint, CheckpointStore
+from .scrape_coalescing import join_or_claim, release, settle
+from .scrape_pipeline import COUNTERS, make_claim, make_skip_known, run_search_stage
+from .scraper_craigslist import iter_craigslist_cars
+from .seen_index import SeenIndex
+from .settings import settings
+
+# Crawl-frontier priority of beat-scheduled sweeps (user requests use 0).
+SCHEDULED_PRIORITY = -1
 
 
 @celery_app.task(
     bind=True,
     name="scrape.craigslist",
     autoretry_for=(Exception,),
+    # Retrying into a block only burns worker slots; the breaker decides.
+    dont_autoretry_for=(ScraperBlocked,),
     retry_backoff=True,
     retry_backoff_max=30,
     max_retries=3,
@@ -22,68 +39,189 @@ def scrape_craigslist_task(
     city: str,
     query: str,
     max_results: int = 10,
+    batch_id: Optional[str] = None,
+    continuation: Optional[str] = None,
+    priority: int = 0,
 ) -> Dict[str, Any]:
     self.update_state(
         state="PROGRESS",
         meta={"stage": "scraping", "city": city, "query": query},
     )
+    if settings.scraper_pipeline == "staged" and continuation is None:
+        return run_search_stage(self, city, query, max_results, batch_id, priority)
 
-    raw_listings = search_craigslist_cars(
-        city=city, query=query, max_results=max_results
-    )
+    # Single-task mode from here on (continuations always resume in it).
+    # Autoretries keep the task id, so they resume this job's checkpoint.
+    token = continuation or self.request.id
+    checkpoints = CheckpointStore.from_settings()
+    checkpoint = checkpoints.load(token)
+    if checkpoint is None or not checkpoint.matches(city, query):
+        checkpoint = Checkpoint(city, query, max_results)
 
-    self.update_state(
-        state="PROGRESS",
-        meta={"stage": "persisting", "fetched": len(raw_listings)},
+    requests_before = pool_stats()["requests"]
+    seen = SeenIndex.from_settings()
+    watermarks = WatermarkStore.from_settings()
+    watermark = watermarks.load(city, query)
+    already_stored: List[str] = []
+    counters = {**dict.fromkeys(COUNTERS, 0), **checkpoint.counters}
+    checkpoint.counters = counters
+    skip_known = make_skip_known(
+        seen, counters, already_stored, resumed=frozenset(checkpoint.done)
     )
 
-    inserted = 0
-    skipped = 0
+    fetched_urls: List[str] = []
+    interrupted = False
+    blocked: Optional[ScraperBlocked] = None
+
+    def report_progress() -> None:
+        self.update_state(
+            state="PROGRESS",
+            meta={"stage": "scraping", "city": city, "query": query, **counters},
+        )
 
     with SyncSessionLocal() as session:
-        for item in raw_listings:
-            if not item.get("listed_price"):
-                skipped += 1
-                continue
-
-            already = session.execute(
-                select(Listing.id).where(Listing.url == item["url"])
-            ).scalar_one_or_none()
-            if already:
-                skipped += 1
-                continue
-
-            predicted_price = int(item["listed_price"] * 1.15)
-            undervalue_percent = (
-                (predicted_price - item["listed_price"]) / predicted_price * 100
-            )
 
-            session.add(
-                Listing(
-                    source=item["source"],
-                    url=item["url"],
-                    title=item["title"],
-                    description=item.get("description"),
-                    listed_price=item["listed_price"],
-                    predicted_price=predicted_price,
-                    undervalue_percent=undervalue_percent,
-                    year=item.get("year") or 0,
-                    make=item["make"],
-                    model=item["model"],
-                    mileage=item.get("mileage"),
-                    location=item["location"],
-                    created_at=datetime.now(timezone.utc),
-                    posted_at=item["posted_at"],
-                )
+        def write_batch(items: List[ListingRecord]) -> None:
+            outcome = persist_listings(session, items)
+            session.commit()
+            seen.mark(outcome.persisted_urls)
+            counters["inserted"] += outcome.inserted
+            counters["updated"] += outcome.updated
+            counters["skipped"] += outcome.skipped
+            # Pre-filtered URLs too: a resumed sweep must not count them again.
+            checkpoints.save(
+                token, checkpoint, [item.url for item in items] + already_stored
             )
-            inserted += 1
+            report_progress()
 
-        session.commit()
+        batcher: MicroBatcher[ListingRecord] = MicroBatcher(
+            write_batch,
+            size=settings.scraper_persist_batch_size,
+            interval=settings.scraper_persist_flush_s,
+        )
+        listings = iter_craigslist_cars(
+            city=city,
+            query=query,
+            max_results=max(0, max_results - counters["fetched"]),
+            skip_known=skip_known,
+            page_already_seen=watermark.covers if watermarks.enabled else None,
+            claim=make_claim(batch_id, self.request.id, counters),
+        )
+        try:
+            for item in listings:
+                counters["fetched"] += 1
+                fetched_urls.append(item.url)
+                batcher.add(item)
+        except SoftTimeLimitExceeded:  # incl. the pacer's TimeBudgetExhausted
+            # Keep what is buffered and hand back a continuation token; the
+            # hard time limit is still task_time_limit away.
+            interrupted = True
+            session.rollback()
+        except ScraperBlocked as exc:
+            # Still fails the task (no autoretry), but what was fetched
+            # before the block is written and checkpointed, not re-fetched.
+            blocked = exc
+        finally:
+            listings.close()
+        batcher.flush()
+
+    if blocked is not None:
+        checkpoints.save(token, checkpoint, already_stored)
+        raise blocked
+
+    # One job per worker process at a time, so the pool delta is this sweep's.
+    CrawlScheduler.from_settings().record(
+        city, query, counters["inserted"], pool_stats()["requests"] - requests_before
+    )
+    result: Dict[str, Any] = {"city": city, "query": query, **counters}
+
+    if interrupted:
+        # A partial result must not be handed to identical requests.
+        release(city, query, max_results, self.request.id)
+        checkpoints.save(token, checkpoint, already_stored)
+        return {
+            **result,
+            "partial": True,
+            "continuation": token if checkpoints.enabled else None,
+        }
+
+    # Only after every batch committed: a failed sweep must not move the mark.
+    watermarks.advance(city, query, watermark, fetched_urls + already_stored)
+    checkpoints.clear(token)
+    # Identical requests arriving in the next few seconds reuse this result.
+    settle(city, query, max_results, self.request.id)
+    return result
 
+
+@celery_app.task(name="scrape.schedule")
+def schedule_crawls_task() -> Dict[str, Any]:
+    """Celery beat: spend this tick's request budget on the best targets."""
+    scheduler = CrawlScheduler.from_settings()
+    if CircuitBreaker.from_settings().open_for("https://craigslist.org/") is not None:
+        return {"enqueued": 0, "budget": scheduler.budget, "reason": "breaker open"}
+
+    planned = scheduler.plan()
+    enqueued: List[PlannedSweep] = []
+    for sweep in planned:
+        # Same single-flight claim as POST /scrape/craigslist: a target
+        # already queued or running is not crawled twice.
+        job_id = str(uuid4())
+        if join_or_claim(sweep.city, sweep.query, sweep.max_results, job_id) is not None:
+            continue
+        try:
+            scrape_craigslist_task.apply_async(
+                kwargs={
+                    "city": sweep.city,
+                    "query": sweep.query,
+                    "max_results": sweep.max_results,
+                    # Frontier rows of user-requested scrapes are fetched first.
+                    "priority": SCHEDULED_PRIORITY,
+                },
+                task_id=job_id,
+            )
+        except Exception:
+            release(sweep.city, sweep.query, sweep.max_results, job_id)
+            raise
+        enqueued.append(sweep)
     return {
-        "city": city,
-        "query": query,
-        "fetched": len(raw_listings),
-        "inserted": inserted,
-        "skipped": skipped,
+        "enqueued": len(enqueued),
+        "in_flight": len(planned) - len(enqueued),
+        "budget": scheduler.budget,
+        "targets": [
+            {
+                "city": sweep.city,
+                "query": sweep.query,
+                "max_results": sweep.max_results,
+                "score": round(sweep.score, 3),
+            }
+            for sweep in enqueued
+        ],
     }
+
+
+@celery_app.task(
+    name="scrape.liveness",
+    # Probes stop starting after the time budget; leave room for the last ones.
+    soft_time_limit=settings.scraper_liveness_time_budget_s + settings.scraper_request_timeout + 10,
+    time_limit=settings.scraper_liveness_time_budget_s + settings.scraper_request_timeout + 40,
+)
+def check_liveness_task() -> Dict[str, Any]:
+    """Celery beat: re-check the most visible active listings, retire dead ones."""
+    if settings.scraper_liveness_batch_size <= 0:
+        return {"checked": 0, "reason": "disabled"}
+    if CircuitBreaker.from_settings().open_for("https://craigslist.org/") is not None:
+        return {"checked": 0, "reason": "breaker open"}
+
+    with SyncSessionLocal() as session:
+        due = session.execute(
+            due_statement(
+                settings.scraper_liveness_batch_size,
+                timedelta(hours=settings.scraper_liveness_recheck_h),
+            )
+        ).all()
+    # No DB connection held while the probes run.
+    report = check_listings([(row.id, row.url) for row in due])
+    with SyncSessionLocal() as session:
+        record(session, report)
+        session.commit()
+    return {"checked": len(due), **report.counts()}
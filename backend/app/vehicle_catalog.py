@@ -0,0 +1,301 @@
+"""Make/model catalog and the compiled matcher behind ``_parse_make_model``.
+
+The catalog (make aliases + per-make model names) is compiled once at import
+into regexes: every alias/model is split into the same tokens the title
+tokenizer produces, and a title is classified by one make search and one
+anchored model match, each taking the longest catalogued entry. That handles
+multi-word makes ("Land Rover", "Alfa Romeo") and models ("Grand Cherokee",
+"Range Rover Sport"), spelling variants ("F150" / "F-150" / "F 150") and
+aliases ("Chevy", "VW") without a per-token probe loop.
+
+When a make is found but no catalogued model follows, the model falls back to
+the next non-year token, capitalized (the original heuristic), so unknown
+trims and new models still get a best-effort value.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Dict, Iterable, List, Tuple
+
+UNKNOWN = "Unknown"
+
+# Lowercased alias (one or more tokens) -> canonical make.
+MAKE_ALIASES: Dict[str, str] = {
+    "acura": "Acura",
+    "alfa romeo": "Alfa Romeo",
+    "alfa": "Alfa Romeo",
+    "aston martin": "Aston Martin",
+    "audi": "Audi",
+    "bentley": "Bentley",
+    "bmw": "BMW",
+    "buick": "Buick",
+    "cadillac": "Cadillac",
+    "chevrolet": "Chevrolet",
+    "chevy": "Chevrolet",
+    "chrysler": "Chrysler",
+    "dodge": "Dodge",
+    "ferrari": "Ferrari",
+    "fiat": "Fiat",
+    "ford": "Ford",
+    "genesis": "Genesis",
+    "gmc": "GMC",
+    "honda": "Honda",
+    "hummer": "Hummer",
+    "hyundai": "Hyundai",
+    "infiniti": "Infiniti",
+    "jaguar": "Jaguar",
+    "jeep": "Jeep",
+    "kia": "Kia",
+    "lamborghini": "Lamborghini",
+    "land rover": "Land Rover",
+    "land-rover": "Land Rover",
+    "landrover": "Land Rover",
+    "lexus": "Lexus",
+    "lincoln": "Lincoln",
+    "maserati": "Maserati",
+    "mazda": "Mazda",
+    "mercedes": "Mercedes-Benz",
+    "mercedes-benz": "Mercedes-Benz",
+    "mercedes benz": "Mercedes-Benz",
+    "benz": "Mercedes-Benz",
+    "mercury": "Mercury",
+    "mini": "Mini",
+    "mitsubishi": "Mitsubishi",
+    "nissan": "Nissan",
+    "pontiac": "Pontiac",
+    "porsche": "Porsche",
+    "ram": "Ram",
+    "saab": "Saab",
+    "saturn": "Saturn",
+    "scion": "Scion",
+    "smart": "Smart",
+    "subaru": "Subaru",
+    "suzuki": "Suzuki",
+    "tesla": "Tesla",
+    "toyota": "Toyota",
+    "volkswagen": "Volkswagen",
+    "vw": "Volkswagen",
+    "volvo": "Volvo",
+}
+
+# Canonical make -> canonical model names (models, not trims: "Golf", not
+# "Golf GTI"). Hyphen/space spelling variants are derived automatically (see
+# ``_model_variants``).
+MODEL_CATALOG: Dict[str, Tuple[str, ...]] = {
+    "Acura": ("ILX", "Integra", "MDX", "RDX", "RSX", "TL", "TLX", "TSX"),
+    "Alfa Romeo": ("Giulia", "Stelvio", "4C"),
+    "Audi": ("A3", "A4", "A5", "A6", "A8", "Q3", "Q5", "Q7", "Q8", "S4", "TT", "e-tron"),
+    "BMW": (
+        "1 Series", "2 Series", "3 Series", "4 Series", "5 Series", "7 Series",
+        "X1", "X3", "X5", "X6", "Z4", "M3", "M5", "i3",
+    ),
+    "Buick": ("Enclave", "Encore", "LaCrosse", "Lucerne", "Regal"),
+    "Cadillac": ("ATS", "CTS", "DTS", "Escalade", "SRX", "XT5"),
+    "Chevrolet": (
+        "Avalanche", "Blazer", "Bolt", "Camaro", "Colorado", "Corvette", "Cruze",
+        "Equinox", "Express", "Impala", "Malibu", "Silverado", "Sonic", "Spark",
+        "Suburban", "Tahoe", "Trailblazer", "Traverse", "Volt",
+    ),
+    "Chrysler": ("200", "300", "Pacifica", "Town & Country"),
+    "Dodge": (
+        "Challenger", "Charger", "Dakota", "Dart", "Durango", "Grand Caravan",
+        "Journey", "Neon", "Ram", "Viper",
+    ),
+    "Fiat": ("500", "500X", "124 Spider"),
+    "Ford": (
+        "Bronco", "Bronco Sport", "C-Max", "E-150", "E-250", "E-350", "Edge",
+        "Escape", "Excursion", "Expedition", "Explorer", "F-150", "F-250",
+        "F-350", "Fiesta", "Flex", "Focus", "Fusion", "Maverick",
+        "Mustang", "Ranger", "Taurus", "Transit", "Transit Connect",
+    ),
+    "Genesis": ("G70", "G80", "G90", "GV70", "GV80"),
+    "GMC": ("Acadia", "Canyon", "Savana", "Sierra", "Terrain", "Yukon"),
+    "Honda": (
+        "Accord", "Civic", "CR-V", "CR-Z", "Element", "Fit", "HR-V", "Insight",
+        "Odyssey", "Passport", "Pilot", "Ridgeline", "S2000",
+    ),
+    "Hyundai": (
+        "Accent", "Elantra", "Genesis", "Ioniq", "Kona", "Palisade",
+        "Santa Fe", "Sonata", "Tucson", "Veloster",
+    ),
+    "Infiniti": ("G35", "G37", "Q50", "Q60", "QX50", "QX60", "QX80"),
+    "Jaguar": ("F-Pace", "F-Type", "XE", "XF", "XJ"),
+    "Jeep": (
+        "Cherokee", "Compass", "Gladiator", "Grand Cherokee", "Grand Wagoneer",
+        "Liberty", "Patriot", "Renegade", "Wagoneer", "Wrangler",
+    ),
+    "Kia": (
+        "Forte", "K5", "Niro", "Optima", "Rio", "Sedona", "Sorento", "Soul",
+        "Sportage", "Stinger", "Telluride",
+    ),
+    "Land Rover": (
+        "Defender", "Discovery", "Discovery Sport", "LR2", "LR3", "LR4",
+        "Range Rover", "Range Rover Evoque", "Range Rover Sport",
+        "Range Rover Velar",
+    ),
+    "Lexus": ("ES", "GS", "GX", "IS", "LS", "LX", "NX", "RX"),
+    "Lincoln": ("Aviator", "Continental", "MKX", "MKZ", "Navigator", "Town Car"),
+    "Mazda": ("CX-3", "CX-30", "CX-5", "CX-9", "Mazda3", "Mazda6", "MX-5", "Miata", "Tribute"),
+    "Mercedes-Benz": (
+        "C-Class", "CLA", "E-Class", "G-Class", "GLA", "GLC", "GLE", "ML",
+        "S-Class", "Sprinter",
+    ),
+    "Mini": ("Clubman", "Cooper", "Countryman"),
+    "Mitsubishi": ("Eclipse", "Galant", "Lancer", "Mirage", "Outlander", "Outlander Sport"),
+    "Nissan": (
+        "350Z", "370Z", "Altima", "Armada", "Frontier", "Juke", "Leaf",
+        "Maxima", "Murano", "Pathfinder", "Rogue", "Rogue Sport", "Sentra",
+        "Titan", "Versa", "Xterra",
+    ),
+    "Porsche": ("911", "Boxster", "Cayenne", "Cayman", "Macan", "Panamera", "Taycan"),
+    "Ram": ("1500", "2500", "3500", "ProMaster", "ProMaster City"),
+    "Subaru": (
+        "Ascent", "BRZ", "Crosstrek", "Forester", "Impreza", "Legacy",
+        "Outback", "WRX",
+    ),
+    "Tesla": ("Model 3", "Model S", "Model X", "Model Y", "Cybertruck"),
+    "Toyota": (
+        "4Runner", "86", "Avalon", "C-HR", "Camry", "Corolla", "Highlander",
+        "Land Cruiser", "Prius", "RAV4", "Sequoia", "Sienna", "Supra",
+        "Tacoma", "Tundra", "Venza", "Yaris",
+    ),
+    "Volkswagen": (
+        "Atlas", "Beetle", "CC", "Golf", "GTI", "Jetta", "Passat",
+        "Tiguan", "Touareg",
+    ),
+    "Volvo": ("S60", "S90", "V60", "XC40", "XC60", "XC90"),
+}
+
+_TOKEN_RE = re.compile(r"[A-Za-z0-9\-]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text)
+
+
+def _model_variants(name: str) -> List[List[str]]:
+    """Token spellings of a model name: 'F-150' -> f-150 / f150 / f 150."""
+    lowered = name.lower().replace("&", " ")
+    tokens = tokenize(lowered)
+    variants = [tokens, tokenize(lowered.replace("-", "")), tokenize(lowered.replace("-", " "))]
+    if len(variants[1]) > 1 and any(c.isdigit() for c in lowered):
+        variants.append(["".join(variants[1])])  # "Model 3" -> "model3"
+    return [v for v in variants if v]
+
+
+# Token characters / separators, as ``tokenize`` splits them (on lowercased text).
+_TOKEN_CHARS = "a-z0-9\\-"
+_SEP = "[^%s]+" % _TOKEN_CHARS
+_BOUNDARY_BEFORE = "(?<![%s])" % _TOKEN_CHARS
+_BOUNDARY_AFTER = "(?![%s])" % _TOKEN_CHARS
+_YEAR_SKIP = "(?:(?:19[89]\\d|20[0-4]\\d)%s(?:%s|$))*" % (_BOUNDARY_AFTER, _SEP)
+
+
+def _alternation(entries: Iterable[List[str]]) -> str:
+    """Regex matching any token sequence in ``entries``, most tokens first.
+
+    Regex alternation is leftmost-first, so ordering by token count makes it
+    pick the longest catalogued entry, like the trie walk it replaces.
+    """
+    unique = {tuple(tokens) for tokens in entries}
+    ordered = sorted(unique, key=lambda tokens: (-len(tokens), tokens))
+    return "|".join(_SEP.join(re.escape(t) for t in tokens) for tokens in ordered)
+
+
+class CatalogMatcher:
+    """Compiled make/model matcher; build once, classify many titles.
+
+    One make regex plus one model regex per make: a title is classified by
+    two C-level regex matches instead of a Python walk over its tokens.
+    """
+
+    def __init__(
+        self,
+        make_aliases: Dict[str, str],
+        model_catalog: Dict[str, Tuple[str, ...]],
+    ) -> None:
+        # Alias/variant tokens joined by spaces -> canonical name.
+        self._makes: Dict[str, str] = {}
+        for alias, make in make_aliases.items():
+            self._makes.setdefault(" ".join(tokenize(alias.lower())), make)
+        self._make_re = re.compile(
+            "%s(?:%s)%s"
+            % (
+                _BOUNDARY_BEFORE,
+                _alternation(key.split(" ") for key in self._makes),
+                _BOUNDARY_AFTER,
+            )
+        )
+
+        self._models: Dict[str, Dict[str, str]] = {}
+        self._model_res: Dict[str, "re.Pattern[str]"] = {}
+        for make in set(make_aliases.values()):
+            variants: Dict[str, str] = {}
+            for model in model_catalog.get(make, ()):
+                for variant in _model_variants(model):
+                    variants.setdefault(" ".join(variant), model)
+            self._models[make] = variants
+            model_alt = _alternation(key.split(" ") for key in variants)
+            # After the make: skip years, then a catalogued model or, failing
+            # that, the next token (capitalized by ``_model_after``).
+            self._model_res[make] = re.compile(
+                "(?:%s)?%s(?:(?P<model>%s)%s|(?P<token>[%s]+))?"
+                % (
+                    _SEP,
+                    _YEAR_SKIP,
+                    model_alt or "(?!)",
+                    _BOUNDARY_AFTER,
+                    _TOKEN_CHARS,
+                )
+            )
+
+    def classify(self, title: str) -> Tuple[str, str]:
+        """(make, model) for one title; 'Unknown' for whatever is not found."""
+        if not title:
+            return UNKNOWN, UNKNOWN
+        return self._classify_lowered(title.lower())
+
+    def classify_many(self, titles: Iterable[str]) -> List[Tuple[str, str]]:
+        """Batch form of ``classify``.
+
+        Titles are lowercased once and deduplicated on that normalised form
+        (re-posts and case variants are matched once).
+        """
+        memo: Dict[str, Tuple[str, str]] = {}
+        out: List[Tuple[str, str]] = []
+        for title in titles:
+            key = title.lower() if title else ""
+            result = memo.get(key)
+            if result is None:
+                result = memo[key] = (
+                    self._classify_lowered(key) if key else (UNKNOWN, UNKNOWN)
+                )
+            out.append(result)
+        return out
+
+    def _classify_lowered(self, lowered: str) -> Tuple[str, str]:
+        found = self._make_re.search(lowered)
+        if found is None:
+            return UNKNOWN, UNKNOWN
+        make = self._makes[" ".join(tokenize(found.group()))]
+        return make, self._model_after(make, lowered, found.end())
+
+    def _model_after(self, make: str, lowered: str, start: int) -> str:
+        found = self._model_res[make].match(lowered, start)
+        model = found.group("model")
+        if model is not None:
+            return self._models[make][" ".join(tokenize(model))]
+        token = found.group("token")
+        return token.capitalize() if token else UNKNOWN
+
+
+MATCHER = CatalogMatcher(MAKE_ALIASES, MODEL_CATALOG)
+
+
+def classify_title(title: str) -> Tuple[str, str]:
+    return MATCHER.classify(title)
+
+
+def classify_titles(titles: Iterable[str]) -> List[Tuple[str, str]]:
+    return MATCHER.classify_many(titles)
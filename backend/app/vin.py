@@ -0,0 +1,62 @@
+"""VIN extraction with check-digit validation.
+
+Sellers often paste the VIN into the description (or Craigslist shows it in
+the attribute group as ``vin: ...``), and the same car is frequently posted
+under several titles and cities. A validated VIN is therefore the strongest
+cross-listing identity we have: ``listings.vin`` is indexed and
+``persist_listings`` collapses every later posting of a VIN into the deal
+stored first.
+
+Only 17-character VINs whose position-9 check digit is correct (ISO 3779 /
+49 CFR 565, mandatory for North-American vehicles since 1981) are accepted,
+which rules out phone numbers, stock numbers and typos. I, O and Q never
+appear in a VIN, so a candidate containing them is not one.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Dict, Optional
+
+# Not preceded/followed by another alphanumeric: a VIN is a whole token.
+_CANDIDATE_RE = re.compile(r"(?<![A-Za-z0-9])[A-HJ-NPR-Za-hj-npr-z0-9]{17}(?![A-Za-z0-9])")
+
+_TRANSLITERATION: Dict[str, int] = {
+    **{str(digit): digit for digit in range(10)},
+    **dict(zip("ABCDEFGH", range(1, 9))),
+    **dict(zip("JKLMN", range(1, 6))),
+    "P": 7,
+    "R": 9,
+    **dict(zip("STUVWXYZ", range(2, 10))),
+}
+
+_WEIGHTS = (8, 7, 6, 5, 4, 3, 2, 10, 0, 9, 8, 7, 6, 5, 4, 3, 2)
+
+
+def check_digit(vin: str) -> str:
+    """Expected position-9 character (``"0"``–``"9"`` or ``"X"``) for ``vin``."""
+    total = sum(_TRANSLITERATION[ch] * w for ch, w in zip(vin.upper(), _WEIGHTS))
+    remainder = total % 11
+    return "X" if remainder == 10 else str(remainder)
+
+
+def is_valid_vin(vin: str) -> bool:
+    vin = vin.upper()
+    if len(vin) != 17 or not all(ch in _TRANSLITERATION for ch in vin):
+        return False
+    # "11111111111111111" and friends pass the checksum but are placeholders.
+    if len(set(vin)) == 1:
+        return False
+    return vin[8] == check_digit(vin)
+
+
+def extract_vin(*texts: Optional[str]) -> Optional[str]:
+    """First valid VIN found in ``texts`` (in order), uppercased, or None."""
+    for text in texts:
+        if not text:
+            continue
+        for match in _CANDIDATE_RE.finditer(text):
+            candidate = match.group(0).upper()
+            if is_valid_vin(candidate):
+                return candidate
+    return None
@@ -0,0 +1,116 @@
+"""Memory and copy cost of one sweep's listings: loose dicts vs ``ListingRecord``.
+
+Replays the scrape -> persist path for a synthetic sweep without any I/O:
+a results-page row is built, enriched with the detail-page fields and
+scored, the way the scraper and writer do it. The dict path copies the row
+at each step (``{**row, ...}``, as the code did before ``app.listing_record``);
+the record path fills one slotted record in place. Reports retained memory
+per listing (tracemalloc), dict copies made and wall time.
+
+    cd backend
+    python -m benchmarks.listing_record --listings 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Tuple
+
+from app.listing_record import ListingRecord
+
+_POSTED = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _search_fields(n: int) -> Dict[str, Any]:
+    return {
+        "source": "craigslist",
+        "url": f"https://austin.craigslist.org/cto/d/civic/{7700000000 + n}.html",
+        "title": f"2015 Honda Civic LX {n}",
+        "listed_price": 5000 + n,
+        "location": "Austin",
+        "make": "Honda",
+        "model": "Civic",
+        "external_id": 7700000000 + n,
+        "year": 2015,
+    }
+
+
+def _detail_fields(n: int) -> Dict[str, Any]:
+    return {
+        "mileage": 78000 + n,
+        "attributes": {"condition": "excellent", "drive": "fwd", "title_status": "clean"},
+        "posted_at": _POSTED,
+        "description": f"Clean title, runs great. Listing {n}.",
+        "vin": None,
+    }
+
+
+def dict_path(count: int) -> Tuple[List[Dict[str, Any]], int]:
+    """The pre-record pipeline: a new dict at every step."""
+    listings: List[Dict[str, Any]] = []
+    copies = 0
+    for n in range(count):
+        row = _search_fields(n)
+        listing = {**row, "description": None, "mileage": None, "attributes": {}, "vin": None}
+        listing.update(_detail_fields(n))
+        predicted = int(listing["listed_price"] * 1.15)
+        listing = {
+            **listing,
+            "predicted_price": predicted,
+            "undervalue_percent": (predicted - listing["listed_price"]) / predicted * 100,
+        }
+        copies += 2
+        listings.append(listing)
+    return listings, copies
+
+
+def record_path(count: int) -> Tuple[List[ListingRecord], int]:
+    listings: List[ListingRecord] = []
+    for n in range(count):
+        record = ListingRecord(**_search_fields(n))
+        record.apply_detail(_detail_fields(n))
+        listings.append(record.score())
+    return listings, 0
+
+
+def measure(run: Callable[[int], Tuple[List[Any], int]], count: int) -> Dict[str, float]:
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    listings, copies = run(count)
+    elapsed = time.perf_counter() - started
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del listings
+    return {"retained": retained, "peak": peak, "copies": copies, "seconds": elapsed}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--listings", type=int, default=10_000)
+    args = parser.parse_args()
+
+    count = args.listings
+    print(f"sweep: {count:,} listings")
+    results = [("dicts", measure(dict_path, count)), ("ListingRecord", measure(record_path, count))]
+    for name, result in results:
+        print(
+            f"{name:14} {result['retained'] / count:7.0f} B/listing retained"
+            f"  {result['peak'] / 2**20:6.1f} MiB peak"
+            f"  {result['copies']:7,.0f} copies"
+            f"  {result['seconds'] * 1000:7.1f} ms"
+        )
+    before, after = results[0][1], results[1][1]
+    print(
+        f"saved: {(before['retained'] - after['retained']) / count:.0f} B/listing"
+        f" ({1 - after['retained'] / before['retained']:.0%}),"
+        f" {before['copies'] - after['copies']:,.0f} copies"
+    )
+
+
+if __name__ == "__main__":
+    main()
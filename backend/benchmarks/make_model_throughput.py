@@ -0,0 +1,103 @@
+"""Make/model classification throughput on a large synthetic title corpus.
+
+Compares the compiled catalog matcher (``app.vehicle_catalog``) with the
+original single-token ``KNOWN_MAKES`` scan it replaced, and reports how many
+titles each resolves to a catalogued model.
+
+    cd backend
+    python -m benchmarks.make_model_throughput --titles 200000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import time
+from typing import Dict, List, Tuple
+
+from app.vehicle_catalog import MAKE_ALIASES, MODEL_CATALOG, classify_title, classify_titles
+
+_TOKENS_RE = re.compile(r"[A-Za-z0-9\-]+")
+_YEAR_RE = re.compile(r"\b(19[8-9]\d|20[0-4]\d)\b")
+
+# Single-token aliases only: all the original scan could ever match.
+_LEGACY_MAKES: Dict[str, str] = {
+    alias: make for alias, make in MAKE_ALIASES.items() if " " not in alias
+}
+
+_NOISE = (
+    "clean title", "low miles", "one owner", "runs great", "must see", "4x4",
+    "obo", "cash only", "new tires", "loaded", "LX", "XLT", "Limited", "SE",
+)
+_JUNK_TITLES = ("couch for sale", "tires 225/45r17", "truck toolbox", "wanted: cars")
+
+
+def legacy_parse_make_model(title: str) -> Tuple[str, str]:
+    """The pre-catalog ``_parse_make_model``, kept here for comparison."""
+    if not title:
+        return "Unknown", "Unknown"
+    tokens = _TOKENS_RE.findall(title)
+    lowered = [t.lower() for t in tokens]
+    for idx, token in enumerate(lowered):
+        make = _LEGACY_MAKES.get(token)
+        if make is None:
+            continue
+        model = "Unknown"
+        for follow in tokens[idx + 1 :]:
+            if _YEAR_RE.fullmatch(follow):
+                continue
+            model = follow.capitalize()
+            break
+        return make, model
+    return "Unknown", "Unknown"
+
+
+def build_corpus(size: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    aliases = list(MAKE_ALIASES.items())
+    titles: List[str] = []
+    for _ in range(size):
+        if rng.random() < 0.05:
+            titles.append(rng.choice(_JUNK_TITLES))
+            continue
+        alias, make = rng.choice(aliases)
+        model = rng.choice(MODEL_CATALOG.get(make) or ("Special",))
+        parts = [str(rng.randint(1995, 2024)), alias.title(), model]
+        parts += rng.sample(_NOISE, rng.randint(0, 3))
+        titles.append(" ".join(parts))
+    return titles
+
+
+def _catalogued(results: List[Tuple[str, str]]) -> int:
+    return sum(
+        1 for make, model in results if model in MODEL_CATALOG.get(make, ())
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--titles", type=int, default=200_000)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.titles)
+    unique = len(set(corpus))
+    print(f"corpus: {len(corpus):,} titles ({unique:,} unique)")
+
+    runs = [
+        ("legacy scan", lambda: [legacy_parse_make_model(t) for t in corpus]),
+        ("catalog, per title", lambda: [classify_title(t) for t in corpus]),
+        ("catalog, batch", lambda: classify_titles(corpus)),
+    ]
+    for name, run in runs:
+        started = time.perf_counter()
+        results = run()
+        elapsed = time.perf_counter() - started
+        print(
+            f"{name:20} {elapsed:7.2f} s {len(corpus) / elapsed:12,.0f} titles/s"
+            f"   catalogued model: {_catalogued(results) / len(corpus):6.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Parse-throughput comparison of the scraper's HTML backends.
+
+Builds a large synthetic results page (the ``tests/fixtures`` rows repeated)
+and times search-page and detail-page parsing for every available backend,
+after checking they produce identical listings.
+
+    cd backend
+    python -m benchmarks.parse_throughput            # defaults
+    python -m benchmarks.parse_throughput --rows 360 --repeat 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import time
+from pathlib import Path
+from typing import Callable, List
+
+from app import scraper_craigslist as scr
+from app.html_backends import Bs4Backend, LxmlBackend, lxml_available
+
+FIXTURES = Path(__file__).resolve().parent.parent / "tests" / "fixtures"
+
+_ROW_RE = re.compile(r"<li class=\"cl-static-search-result\".*?</li>", re.DOTALL)
+
+
+def synthetic_search_page(rows: int) -> str:
+    """The fixture results page with its rows cloned up to ``rows`` entries."""
+    template = (FIXTURES / "search_results.html").read_text(encoding="utf-8")
+    originals = _ROW_RE.findall(template)
+    clones: List[str] = []
+    for i in range(rows):
+        row = originals[i % len(originals)]
+        clones.append(re.sub(r"77000000\d\d", f"{7800000000 + i}", row))
+    start = template.index(originals[0])
+    end = template.index(originals[-1]) + len(originals[-1])
+    return template[:start] + "\n".join(clones) + template[end:]
+
+
+def _time_per_call(fn: Callable[[], object], repeat: int) -> float:
+    fn()  # warm-up
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=120, help="rows per results page")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    search_html = synthetic_search_page(args.rows)
+    detail_html = (FIXTURES / "detail.html").read_text(encoding="utf-8")
+
+    backends = [Bs4Backend()]
+    if lxml_available():
+        backends.append(LxmlBackend())
+    else:
+        print("lxml is not installed; only the bs4 backend is measured")
+
+    reference = scr._parse_search_results(search_html, "austin", backend=backends[0])
+    for backend in backends[1:]:
+        other = scr._parse_search_results(search_html, "austin", backend=backend)
+        assert other == reference, f"{backend.name} disagrees with bs4"
+
+    print(f"{'backend':8} {'search page':>14} {'rows/s':>10} {'detail page':>14} {'pages/s':>10}")
+    baseline = None
+    for backend in backends:
+        search_s = _time_per_call(
+            lambda: scr._parse_search_results(search_html, "austin", backend=backend),
+            args.repeat,
+        )
+        detail_s = _time_per_call(
+            lambda: scr._parse_detail(detail_html, backend=backend), args.repeat * 10
+        )
+        speedup = ""
+        if baseline is None:
+            baseline = (search_s, detail_s)
+        else:
+            speedup = (
+                f"  ({baseline[0] / search_s:.1f}x search, "
+                f"{baseline[1] / detail_s:.1f}x detail)"
+            )
+        print(
+            f"{backend.name:8} {search_s * 1000:11.2f} ms {len(reference) / search_s:10.0f} "
+            f"{detail_s * 1000:11.3f} ms {1 / detail_s:10.0f}{speedup}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""End-to-end scraper throughput against a local Craigslist stand-in.
+
+Serves synthetic results/detail pages (built from the ``tests/fixtures``
+templates) from a local threaded HTTP server with configurable latency and
+error rate, points ``iter_craigslist_cars`` at it and reports, per
+``max_results``:
+
+* listings/s (wall clock),
+* cumulative time spent in HTTP requests vs. HTML parsing (summed over the
+  detail-fetch threads, so they can exceed wall time),
+* peak RSS of the scraping process,
+* TCP connections opened (``--jobs N`` runs N back-to-back jobs in the same
+  process, like consecutive tasks on one worker sharing its pooled client).
+
+Each measurement runs in a fresh subprocess so peak RSS is per run. Fully
+offline.
+
+    cd backend
+    python -m benchmarks.scraper_bench
+    python -m benchmarks.scraper_bench --max-results 50 500 2000 \\
+        --latency-ms 80 --error-rate 0.02 --concurrency 8 --parser bs4
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import re
+import resource
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES = Path(__file__).resolve().parent.parent / "tests" / "fixtures"
+
+_ROW_RE = re.compile(r"<li class=\"cl-static-search-result\".*?</li>", re.DOTALL)
+_MAKES = ("Honda Civic", "Ford F-150", "Toyota Camry", "Jeep Grand Cherokee", "Subaru Outback")
+
+
+# ── Synthetic Craigslist ──────────────────────────────────────────────────────
+
+
+class SyntheticSite:
+    def __init__(self, inventory: int, page_size: int, base_url: str) -> None:
+        search = (FIXTURES / "search_results.html").read_text(encoding="utf-8")
+        self._row_template = _ROW_RE.findall(search)[0]
+        start = search.index(self._row_template)
+        end = search.rindex("</li>") + len("</li>")
+        self._page_head, self._page_tail = search[:start], search[end:]
+        self._detail = (FIXTURES / "detail.html").read_text(encoding="utf-8")
+        self.inventory = inventory
+        self.page_size = page_size
+        self.base_url = base_url
+
+    def search_page(self, offset: int) -> str:
+        rows = []
+        for post_id in range(offset, min(offset + self.page_size, self.inventory)):
+            title = f"{2000 + post_id % 25} {_MAKES[post_id % len(_MAKES)]} #{post_id}"
+            row = self._row_template
+            row = row.replace("2015 Honda Civic LX - clean title", title)
+            row = row.replace("$8,500", f"${3000 + post_id % 20000:,}")
+            row = re.sub(
+                r'href="[^"]+"', f'href="{self.base_url}/cto/d/car/{post_id}.html"', row
+            )
+            rows.append(row)
+        next_link = ""
+        if offset + self.page_size < self.inventory:
+            next_link = (
+                f'<a class="cl-next-page" href="/search/cta?s={offset + self.page_size}">'
+                "next</a>"
+            )
+        return self._page_head + next_link + "\n".join(rows) + self._page_tail
+
+    def detail_page(self, post_id: int) -> str:
+        return self._detail.replace("78,000", f"{10_000 + post_id * 7 % 190_000:,}")
+
+
+def _handler(site: SyntheticSite, latency_s: float, error_rate: float):
+    rng = random.Random(0)
+    rng_lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args: Any) -> None:  # keep stdout clean
+            pass
+
+        def do_GET(self) -> None:
+            with rng_lock:
+                jitter = rng.uniform(0.5, 1.5)
+                fail = rng.random() < error_rate
+            time.sleep(latency_s * jitter)
+
+            parts = urlsplit(self.path)
+            offset = int(parse_qs(parts.query).get("s", ["0"])[0])
+            is_first_page = parts.path.startswith("/search/") and offset == 0
+            # The first results page never fails: that would abort the run.
+            if fail and not is_first_page:
+                # Short Retry-After: measure throughput, not the 30 s default.
+                self._send(503, "busy", ("Retry-After", "1"))
+            elif parts.path.startswith("/search/"):
+                self._send(200, site.search_page(offset))
+            elif parts.path.startswith("/cto/"):
+                post_id = int(Path(parts.path).stem)
+                self._send(200, site.detail_page(post_id))
+            else:
+                self._send(404, "not found")
+
+        def _send(self, status: int, body: str, *headers: Tuple[str, str]) -> None:
+            payload = body.encode("utf-8")
+            self.send_response(status)
+            for name, value in headers:
+                self.send_header(name, value)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    return Handler
+
+
+def start_server(inventory: int, page_size: int, latency_ms: float, error_rate: float):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), BaseHTTPRequestHandler)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    site = SyntheticSite(inventory, page_size, base_url)
+    server.RequestHandlerClass = _handler(site, latency_ms / 1000, error_rate)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, base_url
+
+
+# ── One measured run (executed in a child process) ────────────────────────────
+
+
+class _Timer:
+    def __init__(self) -> None:
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def wrap(self, fn):
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                with self._lock:
+                    self.seconds += elapsed
+
+        return timed
+
+
+def run_once(
+    base_url: str, max_results: int, concurrency: int, parser: str, jobs: int = 1
+) -> Dict[str, Any]:
+    import httpx
+
+    from app import scraper_craigslist as scr
+    from app.html_backends import get_backend
+    from app.http_client import pool_stats
+    from app.settings import settings
+
+    settings.scraper_cache_dir = ""
+    settings.scraper_rate_limit_backend = "local"
+    settings.scraper_max_pages = 10_000
+    scr.SEARCH_URL_TEMPLATE = base_url + "/search/cta?city={city}&query={query}"
+    scr.DETAIL_DELAY_RANGE = (0.0, 0.0)
+
+    network, parsing = _Timer(), _Timer()
+    httpx.Client.get = network.wrap(httpx.Client.get)
+    backend = get_backend(parser)
+    backend.search_page = parsing.wrap(backend.search_page)
+    backend.detail_page = parsing.wrap(backend.detail_page)
+    scr.get_backend = lambda name=None: backend
+
+    started = time.perf_counter()
+    count = 0
+    for _ in range(jobs):
+        count += sum(
+            1
+            for _ in scr.iter_craigslist_cars(
+                "bench", "cars", max_results=max_results, concurrency=concurrency
+            )
+        )
+    wall = time.perf_counter() - started
+
+    return {
+        "max_results": max_results,
+        "listings": count,
+        "wall_s": wall,
+        "listings_per_s": count / wall if wall else 0.0,
+        "network_s": network.seconds,
+        "parse_s": parsing.seconds,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "connections": pool_stats()["connections_opened"],
+        "parser": backend.name,
+    }
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-results", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--jobs", type=int, default=1, help="back-to-back jobs per run")
+    parser.add_argument("--page-size", type=int, default=120)
+    parser.add_argument("--parser", default="auto", help="auto | lxml | bs4")
+    parser.add_argument("--json", action="store_true", help="print raw JSON rows")
+    # Internal: child-process mode.
+    parser.add_argument("--child", nargs=2, metavar=("BASE_URL", "MAX_RESULTS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        base_url, max_results = args.child[0], int(args.child[1])
+        print(
+            json.dumps(
+                run_once(base_url, max_results, args.concurrency, args.parser, args.jobs)
+            )
+        )
+        return
+
+    inventory = max(args.max_results) + args.page_size
+    server, base_url = start_server(
+        inventory, args.page_size, args.latency_ms, args.error_rate
+    )
+    backend_dir = Path(__file__).resolve().parent.parent
+    rows: List[Dict[str, Any]] = []
+    try:
+        for max_results in args.max_results:
+            out = subprocess.run(
+                [
+                    sys.executable, "-m", "benchmarks.scraper_bench",
+                    "--child", base_url, str(max_results),
+                    "--concurrency", str(args.concurrency),
+                    "--parser", args.parser,
+                    "--jobs", str(args.jobs),
+                ],
+                cwd=backend_dir,
+                env={**os.environ, "PYTHONPATH": str(backend_dir)},
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            rows.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    finally:
+        server.shutdown()
+
+    if args.json:
+        for row in rows:
+            print(json.dumps(row))
+        return
+
+    print(
+        f"latency={args.latency_ms:g}ms error_rate={args.error_rate:g} "
+        f"concurrency={args.concurrency} jobs={args.jobs} parser={rows[0]['parser']}"
+    )
+    print(
+        f"{'max_results':>11} {'listings':>8} {'wall s':>8} {'listings/s':>11} "
+        f"{'network s':>10} {'parse s':>8} {'peak RSS MB':>12} {'conns':>6}"
+    )
+    for row in rows:
+        print(
+            f"{row['max_results']:>11} {row['listings']:>8} {row['wall_s']:>8.2f} "
+            f"{row['listings_per_s']:>11.1f} {row['network_s']:>10.2f} "
+            f"{row['parse_s']:>8.2f} {row['peak_rss_mb']:>12.1f} {row['connections']:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
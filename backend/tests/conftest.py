@@ -0,0 +1,217 @@
+import math
+from fnmatch import fnmatch
+
+import pytest
+import redis
+
+from app import http_client
+from app.settings import settings
+
+
+@pytest.fixture(autouse=True)
+def _offline_scraper_settings(monkeypatch):
+    """Keep scraper tests hermetic: no shared (Redis) rate limiter or circuit
+    breaker, and a fresh process-wide HTTP client per test."""
+    monkeypatch.setattr(settings, "scraper_rate_limit_backend", "local")
+    monkeypatch.setattr(settings, "scraper_breaker_threshold", 0)
+    yield
+    http_client.close_http_client()
+
+
+class FakeRedis:
+    """In-memory stand-in for the Redis commands the scrapers use.
+
+    Keys expire on a fake clock (``now`` / ``advance``), so TTL behaviour is
+    testable; pass ``clock=fake.time`` to the class under test to share it.
+    ``fail = True`` makes every command raise like a lost connection.
+    Values come back as ``str``, as with ``decode_responses=True``.
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.expires_at = {}
+        self.now = 1_000_000.0
+        self.fail = False
+
+    def time(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+    def _check(self):
+        if self.fail:
+            raise redis.ConnectionError("down")
+
+    def _live(self, key):
+        self._check()
+        deadline = self.expires_at.get(key)
+        if deadline is not None and deadline <= self.now:
+            self.data.pop(key, None)
+            self.expires_at.pop(key, None)
+        return key in self.data
+
+    def _get(self, key, default):
+        return self.data.get(key, default) if self._live(key) else default
+
+    # -- keys ---------------------------------------------------------------
+
+    def keys(self, pattern="*"):
+        return [k for k in list(self.data) if self._live(k) and fnmatch(k, pattern)]
+
+    def exists(self, *keys):
+        return sum(self._live(key) for key in keys)
+
+    def delete(self, *keys):
+        removed = 0
+        for key in keys:
+            removed += self._live(key)
+            self.data.pop(key, None)
+            self.expires_at.pop(key, None)
+        return removed
+
+    def expire(self, key, seconds):
+        if not self._live(key):
+            return False
+        self.expires_at[key] = self.now + seconds
+        return True
+
+    def persist(self, key):
+        return self._live(key) and self.expires_at.pop(key, None) is not None
+
+    def ttl(self, key):
+        if not self._live(key):
+            return -2
+        deadline = self.expires_at.get(key)
+        return -1 if deadline is None else math.ceil(deadline - self.now)
+
+    def rename(self, src, dst):
+        if not self._live(src):
+            raise redis.ResponseError("no such key")
+        self.delete(dst)
+        self.data[dst] = self.data.pop(src)
+        if src in self.expires_at:
+            self.expires_at[dst] = self.expires_at.pop(src)
+
+    # -- strings ------------------------------------------------------------
+
+    def get(self, key):
+        return self._get(key, None)
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and self._live(key):
+            return None
+        self._check()
+        self.data[key] = str(value)
+        self.expires_at.pop(key, None)
+        if ex is not None:
+            self.expires_at[key] = self.now + ex
+        return True
+
+    def incr(self, key):
+        value = int(self._get(key, 0)) + 1
+        self.data[key] = str(value)
+        return value
+
+    # -- hashes -------------------------------------------------------------
+
+    def hget(self, key, field):
+        return self._get(key, {}).get(field)
+
+    def hmget(self, key, fields):
+        h = self._get(key, {})
+        return [h.get(field) for field in fields]
+
+    def hgetall(self, key):
+        return dict(self._get(key, {}))
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        self._live(key)
+        h = self.data.setdefault(key, {})
+        items = dict(mapping or {})
+        if field is not None:
+            items[field] = value
+        added = sum(f not in h for f in items)
+        h.update({f: str(v) for f, v in items.items()})
+        return added
+
+    def hsetnx(self, key, field, value):
+        self._live(key)
+        h = self.data.setdefault(key, {})
+        if field in h:
+            return 0
+        h[field] = str(value)
+        return 1
+
+    def hincrby(self, key, field, amount=1):
+        self._live(key)
+        h = self.data.setdefault(key, {})
+        h[field] = str(int(h.get(field, 0)) + amount)
+        return int(h[field])
+
+    def hdel(self, key, *fields):
+        h = self._get(key, {})
+        removed = sum(h.pop(field, None) is not None for field in fields)
+        if key in self.data and not h:
+            self.delete(key)
+        return removed
+
+    # -- sets and sorted sets -----------------------------------------------
+
+    def sadd(self, key, *members):
+        self._live(key)
+        s = self.data.setdefault(key, set())
+        added = sum(str(m) not in s for m in members)
+        s.update(str(m) for m in members)
+        return added
+
+    def smembers(self, key):
+        return set(self._get(key, ()))
+
+    def zadd(self, key, mapping):
+        self._live(key)
+        z = self.data.setdefault(key, {})
+        added = sum(m not in z for m in mapping)
+        z.update({m: float(score) for m, score in mapping.items()})
+        return added
+
+    def zmscore(self, key, members):
+        z = self._get(key, {})
+        return [z.get(m) for m in members]
+
+    # -- pipelines ----------------------------------------------------------
+
+    def pipeline(self):
+        return _FakePipeline(self)
+
+
+class _FakePipeline:
+    """Queues commands and runs them on ``execute``, like a MULTI/EXEC."""
+
+    def __init__(self, client):
+        self._client = client
+        self._ops = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        command = getattr(self._client, name)
+
+        def queue(*args, **kwargs):
+            self._ops.append((command, args, kwargs))
+            return self
+
+        return queue
+
+    def execute(self):
+        ops, self._ops = self._ops, []
+        return [command(*args, **kwargs) for command, args, kwargs in ops]
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
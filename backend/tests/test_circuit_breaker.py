@@ -0,0 +1,119 @@
+"""Offline tests for block detection and the shared circuit breaker."""
+
+import pytest
+
+from app.circuit_breaker import CircuitBreaker, ScraperBlocked, classify_block, site_of
+from app.settings import settings
+
+URL = "https://austin.craigslist.org/search/cta?query=x"
+OTHER_CITY = "https://dallas.craigslist.org/cto/d/car/1.html"
+
+
+def _breaker(fake, threshold=2):
+    return CircuitBreaker(
+        fake, threshold=threshold, window=60, cooldown=100, max_cooldown=300, clock=fake.time
+    )
+
+
+def test_classify_block():
+    assert classify_block(403, "") == "HTTP 403"
+    assert classify_block(200, '<div class="g-recaptcha"></div>') == "captcha page"
+    assert classify_block(200, "<li class='cl-static-search-result'>") is None
+    assert classify_block(404, "not found") is None
+
+
+def test_site_groups_city_subdomains():
+    assert site_of(URL) == site_of(OTHER_CITY) == "craigslist.org"
+
+
+def test_trips_after_threshold_and_fails_fast_for_every_city(fake_redis):
+    breaker = _breaker(fake_redis)
+
+    breaker.record_block(URL, "HTTP 403")
+    breaker.before_request(URL)  # one signal: still closed
+    breaker.record_block(URL, "HTTP 403")
+
+    with pytest.raises(ScraperBlocked) as exc:
+        breaker.before_request(OTHER_CITY)
+    assert exc.value.retry_in == pytest.approx(100)
+    assert breaker.open_for(URL) == pytest.approx(100)
+
+
+def test_half_open_lets_exactly_one_probe_through_and_success_closes(fake_redis):
+    breaker = _breaker(fake_redis, threshold=1)
+    breaker.record_block(URL, "captcha page")
+    fake_redis.advance(101)
+
+    breaker.before_request(URL)  # the probe
+    with pytest.raises(ScraperBlocked):
+        breaker.before_request(OTHER_CITY)
+
+    breaker.record_success(URL)
+    breaker.before_request(OTHER_CITY)
+    assert breaker.open_for(URL) is None
+
+
+def test_failed_probe_doubles_the_cooldown_up_to_the_cap(fake_redis):
+    breaker = _breaker(fake_redis, threshold=1)
+    breaker.record_block(URL, "HTTP 403")
+
+    for previous, expected in ((100, 200), (200, 300)):
+        fake_redis.advance(previous + 1)
+        breaker.before_request(URL)
+        breaker.record_block(URL, "HTTP 403")
+        assert breaker.open_for(URL) == pytest.approx(expected)
+
+
+def test_stragglers_while_open_neither_extend_nor_close_it(fake_redis):
+    breaker = _breaker(fake_redis, threshold=1)
+    breaker.record_block(URL, "HTTP 403")
+    fake_redis.advance(10)
+
+    breaker.record_block(URL, "HTTP 403")
+    breaker.record_success(URL)
+    assert breaker.open_for(URL) == pytest.approx(90)
+
+
+def test_block_signals_only_count_within_the_window(fake_redis):
+    breaker = _breaker(fake_redis)
+    breaker.record_block(URL, "HTTP 403")
+    assert fake_redis.ttl("scraper:breaker:craigslist.org:failures") == 60
+
+    fake_redis.advance(61)
+    breaker.record_block(URL, "HTTP 403")
+    assert breaker.open_for(URL) is None
+
+
+def test_open_state_outlives_the_cooldown_then_expires(fake_redis, monkeypatch):
+    monkeypatch.setattr(settings, "scraper_request_timeout", 20)
+    breaker = _breaker(fake_redis, threshold=1)
+    breaker.record_block(URL, "HTTP 403")
+    assert fake_redis.ttl("scraper:breaker:craigslist.org:open") == 100 + 300
+
+    fake_redis.advance(101)
+    breaker.before_request(URL)
+    assert fake_redis.ttl("scraper:breaker:craigslist.org:probe") == 40
+
+    # A probe that never reports back stops holding the half-open slot...
+    fake_redis.advance(40)
+    breaker.before_request(OTHER_CITY)
+    # ...and once the open state is gone, the next trip starts from scratch.
+    fake_redis.advance(400)
+    breaker.record_block(URL, "HTTP 403")
+    assert breaker.open_for(URL) == pytest.approx(100)
+
+
+def test_redis_errors_fail_open(fake_redis):
+    breaker = _breaker(fake_redis, threshold=1)
+    fake_redis.fail = True
+
+    breaker.record_block(URL, "HTTP 403")
+    breaker.before_request(URL)
+    assert breaker.open_for(URL) is None
+
+
+def test_zero_threshold_disables_the_breaker(fake_redis):
+    breaker = _breaker(fake_redis, threshold=0)
+    breaker.record_block(URL, "HTTP 403")
+    breaker.before_request(URL)
+    assert fake_redis.keys() == []
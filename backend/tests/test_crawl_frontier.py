@@ -0,0 +1,101 @@
+"""Offline tests for the crawl frontier's SQL (compiled for Postgres, no DB)."""
+
+from sqlalchemy.dialects import postgresql
+
+from app import crawl_frontier as cf
+from app.listing_record import ListingRecord
+
+URL = "https://austin.craigslist.org/cto/d/car/{}.html"
+
+
+def _sql(stmt):
+    return str(stmt.compile(dialect=postgresql.dialect())).replace("\n", " ")
+
+
+class _Result:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+    def scalar_one(self):
+        return self._rows[0][0]
+
+    def __iter__(self):
+        return iter(self._rows)
+
+
+class FakeSession:
+    def __init__(self, rows=()):
+        self.statements = []
+        self._rows = list(rows)
+
+    def execute(self, stmt):
+        self.statements.append(stmt)
+        return _Result(self._rows)
+
+
+def test_claim_leases_in_priority_order_and_skips_locked_rows():
+    sql = _sql(cf.claim_statement(10, 300, 3, job_id="job-1"))
+
+    assert sql.startswith("UPDATE crawl_frontier SET attempts=(crawl_frontier.attempts + ")
+    assert "ORDER BY crawl_frontier.priority DESC, crawl_frontier.id" in sql
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert "crawl_frontier.job_id = " in sql
+    assert "RETURNING crawl_frontier.id, crawl_frontier.url, crawl_frontier.row" in sql
+
+
+def test_orphan_claims_only_take_expired_or_long_unclaimed_rows():
+    sql = _sql(cf.claim_statement(10, 300, 3))
+
+    assert "job_id" not in sql.split("WHERE", 1)[1]
+    assert "crawl_frontier.leased_until < now()" in sql
+    assert "crawl_frontier.leased_until IS NULL AND crawl_frontier.created_at < now() - " in sql
+
+
+def test_enqueue_leaves_pending_urls_alone_and_revives_dead_ones():
+    session = FakeSession(rows=[(1,)])
+    rows = [
+        ListingRecord(
+            source="craigslist",
+            url=URL.format(n),
+            title=title,
+            listed_price=5000,
+            location="Austin",
+            make=make,
+            model=model,
+        )
+        for n, title, make, model in ((1, "civic", "Honda", "Civic"), (2, "f150", "Ford", "F-150"))
+    ]
+
+    assert cf.enqueue(session, rows, "job-1", priority=-1, max_attempts=3) == 1
+    sql = _sql(session.statements[0])
+    assert "ON CONFLICT (url) DO UPDATE SET job_id = excluded.job_id" in sql
+    assert "attempts = %(param_1)s, leased_until = %(param_2)s, created_at = now()" in sql
+    # Only a dead row is taken over; a pending one stays with its job.
+    assert sql.endswith(
+        "WHERE crawl_frontier.attempts >= %(attempts_1)s RETURNING crawl_frontier.id"
+    )
+    assert cf.enqueue(FakeSession(), [], "job-1", max_attempts=3) == 0
+
+
+def test_claim_returns_items_and_complete_deletes_by_id():
+    session = FakeSession(rows=[(7, URL.format(7), {"url": URL.format(7)})])
+
+    items = cf.claim(session, 5, lease_seconds=60, max_attempts=3, job_id="job-1")
+    cf.complete(session, [item.id for item in items])
+    cf.complete(session, [])
+
+    assert items == [cf.FrontierItem(7, URL.format(7), {"url": URL.format(7)})]
+    assert _sql(session.statements[1]).startswith("DELETE FROM crawl_frontier WHERE crawl_frontier.id IN")
+    assert len(session.statements) == 2
+
+
+def test_pending_count_counts_the_jobs_live_rows():
+    session = FakeSession(rows=[(2,)])
+
+    assert cf.pending_count(session, "job-1", 3) == 2
+    sql = _sql(session.statements[0])
+    assert "WHERE crawl_frontier.job_id = %(job_id_1)s" in sql
+    assert "crawl_frontier.attempts < %(attempts_1)s" in sql
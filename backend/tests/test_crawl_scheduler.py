@@ -0,0 +1,153 @@
+"""Offline tests for the yield-driven crawl scheduler (in-memory Redis stand-in)."""
+
+import pytest
+
+from app import tasks
+from app.crawl_scheduler import CrawlScheduler, PlannedSweep, Target
+
+HOUR = 3600.0
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _scheduler(fake, clock, budget=40, max_requests=30):
+    return CrawlScheduler(
+        fake,
+        budget=budget,
+        max_requests=max_requests,
+        half_life=24 * HOUR,
+        target_ttl=7 * 24 * HOUR,
+        clock=clock,
+    )
+
+
+def test_budget_goes_to_the_highest_yield_targets_first(fake_redis):
+    clock = _Clock()
+    scheduler = _scheduler(fake_redis, clock)
+    for city in ("austin", "dallas", "waco"):
+        scheduler.register(city, "Honda Civic")
+    scheduler.record("austin", "honda civic", new_listings=30, requests=40)
+    scheduler.record("dallas", "honda civic", new_listings=0, requests=40)
+    scheduler.record("waco", "honda civic", new_listings=8, requests=20)
+
+    plan = scheduler.plan()
+
+    assert [sweep.city for sweep in plan] == ["austin", "waco", "dallas"]
+    assert plan[0].max_results > plan[1].max_results > plan[2].max_results
+    assert plan[0].query == "Honda Civic"
+    assert sum(sweep.max_results + 1 for sweep in plan) <= 40
+
+
+def test_new_targets_are_explored_and_old_evidence_decays(fake_redis):
+    clock = _Clock()
+    scheduler = _scheduler(fake_redis, clock)
+    scheduler.register("austin", "civic")
+    fresh = scheduler.targets()[0].score
+    scheduler.record("austin", "civic", new_listings=0, requests=100)
+    dead = scheduler.targets()[0].score
+
+    clock.now += 24 * HOUR * 10
+    scheduler.register("austin", "civic")  # still wanted, so not expired
+    recovered = scheduler.targets()[0].score
+
+    assert dead < recovered < fresh
+    assert fresh - recovered < 0.02
+
+
+def test_targets_nobody_asked_for_expire(fake_redis):
+    clock = _Clock()
+    scheduler = _scheduler(fake_redis, clock)
+    scheduler.register("austin", "civic")
+    clock.now += 8 * 24 * HOUR
+
+    assert scheduler.plan() == []
+    assert fake_redis.hgetall("scraper:schedule:targets") == {}
+
+
+def test_unscheduled_sweeps_are_not_recorded_and_redis_errors_are_swallowed(fake_redis):
+    clock = _Clock()
+    scheduler = _scheduler(fake_redis, clock)
+    scheduler.record("austin", "civic", new_listings=5, requests=10)
+    assert scheduler.targets() == []
+
+    fake_redis.fail = True
+    scheduler.register("austin", "civic")
+    assert scheduler.plan() == []
+
+
+def test_score_is_new_listings_per_request_with_a_prior():
+    assert Target("a", "b").score == 0.5
+    assert Target("a", "b", new_listings=96, requests=96).score == 0.98
+
+
+
+class _Plan:
+    budget = 40
+
+    def __init__(self, *sweeps):
+        self.sweeps = list(sweeps)
+
+    def plan(self):
+        return self.sweeps
+
+
+class _ClosedBreaker:
+    def open_for(self, url):
+        return None
+
+
+def _schedule_with(monkeypatch, *sweeps):
+    monkeypatch.setattr(
+        tasks.CrawlScheduler, "from_settings", classmethod(lambda cls: _Plan(*sweeps))
+    )
+    monkeypatch.setattr(
+        tasks.CircuitBreaker, "from_settings", classmethod(lambda cls: _ClosedBreaker())
+    )
+
+
+def test_schedule_task_skips_targets_already_in_flight(monkeypatch):
+    _schedule_with(
+        monkeypatch,
+        PlannedSweep("austin", "civic", 19, 2.0),
+        PlannedSweep("dallas", "f150", 19, 1.0),
+    )
+    monkeypatch.setattr(
+        tasks,
+        "join_or_claim",
+        lambda city, query, max_results, job_id: "job-running" if city == "austin" else None,
+    )
+    sent = []
+    monkeypatch.setattr(
+        tasks.scrape_craigslist_task,
+        "apply_async",
+        lambda kwargs, task_id: sent.append((kwargs["city"], kwargs["priority"], task_id)),
+    )
+
+    result = tasks.schedule_crawls_task()
+
+    assert (result["enqueued"], result["in_flight"]) == (1, 1)
+    assert [target["city"] for target in result["targets"]] == ["dallas"]
+    ((city, priority, task_id),) = sent
+    assert (city, priority) == ("dallas", tasks.SCHEDULED_PRIORITY) and task_id
+
+
+def test_schedule_task_releases_claim_when_enqueue_fails(monkeypatch):
+    _schedule_with(monkeypatch, PlannedSweep("austin", "civic", 19, 2.0))
+    monkeypatch.setattr(tasks, "join_or_claim", lambda *args: None)
+    released = []
+    monkeypatch.setattr(tasks, "release", lambda *args: released.append(args))
+
+    def broker_down(kwargs, task_id):
+        raise ConnectionError("broker down")
+
+    monkeypatch.setattr(tasks.scrape_craigslist_task, "apply_async", broker_down)
+
+    with pytest.raises(ConnectionError):
+        tasks.schedule_crawls_task()
+    assert [args[:3] for args in released] == [("austin", "civic", 19)]
@@ -0,0 +1,69 @@
+"""Offline tests for incremental-crawl watermarks (in-memory Redis stand-in)."""
+
+from app.crawl_watermarks import Watermark, WatermarkStore, post_id
+
+BASE = "https://austin.craigslist.org/cto/d/austin-car/{}.html"
+
+
+def _store(fake, max_ids=3):
+    return WatermarkStore(fake, max_ids=max_ids, ttl_seconds=60)
+
+
+def test_post_id_from_listing_urls():
+    assert post_id(BASE.format(7712345678)) == "7712345678"
+    assert post_id(BASE.format(7712345678) + "?lang=en") == "7712345678"
+    assert post_id("https://austin.craigslist.org/search/cta") is None
+
+
+def test_covers_requires_every_url_on_the_page():
+    mark = Watermark(post_ids=["1", "2"])
+
+    assert mark.covers([BASE.format(1), BASE.format(2)])
+    assert not mark.covers([BASE.format(1), BASE.format(3)])
+    assert not mark.covers([])
+    assert not mark.covers(["https://example.com/no-id"])
+
+
+def test_advance_round_trips_and_keeps_newest_ids(fake_redis):
+    store = _store(fake_redis)
+
+    store.advance("Austin", "honda  civic", Watermark(), [BASE.format(1), BASE.format(2)])
+    mark = store.load("austin", "Honda Civic")
+    assert mark.post_ids == ["1", "2"]
+
+    store.advance("austin", "honda civic", mark, [BASE.format(4), BASE.format(3), BASE.format(1)])
+    mark = store.load("austin", "honda civic")
+    assert mark.post_ids == ["4", "3", "1"]  # capped at max_ids, newest first
+
+
+def test_marks_saved_with_a_posted_at_still_load(fake_redis):
+    fake_redis.set(
+        "scraper:watermark:austin:civic",
+        '{"newest_posted_at": "2026-01-02T00:00:00+00:00", "post_ids": ["1"]}',
+    )
+    assert _store(fake_redis).load("austin", "civic") == Watermark(["1"])
+
+
+def test_marks_of_targets_nobody_sweeps_expire(fake_redis):
+    store = _store(fake_redis)
+    store.advance("austin", "civic", Watermark(), [BASE.format(1)])
+    assert fake_redis.ttl(fake_redis.keys()[0]) == 60
+
+    fake_redis.advance(61)
+    assert store.load("austin", "civic") == Watermark()
+
+
+def test_redis_errors_mean_full_crawl(fake_redis):
+    fake_redis.fail = True
+    store = _store(fake_redis)
+
+    assert store.load("austin", "x") == Watermark()
+    store.advance("austin", "x", Watermark(), [BASE.format(1)])  # swallowed
+
+
+def test_zero_ids_disables_watermarks(fake_redis):
+    store = _store(fake_redis, max_ids=0)
+
+    store.advance("austin", "x", Watermark(), [BASE.format(1)])
+    assert not store.enabled
+    assert fake_redis.keys() == []
@@ -0,0 +1,126 @@
+"""Offline tests for the on-disk conditional HTTP cache.
+
+The origin server is an ``httpx.MockTransport`` that honours ``If-None-Match``,
+so revalidation, LRU eviction and the parse-skip path run without network.
+"""
+
+from pathlib import Path
+
+import httpx
+
+from app import scraper_craigslist as scr
+from app.http_cache import CachingTransport, HttpCache
+from app.listing_record import ListingRecord
+
+FIXTURES = Path(__file__).parent / "fixtures"
+DETAIL_URL = "https://austin.craigslist.org/cto/d/austin-2015-honda-civic-lx/7700000001.html"
+
+
+class _Origin:
+    def __init__(self, body: str, etag: str = '"v1"'):
+        self.body = body
+        self.etag = etag
+        self.requests: list[httpx.Request] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if request.headers.get("if-none-match") == self.etag:
+            return httpx.Response(304, headers={"ETag": self.etag})
+        return httpx.Response(
+            200,
+            headers={"ETag": self.etag, "Content-Type": "text/html"},
+            text=self.body,
+        )
+
+
+def _client(origin: _Origin, cache: HttpCache) -> httpx.Client:
+    return httpx.Client(transport=CachingTransport(httpx.MockTransport(origin), cache))
+
+
+def test_revalidated_hit_replays_stored_body(tmp_path):
+    cache = HttpCache(tmp_path / "c.sqlite3", max_bytes=1 << 20)
+    origin = _Origin("<p>hello</p>")
+
+    with _client(origin, cache) as client:
+        first = client.get(DETAIL_URL)
+        second = client.get(DETAIL_URL)
+
+    assert first.text == second.text == "<p>hello</p>"
+    assert not first.extensions.get("cache_revalidated")
+    assert second.extensions["cache_revalidated"] is True
+    assert origin.requests[1].headers["if-none-match"] == '"v1"'
+    assert cache.stats.hits == 1 and cache.stats.misses == 1
+    assert cache.stats.bytes_saved == len("<p>hello</p>")
+
+
+def test_changed_page_is_refetched(tmp_path):
+    cache = HttpCache(tmp_path / "c.sqlite3", max_bytes=1 << 20)
+    origin = _Origin("old")
+
+    with _client(origin, cache) as client:
+        client.get(DETAIL_URL)
+        origin.body, origin.etag = "new", '"v2"'
+        resp = client.get(DETAIL_URL)
+
+    assert resp.text == "new"
+    assert cache.stats.hits == 0 and cache.stats.misses == 2
+
+
+def test_responses_without_validators_are_not_stored(tmp_path):
+    cache = HttpCache(tmp_path / "c.sqlite3", max_bytes=1 << 20)
+
+    def origin(request):
+        return httpx.Response(200, text="no validators")
+
+    with httpx.Client(transport=CachingTransport(httpx.MockTransport(origin), cache)) as client:
+        client.get(DETAIL_URL)
+
+    assert cache.stats.stores == 0
+    assert cache.validators(DETAIL_URL) == {}
+
+
+def test_lru_eviction_keeps_total_under_budget(tmp_path):
+    cache = HttpCache(tmp_path / "c.sqlite3", max_bytes=160)
+    headers = httpx.Headers({"etag": '"x"'})
+
+    # Incompressible-ish bodies so each stored blob is ~75 bytes.
+    cache.store("https://a/1", bytes(range(64)), headers)
+    cache.store("https://a/2", bytes(range(64, 128)), headers)
+    cache.load("https://a/1")  # touch 1 so 2 is least recently used
+    cache.store("https://a/3", bytes(range(128, 192)), headers)
+
+    assert cache.load("https://a/2") is None
+    assert cache.load("https://a/1") is not None
+    assert cache.stats.evictions == 1
+
+
+def test_revalidated_detail_page_skips_parsing(tmp_path, monkeypatch):
+    cache = HttpCache(tmp_path / "c.sqlite3", max_bytes=1 << 20)
+    origin = _Origin((FIXTURES / "detail.html").read_text(encoding="utf-8"))
+
+    parses = []
+    real_parse = scr._parse_detail
+    monkeypatch.setattr(
+        scr, "_parse_detail", lambda html: parses.append(1) or real_parse(html)
+    )
+
+    def row():
+        return ListingRecord(
+            source="craigslist",
+            url=DETAIL_URL,
+            title="2015 Honda Civic LX",
+            listed_price=8500,
+            location="Austin",
+            make="Honda",
+            model="Civic",
+            year=2015,
+        )
+
+    with _client(origin, cache) as client:
+        first = scr._enrich_with_detail(client, row(), cache=cache)
+        second = scr._enrich_with_detail(client, row(), cache=cache)
+
+    assert len(parses) == 1
+    assert cache.stats.parses_skipped == 1
+    assert first == second
+    assert second.mileage == 78000
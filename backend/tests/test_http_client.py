@@ -0,0 +1,75 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app import http_client
+from app.settings import settings
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_client_is_shared_within_the_process():
+    assert http_client.get_http_client() is http_client.get_http_client()
+
+
+def test_connections_are_reused_across_requests(server_url):
+    client = http_client.get_http_client()
+    for path in ("/a", "/b", "/c"):
+        assert client.get(server_url + path).text == "ok"
+
+    stats = http_client.pool_stats()
+    assert stats["requests"] == 3
+    assert stats["connections_opened"] == 1
+    assert stats["open"] == 1 and stats["idle"] == 1
+    assert stats["reuse_ratio"] == pytest.approx(0.667, abs=1e-3)
+
+
+def test_close_then_init_gives_a_fresh_client(server_url):
+    first = http_client.get_http_client()
+    first.get(server_url)
+    http_client.close_http_client()
+
+    assert first.is_closed
+    assert http_client.pool_stats() == {"requests": 0, "connections_opened": 0}
+
+    http_client.init_http_client()
+    second = http_client.get_http_client()
+    assert second is not first and not second.is_closed
+
+
+def test_close_without_client_is_a_no_op():
+    http_client.close_http_client()
+    http_client.close_http_client()
+
+
+def test_http2_falls_back_without_h2(monkeypatch):
+    monkeypatch.setattr(settings, "scraper_http2", True)
+    monkeypatch.setattr(http_client, "h2", None)
+    assert http_client.http2_enabled() is False
+
+
+def test_http2_disabled_by_default():
+    assert http_client.http2_enabled() is False
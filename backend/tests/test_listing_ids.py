@@ -0,0 +1,22 @@
+from app.listing_ids import canonical_url, craigslist_post_id, dedupe_key, row_key
+
+URL = "https://austin.craigslist.org/cto/d/austin-2015-honda-civic/7712345678.html"
+
+
+def test_post_id_survives_url_variants():
+    assert craigslist_post_id(URL) == 7712345678
+    assert craigslist_post_id(URL + "?lang=en#map") == 7712345678
+    assert craigslist_post_id(URL.replace("austin", "dallas")) == 7712345678
+    assert craigslist_post_id("https://austin.craigslist.org/search/cta?query=x") is None
+
+
+def test_canonical_url_drops_query_and_fragment():
+    assert canonical_url("HTTPS://Austin.Craigslist.org/cto/d/x/1.html?lang=en#p") == (
+        "https://austin.craigslist.org/cto/d/x/1.html"
+    )
+
+
+def test_dedupe_key_prefers_the_post_id():
+    assert dedupe_key(URL) == dedupe_key(URL.replace("austin", "dallas")) == "craigslist:7712345678"
+    assert dedupe_key("https://example.com/a?b=1") == "https://example.com/a"
+    assert row_key("craigslist", None, "https://example.com/a") == "https://example.com/a"
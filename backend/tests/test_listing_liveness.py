@@ -0,0 +1,121 @@
+"""Offline tests for the listing liveness checker (mocked HTTP, compiled SQL)."""
+
+import uuid
+from datetime import timedelta
+
+import httpx
+from sqlalchemy.dialects import postgresql
+
+from app import listing_liveness as lv
+
+AUSTIN = "https://austin.craigslist.org/cto/d/car/{}.html"
+DALLAS = "https://dallas.craigslist.org/cto/d/car/{}.html"
+
+
+def _sql(stmt):
+    return str(stmt.compile(dialect=postgresql.dialect())).replace("\n", " ")
+
+
+def _client(handler, calls):
+    def record(request):
+        calls.append((request.method, str(request.url)))
+        return handler(request)
+
+    return httpx.Client(transport=httpx.MockTransport(record))
+
+
+def _rows(*urls):
+    return [(uuid.uuid4(), url) for url in urls]
+
+
+def test_head_sorts_listings_into_alive_gone_and_unknown(monkeypatch):
+    monkeypatch.setattr(lv, "DETAIL_DELAY_RANGE", (0.0, 0.0))
+    statuses = {"1": 200, "2": 404, "3": 410, "4": 500}
+    calls = []
+    client = _client(lambda req: httpx.Response(statuses[req.url.path[-6]]), calls)
+    rows = _rows(*(AUSTIN.format(n) for n in "1234"))
+
+    report = lv.check_listings(rows, concurrency=2, client=client)
+
+    ids = [listing_id for listing_id, _ in rows]
+    assert report.alive == [ids[0]]
+    assert report.gone == [ids[1], ids[2]]
+    assert report.unknown == [ids[3]]
+    assert {method for method, _ in calls} == {"HEAD"}
+
+
+def test_head_refused_falls_back_to_get(monkeypatch):
+    monkeypatch.setattr(lv, "DETAIL_DELAY_RANGE", (0.0, 0.0))
+    calls = []
+    client = _client(
+        lambda req: httpx.Response(405 if req.method == "HEAD" else 404), calls
+    )
+
+    report = lv.check_listings(_rows(AUSTIN.format(1)), client=client)
+
+    assert len(report.gone) == 1
+    assert [method for method, _ in calls] == ["HEAD", "GET"]
+
+
+def test_blocks_and_network_errors_leave_listings_unknown(monkeypatch):
+    monkeypatch.setattr(lv, "DETAIL_DELAY_RANGE", (0.0, 0.0))
+
+    def handler(request):
+        if "dallas" in str(request.url):
+            raise httpx.ConnectError("boom", request=request)
+        return httpx.Response(403)
+
+    report = lv.check_listings(
+        _rows(AUSTIN.format(1), DALLAS.format(2)), client=_client(handler, [])
+    )
+
+    assert report.counts() == {"alive": 0, "gone": 0, "unknown": 2}
+
+
+def test_probes_stop_once_the_time_budget_is_spent(monkeypatch):
+    monkeypatch.setattr(lv, "DETAIL_DELAY_RANGE", (0.0, 0.0))
+    calls = []
+    client = _client(lambda req: httpx.Response(200), calls)
+
+    report = lv.check_listings(
+        _rows(AUSTIN.format(1), AUSTIN.format(2)), time_budget=0, client=client
+    )
+
+    assert calls == []
+    assert len(report.unknown) == 2
+
+
+def test_batches_are_interleaved_by_host():
+    rows = _rows(AUSTIN.format(1), AUSTIN.format(2), AUSTIN.format(3), DALLAS.format(4))
+
+    urls = [url for _, url in lv.interleave_by_host(rows)]
+
+    assert urls == [AUSTIN.format(1), DALLAS.format(4), AUSTIN.format(2), AUSTIN.format(3)]
+
+
+def test_due_listings_are_active_stale_best_deals_oldest_first():
+    sql = _sql(lv.due_statement(100, timedelta(hours=24)))
+
+    assert "listings.is_active IS true" in sql
+    assert "listings.checked_at IS NULL OR listings.checked_at < now() - " in sql
+    assert "ORDER BY listings.undervalue_percent DESC, listings.posted_at" in sql
+
+
+class FakeSession:
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, stmt):
+        self.statements.append(stmt)
+
+
+def test_record_retires_gone_listings_and_stamps_alive_ones():
+    report = lv.LivenessReport(alive=[uuid.uuid4()], gone=[uuid.uuid4()], unknown=[uuid.uuid4()])
+    session = FakeSession()
+
+    lv.record(session, report)
+    lv.record(session, lv.LivenessReport(unknown=[uuid.uuid4()]))
+
+    retire, stamp = (_sql(stmt) for stmt in session.statements)
+    assert "is_active=%(is_active)s" in retire and "expired_at=now()" in retire
+    assert "is_active" not in stamp and "checked_at=now()" in stamp
@@ -0,0 +1,79 @@
+"""Offline tests for the typed listing record."""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from app.listing_record import InvalidListing, ListingRecord
+
+URL = "https://austin.craigslist.org/cto/d/civic/7700000001.html"
+
+
+def _record(**overrides):
+    fields = {
+        "source": "craigslist",
+        "url": URL,
+        "title": "2015 Honda Civic",
+        "listed_price": 8500,
+        "location": "Austin",
+        "make": "Honda",
+        "model": "Civic",
+        "external_id": 7700000001,
+    }
+    return ListingRecord(**{**fields, **overrides})
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {"url": ""},
+        {"make": None},
+        {"listed_price": None},
+        {"listed_price": 0},
+        {"listed_price": "8500"},
+        {"listed_price": True},
+        {"posted_at": "yesterday"},
+    ],
+)
+def test_invalid_fields_are_rejected_up_front(overrides):
+    with pytest.raises(InvalidListing):
+        _record(**overrides)
+
+
+def test_is_slotted():
+    record = _record()
+
+    assert not hasattr(record, "__dict__")
+    with pytest.raises(AttributeError):
+        record.color = "red"
+
+
+def test_detail_and_score_fill_the_record_in_place():
+    record = _record()
+    posted = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    record.apply_detail(
+        {"mileage": 78000, "attributes": {"drive": "fwd"}, "posted_at": posted, "description": "ok", "vin": None}
+    )
+    assert record.score() is record
+
+    assert (record.mileage, record.posted_at, record.predicted_price) == (78000, posted, 9775)
+    assert round(record.undervalue_percent, 2) == 13.04
+
+
+def test_round_trips_through_a_json_boundary():
+    record = _record(posted_at=datetime(2026, 1, 1, tzinfo=timezone.utc)).score()
+    data = record.to_dict()
+
+    assert ListingRecord.from_dict(data) == record
+    # json serializers that stringify datetimes are fine too.
+    assert ListingRecord.from_dict({**data, "posted_at": data["posted_at"].isoformat()}) == record
+
+
+def test_from_dict_names_missing_and_unknown_fields():
+    data = _record().to_dict()
+
+    with pytest.raises(InvalidListing, match="title"):
+        ListingRecord.from_dict({k: v for k, v in data.items() if k != "title"})
+    with pytest.raises(InvalidListing, match="color"):
+        ListingRecord.from_dict({**data, "color": "red"})
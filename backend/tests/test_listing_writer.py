@@ -0,0 +1,452 @@
+"""Tests for micro-batched listing persistence.
+
+Offline by default; the Postgres tests at the bottom run the real upsert and
+COPY paths when ``TEST_DATABASE_URL`` points at a scratch database.
+"""
+
+import csv
+import io
+import json
+import os
+import re
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from celery.exceptions import SoftTimeLimitExceeded
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.db import Base, _to_sync_url
+from app.listing_record import ListingRecord
+from app.listing_writer import (
+    _COLUMNS,
+    MicroBatcher,
+    _csv_value,
+    listing_row,
+    persist_listings,
+    upsert_statement,
+)
+from app.models import Listing
+
+
+NOW = datetime(2026, 1, 2, tzinfo=timezone.utc)
+
+
+def _sql(stmt):
+    return str(stmt.compile(dialect=postgresql.dialect())).replace("\n", " ")
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _batcher(flushed, size=3, interval=5.0, clock=None):
+    return MicroBatcher(flushed.append, size=size, interval=interval, clock=clock or _Clock())
+
+
+def test_flushes_every_size_items():
+    flushed = []
+    batcher = _batcher(flushed, size=2)
+    for item in range(5):
+        batcher.add(item)
+    batcher.flush()
+
+    assert flushed == [[0, 1], [2, 3], [4]]
+
+
+def test_flushes_when_oldest_item_is_too_old():
+    flushed = []
+    clock = _Clock()
+    batcher = _batcher(flushed, size=100, interval=5.0, clock=clock)
+
+    batcher.add("a")
+    clock.now = 4.0
+    batcher.add("b")
+    assert flushed == []
+    clock.now = 5.0
+    batcher.add("c")
+    assert flushed == [["a", "b", "c"]]
+
+
+def test_final_flush_of_empty_buffer_is_a_no_op():
+    flushed = []
+    batcher = _batcher(flushed)
+    batcher.flush()
+    assert flushed == []
+
+
+def test_failed_flush_keeps_the_batch_buffered():
+    flushed = []
+    calls = []
+
+    def flaky(items):
+        calls.append(list(items))
+        if len(calls) == 1:
+            raise SoftTimeLimitExceeded()
+        flushed.append(items)
+
+    batcher = MicroBatcher(flaky, size=2, interval=5.0, clock=_Clock())
+    batcher.add("a")
+    with pytest.raises(SoftTimeLimitExceeded):
+        batcher.add("b")
+    batcher.flush()
+
+    assert flushed == [["a", "b"]]
+
+
+class _Result:
+    def __init__(self, rows):
+        self._rows = list(rows)
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def scalars(self):
+        return _Result(row[0] for row in self._rows)
+
+    def all(self):
+        return list(self._rows)
+
+
+class FakeSession:
+    """Answers the writer's lookups from ``stored``; INSERTs get ``returning``.
+
+    The upsert itself is not emulated: each INSERT returns the next scripted
+    ``RETURNING`` result (one ``(inserted,)`` row per inserted or updated
+    listing), the way Postgres would. What the upsert does with a row is
+    covered by the compiled-SQL tests and the Postgres tests below.
+    """
+
+    _ROW_PARAM = re.compile(r"^(.+)_m(\d+)$")
+
+    def __init__(self, stored=(), returning=()):
+        self.stored = [dict(row) for row in stored]
+        self.returning = [list(flags) for flags in returning]
+        self.statements = []
+
+    def execute(self, stmt):
+        self.statements.append(stmt)
+        if getattr(stmt, "is_insert", False):
+            return _Result(self.returning.pop(0) if self.returning else [])
+        params = stmt.compile().params
+        if "vin_1" in params:
+            return _Result(
+                (row["vin"], row["source"], row["external_id"])
+                for row in self.stored
+                if row.get("vin") in params["vin_1"]
+            )
+        return _Result((row["url"],) for row in self.stored if row["url"] in params["url_1"])
+
+    def inserts(self):
+        return [stmt for stmt in self.statements if getattr(stmt, "is_insert", False)]
+
+    @classmethod
+    def sent_rows(cls, stmt):
+        """The VALUES rows of a multi-row INSERT, in order."""
+        rows = {}
+        for name, value in stmt.compile().params.items():
+            match = cls._ROW_PARAM.match(name)
+            if match:
+                rows.setdefault(int(match.group(2)), {})[match.group(1)] = value
+        return [row for _, row in sorted(rows.items())]
+
+
+def _item(url, price=5000, **extra):
+    return ListingRecord(
+        source="craigslist",
+        url=url,
+        title="2015 Honda Civic",
+        listed_price=price,
+        year=2015,
+        make="Honda",
+        model="Civic",
+        location="Austin",
+        **{"posted_at": datetime(2026, 1, 1, tzinfo=timezone.utc), **extra},
+    )
+
+
+def _stored(url, external_id=None, **extra):
+    return {
+        "source": "craigslist",
+        "url": url,
+        "external_id": external_id,
+        "title": "2015 Honda Civic",
+        "listed_price": 5000,
+        "vin": None,
+        **extra,
+    }
+
+
+def _post(n):
+    return f"https://austin.craigslist.org/cto/d/civic/{7700000000 + n}.html"
+
+
+def test_persist_listings_counts_and_resyncs_existing():
+    session = FakeSession(stored=[_stored("https://a/old")], returning=[[(True,)]])
+    outcome = persist_listings(session, [_item("https://a/new"), _item("https://a/old")])
+
+    assert (outcome.inserted, outcome.updated, outcome.skipped) == (1, 0, 1)
+    assert outcome.persisted_urls == ["https://a/new", "https://a/old"]
+    (added,) = FakeSession.sent_rows(session.inserts()[0])
+    assert added["url"] == "https://a/new" and added["predicted_price"] == 5750
+
+
+def test_persist_listings_dedupes_on_post_id_not_url():
+    session = FakeSession(returning=[[(True,)]])  # the repost is unchanged
+    repost = _item(
+        "https://dallas.craigslist.org/cto/d/other-slug/7700000001.html", external_id=7700000001
+    )
+    fresh = _item(_post(2), external_id=7700000002)
+
+    outcome = persist_listings(session, [repost, fresh])
+
+    assert (outcome.inserted, outcome.updated, outcome.skipped) == (1, 0, 1)
+    (upsert,) = session.inserts()
+    assert [row["external_id"] for row in FakeSession.sent_rows(upsert)] == [
+        7700000001,
+        7700000002,
+    ]
+    assert "ON CONFLICT ON CONSTRAINT uq_listings_source_external_id" in _sql(upsert)
+
+
+def test_persist_listings_collapses_reposts_sharing_a_vin():
+    session = FakeSession(
+        stored=[_stored(_post(9), external_id=7700000009, vin="1HGCM82633A004352")],
+        returning=[[(True,)]],
+    )
+    repost = _item(_post(1), external_id=7700000001, vin="1HGCM82633A004352")
+    first = _item(_post(2), external_id=7700000002, vin="1FTFW1ET9DFC10312")
+    same_car = _item(_post(3), external_id=7700000003, vin="1FTFW1ET9DFC10312")
+
+    outcome = persist_listings(session, [repost, first, same_car])
+
+    assert (outcome.inserted, outcome.skipped) == (1, 2)
+    (upsert,) = session.inserts()
+    assert [row["url"] for row in FakeSession.sent_rows(upsert)] == [first.url]
+    assert len(outcome.persisted_urls) == 3
+
+
+def test_persist_listings_updates_changed_listings_with_exact_counts():
+    session = FakeSession(
+        stored=[_stored(_post(2), external_id=7700000002, vin="1HGCM82633A004352")],
+        # price_drop updated, unchanged left alone, new inserted
+        returning=[[(False,), (True,)]],
+    )
+    price_drop = _item(_post(1), price=4500, external_id=7700000001)
+    # Its own VIN: the same listing, not a repost to collapse.
+    unchanged = _item(_post(2), external_id=7700000002, vin="1HGCM82633A004352")
+    new = _item(_post(3), external_id=7700000003)
+    twice = _item(_post(3), external_id=7700000003)
+
+    outcome = persist_listings(session, [new, unchanged, price_drop, twice])
+
+    assert (outcome.inserted, outcome.updated, outcome.skipped) == (1, 1, 2)
+    (upsert,) = session.inserts()
+    sent = FakeSession.sent_rows(upsert)
+    # Sorted by key (one lock order for every writer), the duplicate dropped.
+    assert [row["external_id"] for row in sent] == [7700000001, 7700000002, 7700000003]
+    assert sent[0]["listed_price"] == 4500
+
+
+def test_upsert_conflicts_on_the_post_id_and_reports_inserts():
+    sql = _sql(upsert_statement([listing_row(_item(_post(1), external_id=7700000001), NOW)]))
+
+    assert "ON CONFLICT ON CONSTRAINT uq_listings_source_external_id DO UPDATE SET" in sql
+    assert "is_active = true" in sql and "expired_at = %(param_1)s" in sql
+    assert "WHERE listings.is_active IS DISTINCT FROM true OR listings.title IS DISTINCT FROM excluded.title" in sql
+    assert sql.endswith("RETURNING (xmax = 0) AS inserted")
+
+
+def test_degraded_detail_fetch_keeps_stored_detail_fields():
+    sql = _sql(upsert_statement([listing_row(_item(_post(1), external_id=7700000001), NOW)]))
+    update, where = sql.split("DO UPDATE SET ", 1)[1].split(" WHERE ", 1)
+
+    for name in ("description", "mileage", "vin"):
+        kept = f"coalesce(excluded.{name}, listings.{name})"
+        assert f"{name} = {kept}" in update
+        # An empty value is not a change, so it does not count as an update.
+        assert f"listings.{name} IS DISTINCT FROM {kept}" in where
+    attributes = (
+        "CASE WHEN (excluded.attributes = '{}'::jsonb) THEN listings.attributes "
+        "ELSE excluded.attributes END"
+    )
+    assert f"attributes = {attributes}" in update
+    assert f"listings.attributes IS DISTINCT FROM {attributes}" in where
+    assert "posted_at = least(excluded.posted_at, listings.posted_at)" in update
+
+
+def test_listings_without_post_id_skip_urls_stored_concurrently():
+    session = FakeSession()
+    persist_listings(session, [_item("https://a/new")])
+
+    lookup, insert = (_sql(stmt) for stmt in session.statements)
+    assert "WHERE listings.external_id IS NULL AND listings.url IN" in lookup
+    assert "ON CONFLICT (url) WHERE external_id IS NULL DO NOTHING" in insert
+
+
+class _Cursor:
+    def __init__(self, copies):
+        self.copies = copies
+
+    def copy_expert(self, sql, buffer):
+        self.copies.append((sql, buffer.read()))
+
+    def close(self):
+        pass
+
+
+class _Connection:
+    def __init__(self, copies):
+        self.connection = self
+        self.copies = copies
+
+    def cursor(self):
+        return _Cursor(self.copies)
+
+
+class CopySession(FakeSession):
+    def __init__(self):
+        super().__init__()
+        self.copies = []
+
+    def connection(self):
+        return _Connection(self.copies)
+
+
+def test_large_batches_are_copied_into_a_staging_table():
+    session = CopySession()
+    items = [
+        _item(_post(n), external_id=7700000000 + n, description='says "hi", bye') for n in (2, 1)
+    ]
+
+    persist_listings(session, items, copy_threshold=2)
+
+    (copy_sql, data), = session.copies
+    assert copy_sql.startswith("COPY listings_stage (id, source, external_id, url, title,")
+    lines = data.splitlines()
+    assert [line.split(",")[2] for line in lines] == ["7700000001", "7700000002"]
+    assert '"says ""hi"", bye"' in lines[0]
+    assert ',,' in lines[0]  # NULL mileage/vin are unquoted empty fields
+    upsert = _sql(session.statements[-1])
+    assert upsert.startswith("INSERT INTO listings (id, source, external_id, url")
+    assert "SELECT listings_stage.id" in upsert and "ORDER BY listings_stage.source" in upsert
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (None, ""),  # unquoted empty field: NULL
+        ("", '""'),  # quoted empty field: empty string
+        ('says "hi", bye', '"says ""hi"", bye"'),
+        ("line\nbreak", '"line\nbreak"'),
+        (5000, "5000"),
+        (12.5, "12.5"),
+        ({"condition": 'like "new"'}, '"{""condition"": ""like \\""new\\""""}"'),
+        ({}, '"{}"'),
+        (datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc), '"2026-01-02T03:04:05+00:00"'),
+        (uuid.UUID(int=1), '"00000000-0000-0000-0000-000000000001"'),
+    ],
+)
+def test_csv_value_encodes_for_copy(value, expected):
+    assert _csv_value(value) == expected
+
+
+def test_csv_rows_round_trip_through_a_csv_reader():
+    row = listing_row(_item(_post(1), external_id=7700000001, description='a, "b"'), NOW)
+    row["attributes"] = {"drive": "4wd", "note": 'say "hi"'}
+    line = ",".join(_csv_value(row[name]) for name in _COLUMNS)
+
+    (parsed,) = csv.reader(io.StringIO(line))
+    decoded = dict(zip(_COLUMNS, parsed))
+    assert decoded["description"] == 'a, "b"'
+    assert json.loads(decoded["attributes"]) == row["attributes"]
+    assert datetime.fromisoformat(decoded["posted_at"]) == row["posted_at"]
+    assert decoded["mileage"] == "" and decoded["vin"] == ""
+
+
+# --- Against a real Postgres (set TEST_DATABASE_URL; skipped otherwise) ------
+
+
+@pytest.fixture
+def pg_session():
+    """A session on a throwaway schema of ``TEST_DATABASE_URL``."""
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL not set")
+    schema = f"test_listing_writer_{uuid.uuid4().hex[:8]}"
+    admin = create_engine(_to_sync_url(url), future=True)
+    try:
+        with admin.begin() as conn:
+            conn.execute(text(f"CREATE SCHEMA {schema}"))
+    except OperationalError as exc:
+        admin.dispose()
+        pytest.skip(f"Postgres unavailable: {exc}")
+    engine = create_engine(
+        _to_sync_url(url), future=True, connect_args={"options": f"-csearch_path={schema}"}
+    )
+    Base.metadata.create_all(engine)
+    try:
+        with Session(engine) as session:
+            yield session
+    finally:
+        engine.dispose()
+        with admin.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+        admin.dispose()
+
+
+def _stored_listing(session, external_id):
+    return session.execute(
+        select(Listing).where(Listing.external_id == external_id)
+    ).scalar_one()
+
+
+@pytest.mark.parametrize("copy_threshold", [0, 1], ids=["insert", "copy"])
+def test_postgres_upsert_counts_and_keeps_good_detail_fields(pg_session, copy_threshold):
+    good = _item(
+        _post(1),
+        external_id=7700000001,
+        description='Runs "great", one owner',
+        mileage=78000,
+        attributes={"condition": "excellent"},
+        vin="1HGCM82633A004352",
+    )
+    plain = _item(_post(2), external_id=7700000002, description="")
+    first = persist_listings(pg_session, [good, plain], copy_threshold=copy_threshold)
+    pg_session.commit()
+    assert (first.inserted, first.updated, first.skipped) == (2, 0, 0)
+
+    # Detail fetch failed this time: empty fields and the scrape-time fallback.
+    degraded = _item(_post(1), external_id=7700000001, posted_at=NOW)
+    price_drop = _item(_post(2), price=4500, external_id=7700000002, description="")
+    second = persist_listings(pg_session, [degraded, price_drop], copy_threshold=copy_threshold)
+    pg_session.commit()
+    assert (second.inserted, second.updated, second.skipped) == (0, 1, 1)
+
+    stored = _stored_listing(pg_session, 7700000001)
+    assert stored.description == 'Runs "great", one owner'
+    assert (stored.mileage, stored.vin) == (78000, "1HGCM82633A004352")
+    assert stored.attributes == {"condition": "excellent"}
+    assert stored.posted_at == good.posted_at
+    repriced = _stored_listing(pg_session, 7700000002)
+    # "" survives COPY as an empty string, not NULL.
+    assert (repriced.listed_price, repriced.description) == (4500, "")
+
+
+def test_postgres_listings_without_post_id_are_inserted_once(pg_session):
+    first = persist_listings(pg_session, [_item("https://a/no-id")])
+    second = persist_listings(pg_session, [_item("https://a/no-id")])
+    pg_session.commit()
+
+    assert (first.inserted, second.inserted, second.skipped) == (1, 0, 1)
+    count = pg_session.execute(
+        select(func.count()).select_from(Listing).where(Listing.url == "https://a/no-id")
+    ).scalar_one()
+    assert count == 1
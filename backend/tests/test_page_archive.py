@@ -0,0 +1,90 @@
+"""Offline tests for the raw-page archive and the re-parse CLI helpers."""
+
+import gzip
+from pathlib import Path
+
+from app import reparse
+from app.page_archive import DETAIL_PAGE, SEARCH_PAGE, PageArchive
+
+FIXTURES = Path(__file__).parent / "fixtures"
+DETAIL_URL = "https://austin.craigslist.org/cto/d/austin-2015-honda-civic-lx/7700000001.html"
+SEARCH_URL = "https://austin.craigslist.org/search/cta?query=honda"
+
+
+def _load(name):
+    return (FIXTURES / name).read_text(encoding="utf-8")
+
+
+def _archive(tmp_path, segment_max_bytes=1 << 20):
+    return PageArchive(tmp_path / "archive", segment_max_bytes=segment_max_bytes)
+
+
+def test_append_and_read_round_trip(tmp_path):
+    archive = _archive(tmp_path)
+    assert archive.append("https://a/1", DETAIL_PAGE, b"<html>one</html>", fetched_at=10.0)
+
+    [page] = archive.latest()
+    assert (page.url, page.kind, page.fetched_at) == ("https://a/1", DETAIL_PAGE, 10.0)
+    assert archive.read(page) == b"<html>one</html>"
+
+    # Each record is a standalone gzip member carrying a WARC header.
+    raw = (archive.directory / page.segment).read_bytes()
+    record = gzip.decompress(raw[page.offset : page.offset + page.length])
+    assert record.startswith(b"WARC/1.1\r\n")
+    assert b"WARC-Target-URI: https://a/1\r\n" in record
+
+
+def test_unchanged_page_is_not_stored_twice(tmp_path):
+    archive = _archive(tmp_path)
+    assert archive.append("https://a/1", DETAIL_PAGE, b"same")
+    assert not archive.append("https://a/1", DETAIL_PAGE, b"same")
+    assert archive.append("https://a/1", DETAIL_PAGE, b"changed")
+
+    pages = list(archive.latest())
+    assert len(pages) == 1 and archive.read(pages[0]) == b"changed"
+
+
+def test_latest_filters_by_kind_and_keeps_fetch_order(tmp_path):
+    archive = _archive(tmp_path)
+    archive.append("https://a/search", SEARCH_PAGE, b"s", fetched_at=1.0)
+    archive.append("https://a/2", DETAIL_PAGE, b"d2", fetched_at=3.0)
+    archive.append("https://a/1", DETAIL_PAGE, b"d1", fetched_at=2.0)
+
+    assert [p.url for p in archive.latest()] == ["https://a/search", "https://a/1", "https://a/2"]
+    assert [p.url for p in archive.latest(DETAIL_PAGE)] == ["https://a/1", "https://a/2"]
+
+
+def test_segments_roll_over_at_size_limit(tmp_path):
+    archive = _archive(tmp_path, segment_max_bytes=400)
+    for i in range(6):
+        archive.append(f"https://a/{i}", DETAIL_PAGE, bytes([i]) * 200)
+
+    pages = list(archive.latest())
+    assert len({p.segment for p in pages}) > 1
+    assert [archive.read(p) for p in pages] == [bytes([i]) * 200 for i in range(6)]
+
+
+def test_reparse_page_extracts_listing_fields():
+    search = reparse.reparse_page(SEARCH_PAGE, SEARCH_URL, _load("search_results.html"))
+    assert search[DETAIL_URL] == {"year": 2015, "make": "Honda", "model": "Civic"}
+
+    detail = reparse.reparse_page(DETAIL_PAGE, DETAIL_URL, _load("detail.html"))
+    assert detail[DETAIL_URL]["mileage"] == 78000
+    assert detail[DETAIL_URL]["posted_at"] is not None
+
+
+def test_reparse_page_leaves_posted_at_alone_when_missing():
+    detail = reparse.reparse_page(DETAIL_PAGE, DETAIL_URL, "<html><body></body></html>")
+    assert "posted_at" not in detail[DETAIL_URL]
+
+
+def test_reparse_archive_merges_search_and_detail_fields(tmp_path):
+    archive = _archive(tmp_path)
+    archive.append(SEARCH_URL, SEARCH_PAGE, _load("search_results.html").encode(), fetched_at=1.0)
+    archive.append(DETAIL_URL, DETAIL_PAGE, _load("detail.html").encode(), fetched_at=2.0)
+
+    updates = reparse.reparse_archive(archive, workers=2)
+
+    assert updates[DETAIL_URL]["make"] == "Honda"
+    assert updates[DETAIL_URL]["mileage"] == 78000
+    assert len(updates) == 2  # both priced rows on the search page
@@ -0,0 +1,212 @@
+"""Unit tests for per-host request pacing (fake clock, no sleeping)."""
+
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+import redis
+from celery.exceptions import SoftTimeLimitExceeded
+
+from app.circuit_breaker import ScraperBlocked
+from app.politeness import (
+    AdaptiveConcurrency,
+    HostScheduler,
+    Pacer,
+    RedisTokenBucket,
+    TimeBudgetExhausted,
+    host_of,
+    parse_retry_after,
+)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_same_host_slots_are_spaced():
+    clock = _Clock()
+    sched = HostScheduler((0.5, 0.5), clock=clock)
+
+    assert sched.reserve("austin.craigslist.org") == 0.0
+    assert sched.reserve("austin.craigslist.org") == 0.5
+    assert sched.reserve("austin.craigslist.org") == 1.0
+
+
+def test_other_hosts_do_not_wait():
+    clock = _Clock()
+    sched = HostScheduler((0.5, 0.5), clock=clock)
+
+    sched.reserve("austin.craigslist.org")
+    assert sched.reserve("dallas.craigslist.org") == 0.0
+
+
+def test_slot_is_not_in_the_past():
+    clock = _Clock()
+    sched = HostScheduler((0.5, 0.5), clock=clock)
+
+    sched.reserve("austin.craigslist.org")
+    clock.now += 10
+    assert sched.reserve("austin.craigslist.org") == 0.0
+
+
+def test_host_of():
+    assert host_of("https://Austin.craigslist.org/cto/d/x/1.html") == "austin.craigslist.org"
+    assert host_of("not a url") == ""
+
+
+# --------------------------------------------------------------------------- #
+# Retry-After, AIMD, Pacer
+# --------------------------------------------------------------------------- #
+
+
+def test_penalize_pushes_next_slot():
+    clock = _Clock()
+    sched = HostScheduler((0.0, 0.0), clock=clock)
+
+    sched.penalize("austin.craigslist.org", 30)
+    assert sched.reserve("austin.craigslist.org") == 30
+    assert sched.reserve("dallas.craigslist.org") == 0
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [
+        ("120", 120.0),
+        ("Wed, 01 May 2024 12:00:30 GMT", 30.0),
+        ("soon", None),
+        (None, None),
+    ],
+)
+def test_parse_retry_after(value, expected):
+    now = datetime(2024, 5, 1, 12, 0, 0, tzinfo=timezone.utc)
+    assert parse_retry_after(value, now=now) == expected
+
+
+def test_aimd_grows_on_fast_success_and_halves_on_error():
+    aimd = AdaptiveConcurrency(maximum=8, initial=2)
+
+    for _ in range(6):
+        aimd.acquire()
+        aimd.release(ok=True, latency=0.1)
+    assert 3 <= aimd.limit <= 8
+
+    before = aimd.limit
+    aimd.acquire()
+    aimd.release(ok=False, latency=0.1)
+    assert aimd.limit == pytest.approx(max(1.0, before / 2))
+
+
+def test_aimd_holds_on_slow_success_and_respects_bounds():
+    aimd = AdaptiveConcurrency(maximum=2, initial=1, slow_after=1.0)
+    aimd.acquire()
+    aimd.release(ok=True, latency=5.0)
+    assert aimd.limit == 1
+
+    for _ in range(20):
+        aimd.acquire()
+        aimd.release(ok=True, latency=0.0)
+    assert aimd.limit == 2
+
+    for _ in range(5):
+        aimd.acquire()
+        aimd.release(ok=False, latency=0.0)
+    assert aimd.limit == 1
+
+
+def test_pacer_applies_retry_after_to_host():
+    clock = _Clock()
+    sched = HostScheduler((0.0, 0.0), clock=clock)
+    pacer = Pacer(sched)
+    url = "https://austin.craigslist.org/cto/d/x/1.html"
+
+    with pacer.request(url) as outcome:
+        outcome.observe(httpx.Response(429, headers={"Retry-After": "45"}))
+
+    assert sched.reserve("austin.craigslist.org") == 45
+
+
+def test_pacer_caps_retry_after():
+    clock = _Clock()
+    sched = HostScheduler((0.0, 0.0), clock=clock)
+    pacer = Pacer(sched, max_backoff=10)
+
+    with pacer.request("https://austin.craigslist.org/") as outcome:
+        outcome.observe(httpx.Response(503, headers={"Retry-After": "9999"}))
+
+    assert sched.reserve("austin.craigslist.org") == 10
+
+
+def test_pacer_stops_without_claiming_a_slot_past_the_deadline():
+    clock = _Clock()
+    sched = HostScheduler((0.0, 0.0), clock=clock)
+    pacer = Pacer(sched, deadline=clock.now + 60, clock=clock)
+    url = "https://austin.craigslist.org/cto/d/x/1.html"
+
+    with pacer.request(url) as outcome:
+        outcome.observe(httpx.Response(429, headers={"Retry-After": "120"}))
+
+    with pytest.raises(TimeBudgetExhausted) as excinfo:
+        with pacer.request(url):
+            pytest.fail("must not send a request past the deadline")
+    # Handled like the soft time limit, not as the site blocking us.
+    assert isinstance(excinfo.value, SoftTimeLimitExceeded)
+    assert not isinstance(excinfo.value, ScraperBlocked)
+    # The slot after the Retry-After pause is still free for other workers.
+    assert sched.reserve("austin.craigslist.org") == 120
+
+
+def test_pacer_stops_before_reserving_once_the_deadline_passed():
+    clock = _Clock()
+
+    class _Limiter:
+        def reserve(self, host, max_wait=None):
+            pytest.fail("must not reserve a slot after the deadline")
+
+    pacer = Pacer(_Limiter(), deadline=clock.now, clock=clock)
+
+    with pytest.raises(TimeBudgetExhausted):
+        with pacer.request("https://austin.craigslist.org/"):
+            pass
+
+
+def test_scheduler_leaves_slots_beyond_max_wait_unclaimed():
+    clock = _Clock()
+    sched = HostScheduler((0.5, 0.5), clock=clock)
+    sched.penalize("austin.craigslist.org", 30)
+
+    assert sched.reserve("austin.craigslist.org", max_wait=10) == 30
+    assert sched.reserve("austin.craigslist.org", max_wait=30) == 30
+    assert sched.reserve("austin.craigslist.org") == 30.5
+
+
+def test_pacer_waits_for_a_slot_within_the_deadline():
+    clock = _Clock()
+    sched = HostScheduler((0.0, 0.0), clock=clock)
+    pacer = Pacer(sched, deadline=clock.now + 60, clock=clock)
+
+    with pacer.request("https://austin.craigslist.org/") as outcome:
+        outcome.observe(httpx.Response(200))
+    assert outcome.status == 200
+
+
+class _BrokenRedis:
+    def register_script(self, _lua):
+        def run(**_kwargs):
+            raise redis.ConnectionError("down")
+
+        return run
+
+
+def test_redis_bucket_falls_back_to_local_pacing():
+    clock = _Clock()
+    local = HostScheduler((0.5, 0.5), clock=clock)
+    bucket = RedisTokenBucket(_BrokenRedis(), rate=2.0, burst=1, fallback=local)
+
+    assert bucket.reserve("austin.craigslist.org") == 0.0
+    assert bucket.reserve("austin.craigslist.org") == 0.5
+    bucket.penalize("austin.craigslist.org", 5)  # local still applied
+    assert bucket.reserve("austin.craigslist.org") == 5
@@ -0,0 +1,69 @@
+"""Offline tests for multi-city scrape batches (no broker, no Redis)."""
+
+import pytest
+
+from app import scrape_batches as sb
+
+
+@pytest.fixture
+def fake_redis(fake_redis, monkeypatch):
+    monkeypatch.setattr(sb, "get_redis", lambda: fake_redis)
+    return fake_redis
+
+
+def test_normalise_targets_dedupes_and_crosses():
+    targets = sb.normalise_targets(
+        ["Austin", "austin ", "", "dallas"], ["honda  civic", "honda civic", "tacoma"]
+    )
+    assert targets == [
+        ("austin", "honda civic"),
+        ("austin", "tacoma"),
+        ("dallas", "honda civic"),
+        ("dallas", "tacoma"),
+    ]
+
+
+def test_claims_skip_urls_owned_by_sibling_jobs(fake_redis):
+    assert sb.claim_urls("b1", "job-austin", ["u1", "u2"]) == set()
+    assert sb.claim_urls("b1", "job-dallas", ["u2", "u3"]) == {"u2"}
+    # A retried job keeps its own earlier claims.
+    assert sb.claim_urls("b1", "job-austin", ["u1", "u2", "u3"]) == {"u3"}
+
+
+def test_claims_expire_with_the_batch(fake_redis):
+    sb.claim_urls("b1", "job-austin", ["u1"])
+    assert fake_redis.ttl("scrape:batch:b1:claims") == sb._ttl()
+
+    fake_redis.advance(sb._ttl())
+    assert sb.claim_urls("b1", "job-dallas", ["u1"]) == set()
+
+
+JOBS = [
+    {"job_id": "a", "city": "austin", "query": "civic"},
+    {"job_id": "d", "city": "dallas", "query": "civic"},
+]
+
+
+def test_rollup_in_progress_reports_per_city_progress():
+    summary = sb.rollup(
+        JOBS,
+        [("SUCCESS", {"fetched": 4, "inserted": 3, "skipped": 1}),
+         ("PROGRESS", {"stage": "scraping"})],
+    )
+    assert summary["state"] == "PROGRESS"
+    assert summary["completed"] == 1
+    assert summary["totals"]["inserted"] == 3
+    assert summary["jobs"][1]["progress"] == {"stage": "scraping"}
+
+
+@pytest.mark.parametrize(
+    "states,expected",
+    [
+        ([("PENDING", None), ("PENDING", None)], "PENDING"),
+        ([("SUCCESS", {}), ("SUCCESS", {})], "SUCCESS"),
+        ([("SUCCESS", {}), ("FAILURE", ValueError("x"))], "PARTIAL"),
+        ([("FAILURE", None), ("REVOKED", None)], "FAILURE"),
+    ],
+)
+def test_rollup_terminal_states(states, expected):
+    assert sb.rollup(JOBS, states)["state"] == expected
@@ -0,0 +1,59 @@
+"""Offline tests for per-job scrape checkpoints (in-memory Redis stand-in)."""
+
+from app.scrape_checkpoints import Checkpoint, CheckpointStore
+
+URL = "https://austin.craigslist.org/cto/d/car/{}.html"
+
+
+def test_saved_checkpoint_accumulates_done_urls_and_counters(fake_redis):
+    store = CheckpointStore(fake_redis, ttl_seconds=60)
+    checkpoint = Checkpoint("austin", "civic", 50, {"fetched": 2, "inserted": 1})
+
+    store.save("job-1", checkpoint, [URL.format(1), URL.format(2)])
+    checkpoint.counters["fetched"] = 3
+    store.save("job-1", checkpoint, [URL.format(3)])
+
+    loaded = store.load("job-1")
+    assert loaded.counters == {"fetched": 3, "inserted": 1}
+    assert loaded.done == {URL.format(n) for n in (1, 2, 3)}
+    assert loaded.max_results == 50
+    assert loaded.matches("Austin", "  CIVIC ")
+    assert not loaded.matches("dallas", "civic")
+
+
+def test_checkpoints_expire_unless_the_job_keeps_saving(fake_redis):
+    store = CheckpointStore(fake_redis, ttl_seconds=60)
+    checkpoint = Checkpoint("austin", "civic", 10)
+    store.save("job-1", checkpoint, [URL.format(1)])
+    assert {fake_redis.ttl(key) for key in fake_redis.keys()} == {60}
+
+    fake_redis.advance(50)
+    store.save("job-1", checkpoint, [])  # progress refreshes both keys
+    fake_redis.advance(50)
+    assert store.load("job-1").done == {URL.format(1)}
+
+    fake_redis.advance(11)
+    assert store.load("job-1") is None
+    assert fake_redis.keys() == []
+
+
+def test_clear_and_unknown_tokens(fake_redis):
+    store = CheckpointStore(fake_redis, ttl_seconds=60)
+    store.save("job-1", Checkpoint("austin", "civic", 10), [URL.format(1)])
+
+    store.clear("job-1")
+
+    assert store.load("job-1") is None
+    assert fake_redis.keys() == []
+
+
+def test_redis_errors_and_zero_ttl_mean_no_resume(fake_redis):
+    fake_redis.fail = True
+    store = CheckpointStore(fake_redis, ttl_seconds=60)
+    store.save("job-1", Checkpoint("austin", "civic", 10), [URL.format(1)])  # swallowed
+    assert store.load("job-1") is None
+
+    fake_redis.fail = False
+    disabled = CheckpointStore(fake_redis, ttl_seconds=0)
+    disabled.save("job-1", Checkpoint("austin", "civic", 10), [URL.format(1)])
+    assert disabled.load("job-1") is None
@@ -0,0 +1,65 @@
+"""Offline tests for single-flight scrape coalescing (no broker, no Redis)."""
+
+import pytest
+
+from app import scrape_coalescing as sc
+from app.settings import settings
+
+
+@pytest.fixture
+def fake_redis(fake_redis, monkeypatch):
+    monkeypatch.setattr(sc, "get_redis", lambda: fake_redis)
+    monkeypatch.setattr(settings, "scrape_coalesce_window_s", 60)
+    return fake_redis
+
+
+def _states(**states):
+    return lambda job_id: states.get(job_id, "PENDING")
+
+
+def test_identical_requests_join_the_first_job(fake_redis):
+    assert sc.join_or_claim("Austin", "honda  civic", 10, "job-1", _states()) is None
+    assert sc.join_or_claim("austin", "Honda Civic", 10, "job-2", _states()) == "job-1"
+    # Different parameters are a different flight.
+    assert sc.join_or_claim("austin", "honda civic", 20, "job-3", _states()) is None
+
+
+def test_finished_job_stays_joinable_for_the_window_only(fake_redis):
+    sc.join_or_claim("austin", "civic", 10, "job-1", _states())
+    (key,) = fake_redis.keys()
+    assert fake_redis.ttl(key) == sc._IN_FLIGHT_TTL
+    sc.settle("austin", "civic", 10, "job-1")
+    assert fake_redis.ttl(key) == 60
+
+    sc.settle("austin", "civic", 10, "someone-else")  # not the owner: no-op
+    fake_redis.advance(59)
+    assert sc.join_or_claim("austin", "civic", 10, "job-2", _states()) == "job-1"
+
+    fake_redis.advance(1)
+    assert sc.join_or_claim("austin", "civic", 10, "job-3", _states()) is None
+    assert fake_redis.get(key) == "job-3"
+
+
+def test_claim_of_a_dead_worker_lapses_after_the_in_flight_ttl(fake_redis):
+    sc.join_or_claim("austin", "civic", 10, "job-1", _states())
+    fake_redis.advance(sc._IN_FLIGHT_TTL)
+
+    assert sc.join_or_claim("austin", "civic", 10, "job-2", _states()) is None
+
+
+def test_failed_jobs_are_replaced_not_joined(fake_redis):
+    sc.join_or_claim("austin", "civic", 10, "job-1", _states())
+    states = _states(**{"job-1": "FAILURE"})
+
+    assert sc.join_or_claim("austin", "civic", 10, "job-2", states) is None
+    assert [fake_redis.get(key) for key in fake_redis.keys()] == ["job-2"]
+
+
+def test_release_and_zero_window(fake_redis, monkeypatch):
+    sc.join_or_claim("austin", "civic", 10, "job-1", _states())
+    sc.release("austin", "civic", 10, "job-1")
+    assert fake_redis.keys() == []
+
+    monkeypatch.setattr(settings, "scrape_coalesce_window_s", 0)
+    assert sc.join_or_claim("austin", "civic", 10, "job-2", _states()) is None
+    assert fake_redis.keys() == []
@@ -12,6 +12,12 @@ import httpx
 import pytest
 
 from app import scraper_craigslist as scr
+from app.circuit_breaker import ScraperBlocked
+from app.crawl_watermarks import Watermark
+from app.html_backends import Bs4Backend, LxmlBackend, get_backend, lxml_available
+from app.politeness import TimeBudgetExhausted
+from app.settings import settings
+from app.vehicle_catalog import classify_title, classify_titles
 
 FIXTURES = Path(__file__).parent / "fixtures"
 
@@ -69,6 +75,31 @@ def test_parse_make_model(title, make, model):
     assert scr._parse_make_model(title) == (make, model)
 
 
+@pytest.mark.parametrize(
+    "title,make,model",
+    [
+        ("2016 Land Rover Range Rover Sport HSE", "Land Rover", "Range Rover Sport"),
+        ("Alfa Romeo Giulia Ti 2018", "Alfa Romeo", "Giulia"),
+        ("2014 Jeep Grand Cherokee Limited 4x4", "Jeep", "Grand Cherokee"),
+        ("2012 jeep cherokee", "Jeep", "Cherokee"),
+        ("2019 Ford F150 Lariat", "Ford", "F-150"),
+        ("ford f 250 super duty", "Ford", "F-250"),
+        ("Honda CRV EX-L", "Honda", "CR-V"),
+        ("2021 Tesla Model 3 long range", "Tesla", "Model 3"),
+        ("Toyota 2010 RAV4", "Toyota", "RAV4"),
+        ("Porsche 911 Carrera", "Porsche", "911"),
+        ("2008 Saab 9-3 Aero", "Saab", "9-3"),  # uncatalogued: next-token fallback
+    ],
+)
+def test_parse_make_model_catalog(title, make, model):
+    assert scr._parse_make_model(title) == (make, model)
+
+
+def test_classify_titles_batch_matches_single():
+    titles = ["2015 Honda Civic", "Land Rover Defender 110", "", "sofa", "2015 Honda Civic"]
+    assert classify_titles(titles) == [classify_title(t) for t in titles]
+
+
 def test_parse_iso_datetime_compact_offset():
     dt = scr._parse_iso_datetime("2024-05-01T12:30:00-0500")
     assert dt == datetime(2024, 5, 1, 12, 30, tzinfo=timezone(_hours(-5)))
@@ -97,17 +128,17 @@ def test_parse_search_results_extracts_priced_rows():
     assert len(rows) == 2
 
     honda = rows[0]
-    assert honda["source"] == "craigslist"
-    assert honda["url"].endswith("7700000001.html")
-    assert honda["listed_price"] == 8500
-    assert honda["make"] == "Honda"
-    assert honda["model"] == "Civic"
-    assert honda["year"] == 2015
-    assert honda["location"] == "austin"
+    assert honda.source == "craigslist"
+    assert honda.url.endswith("7700000001.html")
+    assert honda.listed_price == 8500
+    assert honda.make == "Honda"
+    assert honda.model == "Civic"
+    assert honda.year == 2015
+    assert honda.location == "austin"
 
     ford = rows[1]
-    assert ford["make"] == "Ford"
-    assert ford["listed_price"] == 22000
+    assert ford.make == "Ford"
+    assert ford.listed_price == 22000
 
 
 def test_parse_search_results_empty_html():
@@ -135,14 +166,65 @@ def test_detail_parsers():
     assert "Clean title, runs great" in desc
 
 
+def test_detail_attributes_captured_in_one_pass():
+    fields = scr._parse_detail(_load("detail.html"))
+
+    assert fields["mileage"] == 78000
+    assert fields["attributes"] == {
+        "odometer": "78,000",
+        "title_status": "clean",
+        "transmission": "automatic",
+    }
+
+
+def test_attributes_from_texts_normalises_labels_and_values():
+    texts = [
+        "2015 honda civic",
+        "Title Status:  Clean ",
+        "paint color: Dark Blue",
+        "odometer:",
+        "title status: salvage",
+    ]
+    assert scr._attributes_from_texts(texts) == {
+        "title_status": "clean",
+        "paint_color": "dark blue",
+    }
+
+
+def test_cached_fields_without_attributes_are_reparsed():
+    cached = {"mileage": 1, "posted_at": "2024-05-01T12:30:00-05:00", "description": None}
+    assert scr._detail_fields_from_cache(cached) is None
+    cached["attributes"] = {"drive": "fwd"}
+    assert scr._detail_fields_from_cache(cached) is None
+    cached["vin"] = None
+    assert scr._detail_fields_from_cache(cached)["attributes"] == {"drive": "fwd"}
+
+
+def test_detail_vin_prefers_attribute_over_description():
+    html = _load("detail.html").replace(
+        "Garage kept.", "Garage kept. VIN 1M8GDM9AXKP042788"
+    )
+    assert scr._parse_detail(html)["vin"] == "1M8GDM9AXKP042788"
+
+    html = html.replace(
+        "<span>transmission: automatic</span>",
+        "<span>transmission: automatic</span><span>VIN: 1HGCM82633A004352</span>",
+    )
+    assert scr._parse_detail(html)["vin"] == "1HGCM82633A004352"
+    assert scr._parse_detail(_load("detail.html"))["vin"] is None
+
+
 # --------------------------------------------------------------------------- #
 # End-to-end with mocked HTTP
 # --------------------------------------------------------------------------- #
 
 
 class _FakeResponse:
-    def __init__(self, text: str):
+    def __init__(self, text: str, status_code: int = 200, headers=None):
         self.text = text
+        self.status_code = status_code
+        self.headers = httpx.Headers(headers or {})
+        self.extensions = {}
 
     def raise_for_status(self):
         return None
@@ -158,7 +240,7 @@ def test_search_craigslist_cars_end_to_end(monkeypatch):
         return _FakeResponse(detail_html)
 
     monkeypatch.setattr(httpx.Client, "get", fake_get)
-    monkeypatch.setattr(scr.time, "sleep", lambda *_: None)
+    monkeypatch.setattr(scr, "DETAIL_DELAY_RANGE", (0.0, 0.0))
 
     results = scr.search_craigslist_cars("austin", "honda civic", max_results=10)
 
@@ -166,7 +248,7 @@ def test_search_craigslist_cars_end_to_end(monkeypatch):
     assert len(results) == 2
 
     for item in results:
-        # Contract: these keys are accessed without defaults downstream.
+        # Contract: these fields are accessed without defaults downstream.
         for key in (
             "source",
             "url",
@@ -177,11 +259,11 @@ def test_search_craigslist_cars_end_to_end(monkeypatch):
             "location",
             "posted_at",
         ):
-            assert item.get(key) is not None, f"missing {key}"
-        assert isinstance(item["posted_at"], datetime)
-        assert item["posted_at"].tzinfo is not None
-        assert item["mileage"] == 78000
-        assert "Clean title, runs great" in item["description"]
+            assert getattr(item, key) is not None, f"missing {key}"
+        assert isinstance(item.posted_at, datetime)
+        assert item.posted_at.tzinfo is not None
+        assert item.mileage == 78000
+        assert "Clean title, runs great" in item.description
 
 
 def test_detail_fetch_failure_degrades_gracefully(monkeypatch):
@@ -193,17 +275,17 @@ def test_detail_fetch_failure_degrades_gracefully(monkeypatch):
         raise httpx.ConnectError("boom")
 
     monkeypatch.setattr(httpx.Client, "get", fake_get)
-    monkeypatch.setattr(scr.time, "sleep", lambda *_: None)
+    monkeypatch.setattr(scr, "DETAIL_DELAY_RANGE", (0.0, 0.0))
 
     results = scr.search_craigslist_cars("austin", "honda civic", max_results=10)
 
     # Detail fetches all fail, but search-page data survives with safe defaults.
     assert len(results) == 2
     item = results[0]
-    assert item["listed_price"] == 8500
-    assert item["mileage"] is None
-    assert item["description"] is None
-    assert isinstance(item["posted_at"], datetime)
+    assert item.listed_price == 8500
+    assert item.mileage is None
+    assert item.description is None
+    assert isinstance(item.posted_at, datetime)
 
 
 def test_search_request_error_propagates(monkeypatch):
@@ -214,3 +296,295 @@ def test_search_request_error_propagates(monkeypatch):
 
     with pytest.raises(httpx.ConnectError):
         scr.search_craigslist_cars("austin", "honda civic", max_results=5)
+
+
+def test_concurrent_enrichment_keeps_search_order(monkeypatch):
+    search_html = _load("search_results.html")
+    detail_html = _load("detail.html")
+
+    def fake_get(self, url, *args, **kwargs):
+        if "/search/" in url:
+            return _FakeResponse(search_html)
+        return _FakeResponse(detail_html)
+
+    monkeypatch.setattr(httpx.Client, "get", fake_get)
+    monkeypatch.setattr(scr, "DETAIL_DELAY_RANGE", (0.0, 0.0))
+
+    results = scr.search_craigslist_cars(
+        "austin", "honda civic", max_results=10, concurrency=4
+    )
+
+    assert [r.make for r in results] == ["Honda", "Ford"]
+    assert all(r.mileage == 78000 for r in results)
+
+
+# --------------------------------------------------------------------------- #
+# Pagination / streaming
+# --------------------------------------------------------------------------- #
+
+
+def _paged_fake_get(calls):
+    page1 = _load("search_results.html").replace(
+        "<ul class=\"cl-static-search-results\">",
+        '<a class="cl-next-page" href="/search/cta?query=x&s=120">next</a>'
+        '<ul class="cl-static-search-results">',
+    )
+    pages = {"s=120": _load("search_results_page2.html")}
+    detail_html = _load("detail.html")
+
+    def fake_get(self, url, *args, **kwargs):
+        calls.append(url)
+        if "/search/" in url:
+            for marker, html in pages.items():
+                if marker in url:
+                    return _FakeResponse(html)
+            return _FakeResponse(page1)
+        return _FakeResponse(detail_html)
+
+    return fake_get
+
+
+def test_iter_follows_next_page(monkeypatch):
+    calls = []
+    monkeypatch.setattr(httpx.Client, "get", _paged_fake_get(calls))
+    monkeypatch.setattr(scr, "DETAIL_DELAY_RANGE", (0.0, 0.0))
+
+    results = list(scr.iter_craigslist_cars("austin", "x", max_results=10))
+
+    assert [r.make for r in results] == ["Honda", "Ford", "Mazda"]
+    assert "https://austin.craigslist.org/search/cta?query=x&s=120" in calls
+
+
+def test_iter_stops_paging_once_max_results_reached(monkeypatch):
+    calls = []
+    monkeypatch.setattr(httpx.Client, "get", _paged_fake_get(calls))
+    monkeypatch.setattr(scr, "DETAIL_DELAY_RANGE", (0.0, 0.0))
+
+    results = list(scr.iter_craigslist_cars("austin", "x", max_results=2))
+
+    assert len(results) == 2
+    assert sum("/search/" in url for url in calls) == 1
+
+
+def test_iter_later_page_failure_keeps_earlier_results(monkeypatch):
+    calls = []
+    fake_get = _paged_fake_get(calls)
+
+    def flaky_get(self, url, *args, **kwargs):
+        if "s=120" in url:
+            raise httpx.ConnectError("page 2 down")
+        return fake_get(self, url, *args, **kwargs)
+
+    monkeypatch.setattr(httpx.Client, "get", flaky_get)
+    monkeypatch.setattr(scr, "DETAIL_DELAY_RANGE", (0.0, 0.0))
+
+    results = list(scr.iter_craigslist_cars("austin", "x", max_results=10))
+
+    assert [r.make for r in results] == ["Honda", "Ford"]
+
+
+def test_skip_known_drops_rows_before_detail_fetch(monkeypatch):
+    calls = []
+    monkeypatch.setattr(httpx.Client, "get", _paged_fake_get(calls))
+    monkeypatch.setattr(scr, "DETAIL_DELAY_RANGE", (0.0, 0.0))
+
+    def skip_known(urls):
+        return {u for u in urls if u.endswith("7700000001.html")}
+
+    results = list(
+        scr.iter_craigslist_cars("austin", "x", max_results=2, skip_known=skip_known)
+    )
+
+    # Known Honda is skipped and does not use up max_results.
+    assert [r.make for r in results] == ["Ford", "Mazda"]
+    assert not any(url.endswith("7700000001.html") for url in calls)
+
+
+def test_claim_only_sees_rows_about_to_be_submitted(monkeypatch):
+    calls = []
+    monkeypatch.setattr(httpx.Client, "get", _paged_fake_get(calls))
+    monkeypatch.setattr(scr, "DETAIL_DELAY_RANGE", (0.0, 0.0))
+    claimed = []
+
+    def claim(urls):
+        claimed.append([url.rsplit("/", 1)[-1] for url in urls])
+        return {u for u in urls if u.endswith("7700000001.html")}
+
+    results = list(scr.iter_craigslist_cars("austin", "x", max_results=1, claim=claim))
+
+    # The Honda is a sibling's; the Ford takes its slot. The Mazda on page 2 is
+    # never claimed, so a sibling job can still fetch it.
+    assert [r.make for r in results] == ["Ford"]
+    assert claimed == [["7700000001.html"], ["7700000003.html"]]
+
+
+def test_iter_stops_at_first_already_seen_page(monkeypatch):
+    calls = []
+    monkeypatch.setattr(httpx.Client, "get", _paged_fake_get(calls))
+    monkeypatch.setattr(scr, "DETAIL_DELAY_RANGE", (0.0, 0.0))
+    mark = Watermark(post_ids=["7700000004"])
+
+    results = list(
+        scr.iter_craigslist_cars(
+            "austin", "x", max_results=10, page_already_seen=mark.covers
+        )
+    )
+
+    # Page 1 has new posts; page 2 (only the Mazda) was handled last sweep.
+    assert [r.make for r in results] == ["Honda", "Ford"]
+    assert not any(url.endswith("7700000004.html") for url in calls)
+
+
+# --------------------------------------------------------------------------- #
+# HTML parser backends
+# --------------------------------------------------------------------------- #
+
+needs_lxml = pytest.mark.skipif(not lxml_available(), reason="lxml not installed")
+
+_TRICKY_DETAIL = """
+<html><body>
+<section id="postingbody"><div class="print-information print-qrcode-container">
+QR Code Link to This Post</div>Line one &amp; more<!-- hidden --><script>x()</script>
+<div class="notices">junk</div>tail after junk<br>Line <b>two</b>
+</section>
+<p class="attrgroup"><span>condition: <b>excellent</b></span>
+<span>odometer:   <b>123,456</b></span></p>
+<time datetime=" 2024-06-02T08:00:00-0700 "></time>
+</body></html>
+"""
+
+
+@needs_lxml
+@pytest.mark.parametrize("fixture", ["search_results.html", "search_results_page2.html"])
+def test_backends_agree_on_search_pages(fixture):
+    html = _load(fixture)
+    assert Bs4Backend().search_page(html) == LxmlBackend().search_page(html)
+    assert scr._parse_search_results(
+        html, "austin", backend=Bs4Backend()
+    ) == scr._parse_search_results(html, "austin", backend=LxmlBackend())
+
+
+@needs_lxml
+@pytest.mark.parametrize("html", [_load("detail.html"), _TRICKY_DETAIL, "", "<p>x</p>"])
+def test_backends_agree_on_detail_pages(html):
+    assert Bs4Backend().detail_page(html) == LxmlBackend().detail_page(html)
+
+    bs4_fields = scr._parse_detail(html, backend=Bs4Backend())
+    lxml_fields = scr._parse_detail(html, backend=LxmlBackend())
+    assert bs4_fields["mileage"] == lxml_fields["mileage"]
+    assert bs4_fields["description"] == lxml_fields["description"]
+
+
+@needs_lxml
+def test_backends_agree_on_next_page_link():
+    html = '<html><head><link rel="next" href="/search/cta?s=120"></head><body></body></html>'
+    assert Bs4Backend().search_page(html) == LxmlBackend().search_page(html)
+    assert LxmlBackend().search_page(html)[1] == "/search/cta?s=120"
+
+
+def test_get_backend_selection(monkeypatch):
+    assert get_backend("bs4").name == "bs4"
+    expected = "lxml" if lxml_available() else "bs4"
+    assert get_backend("auto").name == expected
+    with pytest.raises(ValueError):
+        get_backend("html5lib")
+
+    monkeypatch.setattr(settings, "scraper_html_parser", "html5lib")
+    with pytest.raises(ValueError, match="'html5lib'"):
+        get_backend()
+
+
+def test_throttled_detail_fetch_is_retried_once(monkeypatch):
+    search_html = _load("search_results.html")
+    detail_html = _load("detail.html")
+    detail_calls = []
+
+    def fake_get(self, url, *args, **kwargs):
+        if "/search/" in url:
+            return _FakeResponse(search_html)
+        detail_calls.append(url)
+        if len(detail_calls) == 1:
+            return _FakeResponse("slow down", 429, {"Retry-After": "0"})
+        return _FakeResponse(detail_html)
+
+    monkeypatch.setattr(httpx.Client, "get", fake_get)
+    monkeypatch.setattr(scr, "DETAIL_DELAY_RANGE", (0.0, 0.0))
+
+    results = scr.search_craigslist_cars("austin", "x", max_results=1, concurrency=1)
+
+    assert len(detail_calls) == 2
+    assert results[0].mileage == 78000
+
+
+def test_captcha_detail_page_ends_the_job(monkeypatch):
+    search_html = _load("search_results.html")
+
+    def fake_get(self, url, *args, **kwargs):
+        if "/search/" in url:
+            return _FakeResponse(search_html)
+        return _FakeResponse('<form><div class="h-captcha"></div></form>')
+
+    monkeypatch.setattr(httpx.Client, "get", fake_get)
+    monkeypatch.setattr(scr, "DETAIL_DELAY_RANGE", (0.0, 0.0))
+
+    with pytest.raises(ScraperBlocked, match="captcha"):
+        scr.search_craigslist_cars("austin", "x", max_results=5)
+
+
+def test_forbidden_search_page_is_a_block_not_an_http_error(monkeypatch):
+    def fake_get(self, url, *args, **kwargs):
+        return _FakeResponse("denied", 403)
+
+    monkeypatch.setattr(httpx.Client, "get", fake_get)
+
+    with pytest.raises(ScraperBlocked, match="HTTP 403"):
+        scr.search_craigslist_cars("austin", "x", max_results=5)
+
+
+def test_running_out_of_time_budget_ends_the_job_not_just_one_listing(monkeypatch):
+    calls = []
+    fake_get = _paged_fake_get(calls)
+
+    def out_of_time_on_details(self, url, *args, **kwargs):
+        if "/search/" not in url:
+            raise TimeBudgetExhausted("no slot left")
+        return fake_get(self, url, *args, **kwargs)
+
+    monkeypatch.setattr(httpx.Client, "get", out_of_time_on_details)
+    monkeypatch.setattr(scr, "DETAIL_DELAY_RANGE", (0.0, 0.0))
+
+    # Not degraded into a listing without details: the task must stop.
+    with pytest.raises(TimeBudgetExhausted):
+        scr.search_craigslist_cars("austin", "x", max_results=5)
+
+
+def test_search_rows_carry_canonical_url_and_post_id():
+    html = _load("search_results.html").replace(
+        "7700000001.html", "7700000001.html?utm_source=feed#photos"
+    )
+    rows = scr._parse_search_results(html, "austin")
+
+    assert rows[0].url.endswith("/7700000001.html")
+    assert rows[0].external_id == 7700000001
+
+
+def test_repost_under_another_url_is_fetched_once(monkeypatch):
+    page = _load("search_results.html").replace(
+        "austin-2018-ford-f150-xlt/7700000003.html",
+        "austin-2015-honda-civic-lx-repost/7700000001.html",
+    )
+    detail_calls = []
+
+    def fake_get(self, url, *args, **kwargs):
+        if "/search/" in url:
+            return _FakeResponse(page)
+        detail_calls.append(url)
+        return _FakeResponse(_load("detail.html"))
+
+    monkeypatch.setattr(httpx.Client, "get", fake_get)
+    monkeypatch.setattr(scr, "DETAIL_DELAY_RANGE", (0.0, 0.0))
+
+    results = scr.search_craigslist_cars("austin", "x", max_results=10)
+
+    assert [r.external_id for r in results] == [7700000001]
+    assert len(detail_calls) == 1
@@ -0,0 +1,94 @@
+"""Offline tests for the Redis seen-URL index (in-memory Redis stand-in)."""
+
+import pytest
+
+from app import seen_index
+from app.seen_index import SeenIndex
+
+
+def _index(fake, rows=(), refresh_after=0, now=1000.0, db=None):
+    return SeenIndex(
+        fake,
+        refresh_after_seconds=refresh_after,
+        load_rows=lambda: list(rows),
+        db_lookup=db or (lambda urls: set()),
+        clock=lambda: now,
+    )
+
+
+def test_rebuilds_from_db_when_key_missing(fake_redis):
+    index = _index(fake_redis, rows=[("https://a/1", 10.0), ("https://a/2", 20.0)])
+
+    assert index.known_urls(["https://a/1", "https://a/3"]) == {"https://a/1"}
+    assert set(fake_redis.data["scraper:seen:posts"]) == {"https://a/1", "https://a/2"}
+    assert fake_redis.keys() == ["scraper:seen:posts"]
+    assert fake_redis.ttl("scraper:seen:posts") == -1
+
+
+def test_only_one_worker_rebuilds_the_others_use_the_db(fake_redis):
+    fake_redis.set("scraper:seen:posts:rebuilding", "1", nx=True, ex=600)
+    index = _index(
+        fake_redis,
+        rows=[("https://a/1", 10.0)],
+        db=lambda urls: {u for u in urls if u.endswith("2")},
+    )
+
+    assert index.known_urls(["https://a/1", "https://a/2"]) == {"https://a/2"}
+    assert fake_redis.keys() == ["scraper:seen:posts:rebuilding"]
+
+    # A lock left behind by a dead worker lapses and the next caller rebuilds.
+    fake_redis.advance(600)
+    assert index.known_urls(["https://a/1", "https://a/2"]) == {"https://a/1"}
+    assert fake_redis.keys() == ["scraper:seen:posts"]
+
+
+def test_failed_rebuild_frees_the_lock_and_its_temp_key_expires(fake_redis, monkeypatch):
+    monkeypatch.setattr(seen_index, "_REBUILD_CHUNK", 1)
+
+    def rows():
+        yield "https://a/1", 10.0
+        raise RuntimeError("db went away")
+
+    index = SeenIndex(fake_redis, load_rows=rows, db_lookup=lambda urls: set())
+    with pytest.raises(RuntimeError):
+        index.known_urls(["https://a/1"])
+
+    (tmp_key,) = fake_redis.keys()
+    assert tmp_key.startswith("scraper:seen:posts:rebuild:")
+    fake_redis.advance(fake_redis.ttl(tmp_key))
+    assert fake_redis.keys() == []
+
+
+def test_mark_makes_urls_known(fake_redis):
+    index = _index(fake_redis)
+
+    index.mark(["https://a/9"])
+    assert index.known_urls(["https://a/9"]) == {"https://a/9"}
+
+
+def test_stale_members_are_let_through(fake_redis):
+    rows = [("https://a/old", 100.0), ("https://a/new", 950.0)]
+    index = _index(fake_redis, rows=rows, refresh_after=500, now=1000.0)
+
+    assert index.known_urls(["https://a/old", "https://a/new"]) == {"https://a/new"}
+
+
+def test_falls_back_to_db_when_redis_is_down(fake_redis):
+    fake_redis.fail = True
+    index = _index(fake_redis, db=lambda urls: {u for u in urls if u.endswith("1")})
+
+    assert index.known_urls(["https://a/1", "https://a/2"]) == {"https://a/1"}
+    index.mark(["https://a/2"])  # swallowed, not raised
+
+
+def test_url_variants_of_one_post_share_a_member(fake_redis):
+    index = _index(fake_redis)
+
+    index.mark(["https://austin.craigslist.org/cto/d/austin-civic/7700000001.html"])
+    variants = [
+        "https://dallas.craigslist.org/cto/d/dallas-civic-clean/7700000001.html",
+        "http://austin.craigslist.org/cto/d/austin-civic/7700000001.html?lang=en",
+        "https://austin.craigslist.org/cto/d/austin-civic/7700000002.html",
+    ]
+    assert index.known_urls(variants) == set(variants[:2])
+    assert set(fake_redis.data["scraper:seen:posts"]) == {"craigslist:7700000001"}
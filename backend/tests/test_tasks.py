@@ -0,0 +1,197 @@
+"""Offline tests for the single-task Craigslist sweep (stores on a fake Redis)."""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from app import crawl_scheduler, crawl_watermarks, scrape_checkpoints, scrape_coalescing, tasks
+from app.circuit_breaker import ScraperBlocked
+from app.listing_record import ListingRecord
+from app.listing_writer import BatchOutcome
+from app.scrape_checkpoints import CheckpointStore
+from app.seen_index import SeenIndex
+from app.settings import settings
+
+URL = "https://austin.craigslist.org/cto/d/car/{}.html"
+
+
+class FakeSession:
+    def __init__(self):
+        self.commits = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+class Sweep:
+    """What one run of the task did: crawl calls, written batches, commits."""
+
+    def __init__(self, monkeypatch, fake_redis):
+        self.redis = fake_redis
+        self.session = FakeSession()
+        self.crawls = []
+        self.batches = []
+        self.numbers = []
+        self.fail_after = None
+        self.error = None
+        monkeypatch.setattr(tasks, "SyncSessionLocal", lambda: self.session)
+        monkeypatch.setattr(tasks, "persist_listings", self._persist)
+        monkeypatch.setattr(tasks, "iter_craigslist_cars", self._crawl)
+
+    def _persist(self, session, items):
+        self.batches.append([item.url for item in items])
+        return BatchOutcome(inserted=len(items), persisted_urls=[item.url for item in items])
+
+    def _crawl(self, *, city, query, max_results, skip_known, page_already_seen, claim):
+        self.crawls.append(max_results)
+        urls = [URL.format(n) for n in self.numbers]
+        if page_already_seen is not None and page_already_seen(urls):
+            return
+        known = skip_known(urls)
+        for count, url in enumerate([u for u in urls if u not in known][:max_results]):
+            if count == self.fail_after:
+                raise self.error
+            yield ListingRecord(
+                source="craigslist",
+                url=url,
+                title="2015 Honda Civic",
+                listed_price=5000,
+                location="Austin",
+                make="Honda",
+                model="Civic",
+                posted_at=datetime(2026, 1, 1, tzinfo=timezone.utc),
+            )
+
+    def run(self, max_results=5, job_id="job-1", **kwargs):
+        task = tasks.scrape_craigslist_task
+        task.push_request(id=job_id)
+        try:
+            return task.run("austin", "civic", max_results, **kwargs)
+        finally:
+            task.pop_request()
+
+
+@pytest.fixture
+def sweep(monkeypatch, fake_redis):
+    for module in (crawl_scheduler, crawl_watermarks, scrape_checkpoints, scrape_coalescing):
+        monkeypatch.setattr(module, "get_redis", lambda: fake_redis)
+    monkeypatch.setattr(
+        tasks.SeenIndex,
+        "from_settings",
+        classmethod(lambda cls: SeenIndex(fake_redis, load_rows=list, clock=fake_redis.time)),
+    )
+    monkeypatch.setattr(tasks, "pool_stats", lambda: {"requests": 0})
+    monkeypatch.setattr(tasks.scrape_craigslist_task, "update_state", lambda **kwargs: None)
+    monkeypatch.setattr(settings, "scraper_pipeline", "single")
+    monkeypatch.setattr(settings, "scraper_persist_batch_size", 2)
+    monkeypatch.setattr(settings, "scraper_persist_flush_s", 3600)
+    return Sweep(monkeypatch, fake_redis)
+
+
+def test_block_mid_sweep_writes_and_checkpoints_what_was_fetched(sweep, monkeypatch):
+    monkeypatch.setattr(settings, "scraper_persist_batch_size", 10)
+    sweep.numbers = [1, 2, 3]
+    sweep.fail_after, sweep.error = 2, ScraperBlocked("craigslist.org", "HTTP 403")
+
+    with pytest.raises(ScraperBlocked):
+        sweep.run()
+
+    assert sweep.batches == [[URL.format(1), URL.format(2)]]
+    assert sweep.session.commits == 1
+    checkpoint = CheckpointStore.from_settings().load("job-1")
+    assert checkpoint.done == {URL.format(1), URL.format(2)}
+    assert checkpoint.counters["fetched"] == 2
+
+
+def _claim(max_results=5, job_id="job-1"):
+    assert scrape_coalescing.join_or_claim("austin", "civic", max_results, job_id) is None
+
+
+def test_full_sweep_commits_micro_batches_and_settles(sweep):
+    sweep.numbers = [1, 2, 3, 4, 5]
+    _claim()
+
+    result = sweep.run()
+
+    assert sweep.batches == [
+        [URL.format(1), URL.format(2)],
+        [URL.format(3), URL.format(4)],
+        [URL.format(5)],
+    ]
+    assert sweep.session.commits == 3
+    assert (result["fetched"], result["inserted"]) == (5, 5)
+    assert "partial" not in result
+    assert CheckpointStore.from_settings().load("job-1") is None
+    (flight,) = sweep.redis.keys("scrape:single-flight:*")
+    assert sweep.redis.ttl(flight) == settings.scrape_coalesce_window_s
+
+
+def test_soft_limit_returns_a_partial_result_and_releases_the_claim(sweep):
+    sweep.numbers = [1, 2, 3, 4, 5]
+    sweep.fail_after, sweep.error = 3, tasks.SoftTimeLimitExceeded()
+    _claim()
+
+    result = sweep.run()
+
+    assert result["partial"] is True and result["continuation"] == "job-1"
+    assert result["fetched"] == 3
+    assert sweep.batches == [[URL.format(1), URL.format(2)], [URL.format(3)]]
+    assert sweep.redis.keys("scrape:single-flight:*") == []
+    checkpoint = CheckpointStore.from_settings().load("job-1")
+    assert checkpoint.done == {URL.format(n) for n in (1, 2, 3)}
+
+
+def test_continuation_resumes_from_the_checkpoint(sweep):
+    sweep.numbers = [1, 2, 3, 4, 5]
+    sweep.fail_after, sweep.error = 3, tasks.SoftTimeLimitExceeded()
+    sweep.run()
+    sweep.fail_after = None
+    sweep.batches = []
+
+    result = sweep.run(job_id="job-2", continuation="job-1")
+
+    # Only what the first attempt did not fetch is asked for, and fetched.
+    assert sweep.crawls == [5, 2]
+    assert sweep.batches == [[URL.format(4), URL.format(5)]]
+    assert result["fetched"] == 5 and result["inserted"] == 5
+    assert "partial" not in result
+    assert CheckpointStore.from_settings().load("job-1") is None
+
+
+def test_continuation_does_not_count_pre_filtered_urls_twice(sweep):
+    SeenIndex.from_settings().mark([URL.format(1)])
+    sweep.numbers = [1, 2, 3, 4]
+    sweep.fail_after, sweep.error = 1, tasks.SoftTimeLimitExceeded()
+    assert sweep.run()["pre_filtered"] == 1
+    sweep.fail_after = None
+
+    result = sweep.run(job_id="job-2", continuation="job-1")
+
+    assert result["pre_filtered"] == 1
+    assert result["fetched"] == 3
+
+
+def test_watermark_only_advances_after_a_full_sweep(sweep):
+    marks = crawl_watermarks.WatermarkStore.from_settings()
+    sweep.numbers = [1, 2, 3]
+    sweep.fail_after, sweep.error = 1, tasks.SoftTimeLimitExceeded()
+    sweep.run()
+    assert marks.load("austin", "civic").post_ids == []
+
+    sweep.fail_after = None
+    sweep.run(job_id="job-2")
+    assert marks.load("austin", "civic").covers([URL.format(n) for n in (1, 2, 3)])
+
+    # The next sweep stops at the page the mark already covers.
+    sweep.batches = []
+    result = sweep.run(job_id="job-3")
+    assert sweep.batches == [] and result["fetched"] == 0
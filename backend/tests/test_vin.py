@@ -0,0 +1,21 @@
+from app.vin import check_digit, extract_vin, is_valid_vin
+
+
+def test_check_digit_matches_known_vins():
+    assert check_digit("1HGCM82633A004352") == "3"
+    assert check_digit("1M8GDM9AXKP042788") == "X"
+
+
+def test_is_valid_vin_rejects_typos_and_placeholders():
+    assert is_valid_vin("1hgcm82633a004352")
+    assert not is_valid_vin("1HGCM82643A004352")  # check digit off by one
+    assert not is_valid_vin("1HGCM82633A00435")  # 16 characters
+    assert not is_valid_vin("1HGCM82633A0O4352")  # O is never used
+    assert not is_valid_vin("11111111111111111")
+
+
+def test_extract_vin_finds_whole_token_in_free_text():
+    text = "Clean title. VIN#1hgcm82633a004352, call 512-555-0100."
+    assert extract_vin(text) == "1HGCM82633A004352"
+    assert extract_vin("stock X1HGCM82633A004352") is None
+    assert extract_vin(None, "no vin here", "vin: 1M8GDM9AXKP042788") == "1M8GDM9AXKP042788"
@@ -225,7 +225,11 @@ function Dashboard({
       if (s.state === "SUCCESS" && dealsQuery.isFetching) return "loading deals";
       return null;
     }
-    if (s.state === "PROGRESS" && typeof s.progress?.stage === "string") return s.progress.stage;
+    if (s.state === "PROGRESS" && typeof s.progress?.stage === "string") {
+      const { stage, fetched, inserted } = s.progress;
+      if (typeof fetched !== "number") return stage;
+      return `${stage} · ${fetched} fetched · ${inserted ?? 0} new`;
+    }
     if (s.state === "STARTED") return "started";
     if (s.state === "PENDING") return "queued";
     if (s.state === "RETRY") return "retrying";
@@ -340,7 +344,7 @@ function Dashboard({
             {jobSummary && !loading && (
               <p className="mt-5 text-[13px] text-[var(--ink-muted)] flex items-center gap-2">
                 <span className="w-2 h-2 rounded-full bg-[var(--green)] shrink-0" />
-                Done · {jobSummary.fetched} fetched · {jobSummary.inserted} new · {jobSummary.skipped} skipped
+                Done · {jobSummary.fetched} fetched · {jobSummary.inserted} new · {jobSummary.updated ?? 0} updated · {jobSummary.skipped} skipped
               </p>
             )}
 
@@ -163,6 +163,7 @@ export type ScrapeJobAccepted = {
   city: string;
   query: string;
   max_results: number;
+  coalesced: boolean; // an identical in-flight job was reused
 };
 
 export type ScrapeJobState =
@@ -176,12 +177,20 @@ export type ScrapeJobState =
 export type ScrapeJobStatus = {
   job_id: string;
   state: ScrapeJobState;
-  progress: { stage?: string; [k: string]: unknown } | null;
+  progress: {
+    stage?: string;
+    fetched?: number;
+    inserted?: number;
+    updated?: number;
+    skipped?: number;
+    [k: string]: unknown;
+  } | null;
   result: {
     city: string;
     query: string;
     fetched: number;
     inserted: number;
+    updated?: number;
     skipped: number;
   } | null;
   error: string | null;
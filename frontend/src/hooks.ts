@@ -124,6 +124,16 @@ export function useScrapeJob(jobId: string | null) {
     }
   }, [result.data?.state, qc]);
 
+  // The worker commits in micro-batches, so deals land while the job is
+  // still running: refresh the lists each time the inserted count grows.
+  const progress = result.data?.state === "PROGRESS" ? result.data.progress : null;
+  const insertedSoFar = typeof progress?.inserted === "number" ? progress.inserted : 0;
+  useEffect(() => {
+    if (insertedSoFar > 0) {
+      qc.invalidateQueries({ queryKey: queryKeys.deals.all });
+    }
+  }, [insertedSoFar, qc]);
+
   return result;
 }
 